@@ -0,0 +1,134 @@
+"""
+Local fixture web server for benchmarks
+Serves synthetic pages of configurable weight and DOM size so agents can be
+measured without touching the internet
+"""
+
+import random
+import struct
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import List
+from urllib.parse import urlparse, parse_qs
+
+
+def make_bmp(num_bytes: int) -> bytes:
+    """Build a valid 24-bit BMP image of roughly num_bytes"""
+    width = 256
+    row_size = width * 3
+    height = max(1, (num_bytes - 54) // row_size)
+    pixels = bytes(random.getrandbits(8) for _ in range(row_size)) * height
+
+    header = b'BM' + struct.pack('<IHHI', 54 + len(pixels), 0, 0, 54)
+    info = struct.pack('<IiiHHIIiiII', 40, width, height, 1, 24, 0, len(pixels), 2835, 2835, 0, 0)
+    return header + info + pixels
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """Serves /, /page/<n>, /img/<n>.bmp and /search"""
+
+    server_config = None  # Set by FixtureServer
+
+    def log_message(self, format, *args):
+        """Keep benchmark output quiet"""
+        pass
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        path = parsed.path
+
+        if path == '/' or path.startswith('/page/'):
+            self._send(self._render_page(path), 'text/html; charset=utf-8')
+        elif path.startswith('/img/'):
+            self._send(self.server_config['image_bytes'], 'image/bmp')
+        elif path == '/search':
+            query = parse_qs(parsed.query).get('q', [''])[0]
+            self._send(self._render_page(path, title=f"Results for {query}"), 'text/html; charset=utf-8')
+        else:
+            self.send_error(404, "Not Found")
+
+    def _send(self, body: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _render_page(self, path: str, title: str = None) -> bytes:
+        """Synthetic article with a search form, links, buttons and images"""
+        config = self.server_config
+        num_pages = config['num_pages']
+        parts = [
+            '<!DOCTYPE html><html><head><meta charset="utf-8">',
+            f'<title>{title or path}</title></head><body>',
+            '<form action="/search"><input type="search" name="q" placeholder="Search"></form>',
+        ]
+
+        for i in range(config['images_per_page']):
+            parts.append(f'<img src="/img/{i}.bmp" width="256" alt="image {i}">')
+
+        # DOM size: mix of paragraphs, links and buttons
+        filler = config['filler_text']
+        for i in range(config['dom_size']):
+            kind = i % 4
+            if kind == 0:
+                parts.append(f'<a href="/page/{random.randrange(num_pages)}">Link {i}</a>')
+            elif kind == 1:
+                parts.append(f'<button onclick="void(0)">Button {i}</button>')
+            else:
+                parts.append(f'<p>{filler}</p>')
+
+        parts.append('</body></html>')
+        return ''.join(parts).encode('utf-8')
+
+
+class FixtureServer:
+    """Threaded HTTP server serving synthetic benchmark pages"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, page_weight_kb: int = 200,
+                 dom_size: int = 500, images_per_page: int = 5, num_pages: int = 50):
+        self.host = host
+        self.port = port
+        self.page_weight_kb = page_weight_kb
+        self.dom_size = dom_size
+        self.images_per_page = images_per_page
+        self.num_pages = num_pages
+        self.httpd = None
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.httpd.server_address[1]}"
+
+    def _build_config(self) -> dict:
+        # Split page weight evenly between HTML text and images
+        total = self.page_weight_kb * 1024
+        image_bytes = (total // 2) // max(1, self.images_per_page)
+        text_elements = max(1, self.dom_size // 2)
+        filler_len = max(10, (total // 2) // text_elements)
+        return {
+            'num_pages': self.num_pages,
+            'dom_size': self.dom_size,
+            'images_per_page': self.images_per_page,
+            'image_bytes': make_bmp(image_bytes),
+            'filler_text': ('lorem ipsum dolor sit amet ' * (filler_len // 27 + 1))[:filler_len],
+        }
+
+    def start(self):
+        """Start serving in a background thread"""
+        handler = type('ConfiguredFixtureHandler', (FixtureHandler,),
+                       {'server_config': self._build_config()})
+        self.httpd = ThreadingHTTPServer((self.host, self.port), handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def page_urls(self) -> List[str]:
+        """URLs of every synthetic page, for a websites.yaml category"""
+        return [f"{self.base_url}/page/{i}" for i in range(self.num_pages)]
+
+    def stop(self):
+        """Stop serving"""
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
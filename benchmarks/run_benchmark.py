@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput benchmark for decoy agents
+Runs DecoyService against the local fixture server and writes JSON results:
+visits/min, actions/min, CPU seconds and peak RSS per agent for each engine
+
+Usage:
+    python benchmarks/run_benchmark.py --engines selenium playwright --agents 2 --duration 120
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import yaml
+
+# Run from anywhere without installing the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from decoy_service.decoy_service import DecoyService
+from decoy_service.search_engines import DEFAULT_SEARCH_ENGINES
+from decoy_service.utils import ProcessStats
+
+from fixture_server import FixtureServer
+
+PACKAGE_CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              'decoy_service', 'config')
+
+
+class ResourceSampler:
+    """Samples CPU time and RSS of this process and every browser it spawned"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.pid = os.getpid()
+        self.peak_rss = 0
+        self.cpu_by_pid = {}
+        self.cpu_at_start = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        pids = ProcessStats.descendants(self.pid) + [self.pid]
+        rss = 0
+        for pid in pids:
+            rss += ProcessStats.rss_bytes(pid)
+            # Keep the last reading of processes that have since exited
+            self.cpu_by_pid[pid] = max(self.cpu_by_pid.get(pid, 0.0), ProcessStats.cpu_seconds(pid))
+        self.peak_rss = max(self.peak_rss, rss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._sample()
+        self.cpu_at_start = sum(self.cpu_by_pid.values())
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+    @property
+    def cpu_seconds(self) -> float:
+        return sum(self.cpu_by_pid.values()) - self.cpu_at_start
+
+
+def write_config(config_dir: str, engine: str, args, server: FixtureServer):
+    """Write settings.yaml/websites.yaml pointing the service at the fixture server"""
+    with open(os.path.join(PACKAGE_CONFIG, 'settings.yaml'), 'r') as f:
+        settings = yaml.safe_load(f)
+
+    settings['browser']['type'] = engine
+    settings['browser']['headless'] = True
+    settings['service']['parallel_agents'] = args.agents
+    settings['service']['agent_stagger_seconds'] = 0
+    settings['service']['session_duration'] = 0
+    settings['activity'].update({
+        'page_dwell_min': args.dwell_min,
+        'page_dwell_max': args.dwell_max,
+        'click_interval_min': args.interval_min,
+        'click_interval_max': args.interval_max,
+    })
+    settings['logging']['level'] = 'WARNING'
+    settings['logging']['log_file'] = os.path.join(config_dir, 'logs', 'benchmark.log')
+    settings.setdefault('selector_knowledge', {})['path'] = os.path.join(config_dir, 'selector_knowledge.json')
+
+    # Searches go to the fixture server's /search, never to real engines
+    search_engines = {name: {'enabled': False} for name in DEFAULT_SEARCH_ENGINES}
+    search_engines['fixture'] = {'home': f"{server.base_url}/",
+                                 'results': f"{server.base_url}/search?q={{query}}"}
+
+    websites = {
+        'categories': {'fixture': server.page_urls()},
+        'search_engines': search_engines,
+        'search_queries': ['benchmark query', 'synthetic page', 'fixture search'],
+    }
+
+    with open(os.path.join(config_dir, 'settings.yaml'), 'w') as f:
+        yaml.safe_dump(settings, f)
+    with open(os.path.join(config_dir, 'websites.yaml'), 'w') as f:
+        yaml.safe_dump(websites, f)
+
+
+def run_engine(engine: str, args, server: FixtureServer) -> dict:
+    """Run one engine for args.duration seconds and measure it"""
+    with tempfile.TemporaryDirectory() as config_dir:
+        write_config(config_dir, engine, args, server)
+        service = DecoyService(config_dir)
+
+        sampler = ResourceSampler()
+        sampler.start()
+        started = time.monotonic()
+
+        session = threading.Thread(target=service.start_session, daemon=True)
+        session.start()
+        session.join(timeout=args.duration)
+
+        service.stop_session()
+        session.join(timeout=30)
+        elapsed = time.monotonic() - started
+        sampler.stop()
+
+    summary = service.tracker.get_summary()
+    minutes = elapsed / 60
+    actions = summary['websites_visited'] + summary['search_queries'] + summary['total_clicks']
+
+    return {
+        'engine': engine,
+        'agents': args.agents,
+        'duration_seconds': round(elapsed, 1),
+        'visits': summary['websites_visited'],
+        'searches': summary['search_queries'],
+        'clicks': summary['total_clicks'],
+        'visits_per_min': round(summary['websites_visited'] / minutes, 2),
+        'actions_per_min': round(actions / minutes, 2),
+        'cpu_seconds': round(sampler.cpu_seconds, 2),
+        'peak_rss_mb': round(sampler.peak_rss / 1024 / 1024, 1),
+        'peak_rss_mb_per_agent': round(sampler.peak_rss / 1024 / 1024 / args.agents, 1),
+        'bytes_transferred': summary['bytes_transferred'],
+        'actions': service.metrics.snapshot(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark decoy agents against a local fixture server")
+    parser.add_argument('--engines', nargs='+', default=['selenium', 'playwright'])
+    parser.add_argument('--agents', type=int, default=1)
+    parser.add_argument('--duration', type=float, default=120, help="seconds per engine")
+    parser.add_argument('--page-weight-kb', type=int, default=200)
+    parser.add_argument('--dom-size', type=int, default=500)
+    parser.add_argument('--images-per-page', type=int, default=5)
+    parser.add_argument('--pages', type=int, default=50)
+    parser.add_argument('--dwell-min', type=float, default=2)
+    parser.add_argument('--dwell-max', type=float, default=6)
+    parser.add_argument('--interval-min', type=float, default=1)
+    parser.add_argument('--interval-max', type=float, default=2)
+    parser.add_argument('--output', default=None, help="JSON results file")
+    args = parser.parse_args()
+
+    server = FixtureServer(page_weight_kb=args.page_weight_kb, dom_size=args.dom_size,
+                           images_per_page=args.images_per_page, num_pages=args.pages)
+    server.start()
+    print(f"Fixture server on {server.base_url}")
+
+    results = []
+    try:
+        for engine in args.engines:
+            print(f"Benchmarking {engine} ({args.agents} agents, {args.duration:.0f}s)...")
+            result = run_engine(engine, args, server)
+            print(json.dumps(result, indent=2))
+            results.append(result)
+    finally:
+        server.stop()
+
+    output = args.output or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'results',
+        f"benchmark-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'timestamp': datetime.now().isoformat(),
+            'fixture': {
+                'page_weight_kb': args.page_weight_kb,
+                'dom_size': args.dom_size,
+                'images_per_page': args.images_per_page,
+                'pages': args.pages,
+            },
+            'activity': {
+                'dwell_min': args.dwell_min,
+                'dwell_max': args.dwell_max,
+                'interval_min': args.interval_min,
+                'interval_max': args.interval_max,
+            },
+            'results': results,
+        }, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
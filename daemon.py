@@ -12,6 +12,8 @@ import signal
 import sys
 import logging
 import threading
+from contextlib import nullcontext
+from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any
 from http.server import HTTPServer, BaseHTTPRequestHandler
@@ -49,13 +51,22 @@ class HTTPBridgeHandler(BaseHTTPRequestHandler):
         parsed_path = urlparse(self.path)
 
         if parsed_path.path == '/api/status':
-            response = self.daemon_instance.cmd_status()
+            with self.daemon_instance.timed_request('http.status'):
+                response = self.daemon_instance.cmd_status()
             self.send_json_response(response)
         elif parsed_path.path == '/api/activity-log':
-            response = self.daemon_instance.cmd_activity_log()
+            with self.daemon_instance.timed_request('http.activity-log'):
+                response = self.daemon_instance.cmd_activity_log()
             self.send_json_response(response)
         elif parsed_path.path == '/api/health':
             self.send_json_response({'success': True, 'status': 'healthy'})
+        elif parsed_path.path == '/api/metrics':
+            with self.daemon_instance.timed_request('http.metrics'):
+                response = self.daemon_instance.cmd_metrics()
+            if response['success']:
+                self.send_text_response(response['metrics'], 'text/plain; version=0.0.4; charset=utf-8')
+            else:
+                self.send_json_response(response)
         else:
             self.send_error(404, "Not Found")
 
@@ -64,10 +75,12 @@ class HTTPBridgeHandler(BaseHTTPRequestHandler):
         parsed_path = urlparse(self.path)
 
         if parsed_path.path == '/api/start':
-            response = self.daemon_instance.cmd_start()
+            with self.daemon_instance.timed_request('http.start'):
+                response = self.daemon_instance.cmd_start()
             self.send_json_response(response)
         elif parsed_path.path == '/api/stop':
-            response = self.daemon_instance.cmd_stop()
+            with self.daemon_instance.timed_request('http.stop'):
+                response = self.daemon_instance.cmd_stop()
             self.send_json_response(response)
         else:
             self.send_error(404, "Not Found")
@@ -82,6 +95,16 @@ class HTTPBridgeHandler(BaseHTTPRequestHandler):
         self.end_headers()
         self.wfile.write(json.dumps(data).encode('utf-8'))
 
+    def send_text_response(self, text: str, content_type: str):
+        """Send a plain-text response (e.g. Prometheus metrics)"""
+        body = text.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
     def do_OPTIONS(self):
         """Handle OPTIONS requests for CORS preflight"""
         self.send_response(200)
@@ -99,16 +122,29 @@ class DecoyDaemon:
         self.client_threads = []
         self.http_server = None
         self.http_thread = None
+        self.browser_pool = None
+        self.supervisor = None
+        self.config_dir = None
+        # Latency of socket commands and HTTP bridge requests
+        self.ipc_metrics = None
         
         # Import service here to avoid early dependencies
         try:
             # Import from the decoy_service module directly
             sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+            from decoy_service.metrics import MetricsRegistry
+            self.ipc_metrics = MetricsRegistry()
             from decoy_service.decoy_service import DecoyService
             # Use correct config path
             config_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'decoy_service', 'config')
+            self.config_dir = config_dir
             self.service = DecoyService(config_dir=config_dir)
             logger.info("✅ DecoyService initialized successfully")
+
+            # Keep idle headless browsers ready so /api/start is instant
+            from decoy_service.browser_pool import WarmBrowserPool
+            self.browser_pool = WarmBrowserPool(self.service.logger, self.service.settings)
+            self.service.browser_pool = self.browser_pool
         except Exception as e:
             logger.error(f"❌ Failed to load DecoyService: {e}")
             import traceback
@@ -161,10 +197,22 @@ class DecoyDaemon:
         finally:
             conn.close()
     
+    def timed_request(self, name: str):
+        """Context manager recording the latency of one IPC/HTTP request"""
+        if self.ipc_metrics is None:
+            return nullcontext()
+        return self.ipc_metrics.time(name)
+
     def process_command(self, request: Dict[str, Any]) -> Dict[str, Any]:
         """Process incoming command"""
         command = request.get('command', 'unknown')
-        
+        # Unknown commands share one label so clients can't grow the metric set
+        known = command in ('start', 'stop', 'status', 'activity-log', 'metrics', 'shutdown')
+        with self.timed_request(f"socket.{command if known else 'unknown'}"):
+            return self._dispatch_command(command)
+
+    def _dispatch_command(self, command: str) -> Dict[str, Any]:
+        """Run the handler for one command"""
         if command == 'start':
             return self.cmd_start()
         elif command == 'stop':
@@ -173,6 +221,8 @@ class DecoyDaemon:
             return self.cmd_status()
         elif command == 'activity-log':
             return self.cmd_activity_log()
+        elif command == 'metrics':
+            return self.cmd_metrics()
         elif command == 'shutdown':
             return self.cmd_shutdown()
         else:
@@ -187,6 +237,15 @@ class DecoyDaemon:
             if self.service_active:
                 return {'success': True, 'message': 'Service already running'}
             
+            if self._worker_processes() > 1:
+                # Shard agents across worker processes
+                from decoy_service.supervisor import WorkerSupervisor
+                logger.info("Starting Decoy Service in supervisor mode")
+                self.supervisor = WorkerSupervisor(logger, self.config_dir, self.service.settings)
+                self.supervisor.start()
+                self.service_active = True
+                return {'success': True, 'message': 'Service started'}
+
             logger.info("Starting Decoy Service")
             # Start service in a separate thread so daemon stays responsive
             service_thread = threading.Thread(
@@ -211,7 +270,11 @@ class DecoyDaemon:
                 return {'success': True, 'message': 'Service already stopped'}
             
             logger.info("Stopping Decoy Service")
-            self.service.stop_session()
+            if self.supervisor:
+                self.supervisor.stop()
+                self.supervisor = None
+            else:
+                self.service.stop_session()
             self.service_active = False
             
             return {'success': True, 'message': 'Service stopped'}
@@ -232,22 +295,58 @@ class DecoyDaemon:
                 'sessionDurationMinutes': 0
             }
 
-            # Read real stats from the ActivityTracker
+            # Read real stats from the ActivityTracker (or all workers' trackers)
             try:
-                if hasattr(self.service, 'tracker') and self.service.tracker:
+                if self.supervisor:
+                    summary = self.supervisor.get_summary()
+                elif hasattr(self.service, 'tracker') and self.service.tracker:
                     summary = self.service.tracker.get_summary()
+                else:
+                    summary = {}
+                if summary:
                     stats['sitesVisited'] = summary.get('websites_visited', 0)
                     stats['clicksMade'] = summary.get('total_clicks', 0)
                     stats['searchesPerformed'] = summary.get('search_queries', 0)
                     stats['sessionDurationMinutes'] = summary.get('session_duration_minutes', 0)
+                    stats['browserRecoveries'] = summary.get('browser_recoveries', 0)
+                    stats['recoveryDowntimeSeconds'] = round(summary.get('recovery_seconds', 0), 1)
+                    stats['browserRecycles'] = summary.get('browser_recycles', 0)
             except Exception as e:
                 logger.debug(f"Could not read tracker stats: {e}")
 
-            return {
+            if self.browser_pool and self.browser_pool.running:
+                stats['warmBrowsers'] = self.browser_pool.idle_count()
+
+            running = self.service_active
+            if self.supervisor:
+                running = running and self.supervisor.is_running()
+
+            response = {
                 'success': True,
-                'running': self.service_active,
+                'running': running,
                 'stats': stats
             }
+            if self.supervisor:
+                response['workers'] = self.supervisor.get_worker_info()
+                response['metrics'] = self.supervisor.get_metrics().snapshot()
+                response['network'] = self.supervisor.get_network_stats()
+                response['bandwidth'] = {
+                    'bytes_total': self.supervisor.get_summary()['bytes_transferred'],
+                    'by_domain': self.supervisor.get_bytes_by_domain(),
+                }
+                response['recovery'] = self.supervisor.get_stats('recovery')
+                response['recycling'] = self.supervisor.get_stats('recycling')
+                response['link_cache'] = self.supervisor.get_stats('link_cache')
+                response['selector_knowledge'] = self.supervisor.get_stats('selector_knowledge')
+            elif hasattr(self.service, 'metrics'):
+                response['metrics'] = self.service.metrics.snapshot()
+                response['network'] = self.service.resource_policy.get_stats()
+                response['bandwidth'] = self.service.tracker.get_bandwidth_stats()
+                response['recovery'] = self.service.tracker.get_recovery_stats()
+                response['recycling'] = self.service.tracker.get_recycle_stats()
+                response['link_cache'] = self.service.link_cache.get_stats()
+                response['selector_knowledge'] = self.service.selector_knowledge.get_stats()
+            return response
         except Exception as e:
             logger.error(f"Failed to get status: {e}")
             return {'success': False, 'error': str(e)}
@@ -255,6 +354,10 @@ class DecoyDaemon:
     def cmd_activity_log(self) -> Dict[str, Any]:
         """Get activity log - format for Firefox extension compatibility"""
         try:
+            if self.supervisor:
+                # Workers report their activities directly
+                return {'success': True, 'activities': self.supervisor.get_recent_activities(10)}
+
             log_file = log_dir / 'daemon.log'
             if not log_file.exists():
                 return {'success': True, 'activities': []}
@@ -299,6 +402,83 @@ class DecoyDaemon:
             logger.error(f"Failed to read activity log: {e}")
             return {'success': False, 'error': str(e)}
     
+    def cmd_metrics(self) -> Dict[str, Any]:
+        """Fleet metrics in the Prometheus text exposition format"""
+        try:
+            if not self.service:
+                return {'success': False, 'error': 'Service not initialized'}
+
+            from decoy_service.metrics import PrometheusExposition
+            from decoy_service.utils import ProcessStats
+
+            if self.supervisor:
+                summary = self.supervisor.get_summary()
+                failures = self.supervisor.get_failures_by_domain()
+                agents = sum(worker['agents'] for worker in self.supervisor.get_worker_info())
+                action_metrics = self.supervisor.get_metrics()
+                network = self.supervisor.get_network_stats()
+                transferred = self.supervisor.get_bytes_by_domain()
+            else:
+                summary = self.service.tracker.get_summary()
+                failures = self.service.tracker.get_failures_by_domain()
+                agents = len(self.service.agents)
+                action_metrics = self.service.metrics
+                network = self.service.resource_policy.get_stats()
+                transferred = self.service.tracker.get_bandwidth_stats()['by_domain']
+
+            if self.supervisor:
+                active = self.supervisor.is_running()
+                uptime = (datetime.now() - self.supervisor.start_time).total_seconds() if active else 0
+            else:
+                active = self.service.running
+                uptime = (self.service.clock.now() - self.service.start_time).total_seconds() if active else 0
+
+            exposition = PrometheusExposition()
+            exposition.add('decoy_visits_total', 'counter', 'Websites visited',
+                           [({}, summary.get('websites_visited', 0))])
+            exposition.add('decoy_searches_total', 'counter', 'Search queries performed',
+                           [({}, summary.get('search_queries', 0))])
+            exposition.add('decoy_clicks_total', 'counter', 'Clicks made',
+                           [({}, summary.get('total_clicks', 0))])
+            exposition.add('decoy_visit_failures_total', 'counter', 'Failed navigations by domain',
+                           [({'domain': domain}, count) for domain, count in sorted(failures.items())])
+            exposition.add('decoy_bytes_transferred_total', 'counter', 'Bytes transferred by domain',
+                           [({'domain': domain}, count) for domain, count in sorted(transferred.items())])
+            exposition.add('decoy_browser_recoveries_total', 'counter', 'Dead browsers relaunched in session',
+                           [({}, summary.get('browser_recoveries', 0))])
+            exposition.add('decoy_browser_recycles_total', 'counter', 'Tabs, contexts or browsers recycled for memory',
+                           [({}, summary.get('browser_recycles', 0))])
+            exposition.add('decoy_agents', 'gauge', 'Browser agents currently running',
+                           [({}, agents)])
+            # Browsers (and supervisor workers) are all children of the daemon
+            exposition.add('decoy_browser_rss_bytes', 'gauge', 'Resident memory of all browser processes',
+                           [({}, ProcessStats.tree_rss_bytes(os.getpid(), include_self=False))])
+            exposition.add('decoy_session_active', 'gauge', 'Whether a session is running',
+                           [({}, int(active))])
+            exposition.add('decoy_session_uptime_seconds', 'gauge', 'Seconds since the session started',
+                           [({}, round(uptime, 1))])
+            exposition.add('decoy_blocked_requests_total', 'counter', 'Requests dropped by resource blocking',
+                           [({'category': category}, count)
+                            for category, count in sorted(network['blocked_requests'].items())])
+            exposition.add('decoy_blocked_bytes_estimate_total', 'counter',
+                           'Estimated bytes saved by resource blocking',
+                           [({}, network['estimated_bytes_saved'])])
+            if self.browser_pool and self.browser_pool.running:
+                exposition.add('decoy_warm_browsers', 'gauge', 'Idle pre-launched browsers',
+                               [({}, self.browser_pool.idle_count())])
+            if self.ipc_metrics:
+                exposition.add_histograms('decoy_ipc_request_duration_seconds',
+                                          'Latency of daemon socket and HTTP requests',
+                                          self.ipc_metrics, 'request')
+            exposition.add_histograms('decoy_action_duration_seconds',
+                                      'Latency of agent primitives and service steps',
+                                      action_metrics, 'action')
+
+            return {'success': True, 'metrics': exposition.render()}
+        except Exception as e:
+            logger.error(f"Failed to collect metrics: {e}")
+            return {'success': False, 'error': str(e)}
+
     def cmd_shutdown(self) -> Dict[str, Any]:
         """Shutdown the daemon"""
         logger.info("Shutdown command received")
@@ -319,6 +499,10 @@ class DecoyDaemon:
 
         # Start HTTP bridge for Firefox extension
         self._start_http_bridge()
+
+        # Start pre-launching browsers in the background
+        if self.browser_pool:
+            self.browser_pool.start()
         
         try:
             # Create Unix socket
@@ -326,6 +510,8 @@ class DecoyDaemon:
             self.socket.bind(str(SOCKET_PATH))
             SOCKET_PATH.chmod(0o600)
             self.socket.listen(5)
+            # Wake up regularly so shutdown and signals take effect promptly
+            self.socket.settimeout(0.1)
             
             logger.info(f"Daemon listening on {SOCKET_PATH}")
             
@@ -357,12 +543,23 @@ class DecoyDaemon:
         """Cleanup and shutdown"""
         logger.info("Shutting down daemon")
 
+        # Stop any running session so its browsers are torn down
+        if self.service and self.service_active and not self.supervisor:
+            self.service.stop_session()
+            self.service_active = False
+
         # Stop HTTP server
         if self.http_server:
             logger.info("Stopping HTTP bridge")
             self.http_server.shutdown()
             self.http_server.server_close()
 
+        if self.supervisor:
+            self.supervisor.stop()
+
+        if self.browser_pool:
+            self.browser_pool.stop()
+
         if self.socket:
             self.socket.close()
 
@@ -395,10 +592,17 @@ class DecoyDaemon:
             logger.error(f"⚠️  Failed to start HTTP bridge: {e}")
             logger.error("Firefox extension will not work, but Unix socket is still available")
 
+    def _worker_processes(self) -> int:
+        """Number of worker processes configured for supervisor mode"""
+        return int(self.service.settings.get('service', {}).get('worker_processes', 1))
+
     def _signal_handler(self, signum, frame):
         """Handle signals"""
         logger.info(f"Received signal {signum}")
         self.running = False
+        # Interrupt agent waits now; shutdown() closes the browsers
+        if self.service:
+            self.service.cancel_token.cancel()
 
 
 def main():
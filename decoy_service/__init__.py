@@ -7,8 +7,13 @@ and protect privacy from profiling.
 Main components:
   - DecoyService: Main orchestrator
   - BrowserAgent: Browser automation (Selenium/Playwright)
+  - AsyncPlaywrightAgent: Asyncio agent for running many pages on one thread
   - DecoyScheduler: Schedule sessions
   - ActivityTracker: Track and report activity
+  - SimulatedAgent / VirtualClock: Run the planner offline on virtual time
+  - HttpAgent: Browserless agent over pooled HTTP connections
+  - CdpAgent: Chrome driven over the DevTools protocol, without WebDriver
+  - MetricsRegistry: Per-action latency histograms
 """
 
 __version__ = "1.0.0"
@@ -20,6 +25,11 @@ try:
     from scheduler import DecoyScheduler
     from .utils import Logger, ConfigManager, ActivityTracker, RandomnessGenerator
     from browser_agent import BrowserAgent, SeleniumAgent, PlaywrightAgent
+    from .async_agent import AsyncPlaywrightEngine, AsyncPlaywrightAgent
+    from .simulation import VirtualClock, SimulatedAgent
+    from .metrics import MetricsRegistry
+    from .http_agent import HttpAgent
+    from .cdp_agent import CdpAgent
 except ImportError:
     # Module may be run directly without imports
     pass
@@ -34,4 +44,11 @@ __all__ = [
     'BrowserAgent',
     'SeleniumAgent',
     'PlaywrightAgent',
+    'AsyncPlaywrightEngine',
+    'AsyncPlaywrightAgent',
+    'VirtualClock',
+    'SimulatedAgent',
+    'MetricsRegistry',
+    'HttpAgent',
+    'CdpAgent',
 ]
@@ -0,0 +1,518 @@
+"""
+Asyncio browser automation using Playwright's async API
+Drives many pages from a single event loop and a single browser process
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import List, Dict, Any, Optional
+
+from .utils import CancellationToken, RandomnessGenerator, ProcessStats, ActivityTracker
+from . import page_scripts
+from .network import ResourcePolicy
+from .selector_knowledge import SelectorKnowledge, prefer
+
+
+class AsyncPlaywrightEngine:
+    """One Playwright driver and Chromium process shared by many async agents"""
+
+    def __init__(self, logger: logging.Logger, config: Dict[str, Any]):
+        self.logger = logger
+        self.config = config
+        self.playwright = None
+        self.browser = None
+        self.headless = True
+        # Driver processes started for the shared browser
+        self.process_pids = []
+        # Agents that find the browser dead all ask for a relaunch at once
+        self._relaunch_lock = asyncio.Lock()
+        try:
+            from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+            self._async_playwright = async_playwright
+            self.TimeoutError = PlaywrightTimeoutError
+        except ImportError:
+            raise ImportError("Playwright not installed. Run: pip install playwright")
+
+    async def start(self, headless: bool = True) -> bool:
+        """Launch the shared browser process"""
+        self.headless = headless
+        try:
+            with ProcessStats.launch_children() as launched:
+                self.playwright = await self._async_playwright().start()
+                self.browser = await self.playwright.chromium.launch(headless=headless)
+            self.process_pids = launched
+            self.logger.info("Async Playwright browser launched")
+            return True
+        except Exception as e:
+            self.logger.error(f"Failed to launch async Playwright browser: {str(e)}")
+            return False
+
+    def memory_bytes(self) -> int:
+        """RSS of the shared browser and its Playwright driver"""
+        return sum(ProcessStats.tree_rss_bytes(pid) for pid in self.process_pids)
+
+    def is_connected(self) -> bool:
+        """Whether the shared browser process is still up"""
+        return self.browser is not None and self.browser.is_connected()
+
+    async def ensure_running(self) -> bool:
+        """Relaunch the shared browser if it died; safe to call from every agent"""
+        async with self._relaunch_lock:
+            if self.is_connected():
+                return True
+            self.logger.warning("Async Playwright browser is gone; relaunching")
+            await self.stop()
+            return await self.start(headless=self.headless)
+
+    async def new_context(self):
+        """Create an isolated browser context (own cookies and storage)"""
+        return await self.browser.new_context(user_agent=self._get_user_agent())
+
+    async def stop(self):
+        """Close the shared browser process"""
+        try:
+            if self.browser:
+                await self.browser.close()
+            if self.playwright:
+                await self.playwright.stop()
+            self.logger.info("Async Playwright browser closed")
+        except Exception as e:
+            self.logger.error(f"Error closing async browser: {str(e)}")
+        finally:
+            self.browser = None
+            self.playwright = None
+
+    def _get_user_agent(self) -> str:
+        """Get user agent from config or use default"""
+        if self.config.get('browser', {}).get('rotate_user_agents'):
+            return RandomnessGenerator.get_random_user_agent()
+        return "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+
+class AsyncPlaywrightAgent:
+    """Browser agent with the BrowserAgent interface as coroutines
+
+    Each agent owns one context and page on a shared AsyncPlaywrightEngine,
+    so dwell waits are awaited on the event loop and never block it.
+    """
+
+    def __init__(self, logger: logging.Logger, config: Dict[str, Any],
+                 engine: AsyncPlaywrightEngine):
+        self.logger = logger
+        self.config = config
+        self.engine = engine
+        # Replaced by the service's token so stop_session interrupts waits
+        self.cancel_token = CancellationToken()
+        self.context = None
+        self.page = None
+        self.context_visits = 0
+        pool_config = config.get('browser', {}).get('context_pool', {})
+        self.max_visits_per_context = pool_config.get('max_visits_per_context', 50)
+        self.resource_policy = ResourcePolicy(config)
+        self.selector_knowledge = SelectorKnowledge(config)
+        # Bytes reported by the page's Network.loadingFinished events
+        self.transferred_bytes = 0
+        # Set when the renderer crashes; the page object stays "open"
+        self.page_crashed = False
+
+    async def _sleep(self, seconds: float):
+        """Interruptible wait; raises SessionCancelled once the session stops"""
+        await self.cancel_token.sleep_async(seconds)
+
+    async def open_browser(self, headless: bool = True):
+        """Open a context and page on the shared browser"""
+        try:
+            self.context = await self.engine.new_context()
+            self.page = await self._setup_page(await self.context.new_page())
+            self.context_visits = 0
+            self.logger.debug("Async Playwright page opened")
+            return True
+        except Exception as e:
+            self.logger.error(f"Failed to open async Playwright page: {str(e)}")
+            return False
+
+    async def _setup_page(self, page):
+        """Route a new page's requests through the resource policy and count its bytes"""
+        self.page_crashed = False
+        page.on('crash', self._on_crash)
+        if self.resource_policy.active:
+            await page.route('**/*', self._route_request)
+        if ActivityTracker.bandwidth_tracking(self.config):
+            try:
+                cdp = await page.context.new_cdp_session(page)
+                await cdp.send('Network.enable')
+                cdp.on('Network.loadingFinished', self._on_loading_finished)
+            except Exception as e:
+                self.logger.debug(f"Could not track network events: {str(e)}")
+        return page
+
+    def _on_loading_finished(self, params):
+        self.transferred_bytes += int(params.get('encodedDataLength', 0))
+
+    def _on_crash(self, page):
+        self.page_crashed = True
+        self.logger.warning("Async Playwright page crashed")
+
+    async def harvest_links(self) -> List[str]:
+        """Same-site links of the current page, in one call"""
+        try:
+            return await self.page.evaluate(page_scripts.HARVEST_LINKS,
+                                            page_scripts.harvest_options(self.config)) or []
+        except Exception as e:
+            self.logger.debug(f"Link harvest failed: {str(e)}")
+            return []
+
+    def page_url(self) -> Optional[str]:
+        """URL of the current page (known locally, so not a coroutine)"""
+        return self.page.url if self.page else None
+
+    async def consume_transferred_bytes(self) -> int:
+        """Bytes the page moved since the last call"""
+        transferred, self.transferred_bytes = self.transferred_bytes, 0
+        return transferred
+
+    async def _route_request(self, route):
+        """Abort blocked fonts/media/images; everything else continues"""
+        request = route.request
+        if self.resource_policy.should_block(request.resource_type, request.url):
+            self.resource_policy.record_blocked(request.resource_type)
+            await route.abort('blockedbyclient')
+        else:
+            await route.continue_()
+
+    async def visit_url(self, url: str) -> bool:
+        """Visit URL with Playwright"""
+        try:
+            if not url.startswith('http'):
+                url = 'https://' + url
+
+            if self.max_visits_per_context and self.context_visits >= self.max_visits_per_context:
+                await self._recycle_context()
+
+            readiness = page_scripts.readiness_options(self.config)
+            started = time.monotonic()
+            previous_url = self.page.url
+            try:
+                await self.page.goto(url, wait_until='load' if readiness['strategy'] == 'load' else 'domcontentloaded',
+                                     timeout=readiness['deadline'] * 1000)
+            except self.engine.TimeoutError:
+                # Deadline hit mid-load: keep what has rendered, unless
+                # navigation never got off the previous page
+                if self.page.url == previous_url:
+                    raise
+                self.logger.debug(f"Page not loaded within {readiness['deadline']:.0f}s, interacting anyway")
+            else:
+                await self._wait_until_ready(readiness, readiness['deadline'] - (time.monotonic() - started))
+
+            self.context_visits += 1
+            self.logger.info(f"Navigated to: {url}")
+            return True
+        except Exception as e:
+            self.logger.warning(f"Failed to visit {url}: {str(e)}")
+            return False
+
+    async def _wait_until_ready(self, readiness: Dict[str, Any], remaining: float):
+        """Wait in the page for the fcp/network_quiet strategies, up to remaining seconds"""
+        if readiness['strategy'] not in ('fcp', 'network_quiet') or remaining <= 0:
+            return
+        try:
+            await self.page.evaluate(page_scripts.WAIT_FOR_READY,
+                                     {'mode': readiness['strategy'], 'timeoutMs': int(remaining * 1000),
+                                      'quietMs': readiness['quietMs']})
+        except Exception as e:
+            self.logger.debug(f"Readiness wait failed: {str(e)}")
+
+    async def _recycle_context(self):
+        """Swap this agent's context for a fresh one on the shared browser"""
+        await self.context.close()
+        self.context = await self.engine.new_context()
+        self.page = await self._setup_page(await self.context.new_page())
+        self.context_visits = 0
+        self.logger.debug("Recycled async browser context")
+
+    async def get_clickable_elements(self, max_elements: int = 10) -> List:
+        """Get clickable elements"""
+        try:
+            elements = await self.page.query_selector_all('a, button, [onclick], input[type="button"]')
+            return elements[:max_elements]
+        except Exception as e:
+            self.logger.debug(f"Could not find clickable elements: {str(e)}")
+            return []
+
+    async def random_click(self) -> bool:
+        """Perform random click"""
+        try:
+            if page_scripts.in_page_sampling(self.config):
+                return await self._click_sampled_target()
+
+            elements = await self.get_clickable_elements(max_elements=20)
+            if not elements:
+                return False
+
+            element = random.choice(elements)
+            await element.click()
+            await self._sleep(random.uniform(1, 3))
+            self.logger.debug("Random click performed")
+            return True
+        except Exception as e:
+            self.logger.debug(f"Click failed: {str(e)}")
+            return False
+
+    async def _click_sampled_target(self) -> bool:
+        """Click a target chosen in the page by SAMPLE_CLICK_TARGET"""
+        handle = await self.page.evaluate_handle(page_scripts.SAMPLE_CLICK_TARGET,
+                                                 page_scripts.click_options(self.config))
+        try:
+            element = handle.as_element()
+            if element is None:
+                return False
+            await element.click()
+        finally:
+            await handle.dispose()
+
+        await self._sleep(random.uniform(1, 3))
+        self.logger.debug("Random click performed")
+        return True
+
+    async def scroll_page(self, amount: int = 500):
+        """Scroll page"""
+        try:
+            await self.page.evaluate(f"window.scrollBy(0, {amount})")
+            self.logger.debug(f"Scrolled {amount}px")
+        except Exception as e:
+            self.logger.debug(f"Scroll failed: {str(e)}")
+
+    async def natural_scroll(self):
+        """Scroll naturally like reading an article"""
+        if page_scripts.in_page_scroll(self.config):
+            return await self._natural_scroll_in_page()
+
+        try:
+            page_height = await self.get_page_height()
+            current_position = 0
+
+            while current_position < page_height * 0.8:
+                scroll_amount = random.randint(150, 400)
+                await self.page.evaluate(f"window.scrollBy(0, {scroll_amount})")
+                current_position += scroll_amount
+
+                reading_time = random.uniform(1.5, 4.0) if scroll_amount > 250 else random.uniform(0.8, 2.0)
+                await self._sleep(reading_time)
+
+                if random.random() < 0.15:
+                    scroll_up = random.randint(50, 150)
+                    await self.page.evaluate(f"window.scrollBy(0, -{scroll_up})")
+                    current_position -= scroll_up
+                    await self._sleep(random.uniform(0.5, 1.5))
+
+                if random.random() < 0.2:
+                    await self._sleep(random.uniform(2.0, 5.0))
+
+            self.logger.debug("Natural scroll completed")
+            return True
+        except Exception as e:
+            self.logger.debug(f"Natural scroll failed: {str(e)}")
+            return False
+
+    async def _natural_scroll_in_page(self) -> bool:
+        """Run the whole reading timeline inside the page with one script"""
+        try:
+            planned_ms = await self.page.evaluate(page_scripts.START_SCROLL_TIMELINE,
+                                                  RandomnessGenerator.get_reading_timeline())
+        except Exception as e:
+            self.logger.debug(f"Natural scroll failed: {str(e)}")
+            return False
+
+        await self._sleep(planned_ms / 1000)
+
+        try:
+            result = await self.page.evaluate(page_scripts.FINISH_SCROLL_TIMELINE)
+            self.logger.debug(f"Natural scroll reached {result['depth']}px of "
+                              f"{result['pageHeight']}px in {result['steps']} steps")
+        except Exception as e:
+            self.logger.debug(f"Could not read scroll depth: {str(e)}")
+        return True
+
+    async def hover_element(self, element):
+        """Hover over an element"""
+        try:
+            await element.hover()
+            await self._sleep(random.uniform(0.3, 0.8))
+            return True
+        except Exception as e:
+            self.logger.debug(f"Hover failed: {str(e)}")
+            return False
+
+    async def get_page_height(self) -> int:
+        """Get total page height"""
+        try:
+            return await self.page.evaluate("document.body.scrollHeight")
+        except:
+            return 2000
+
+    async def interact_with_media(self):
+        """Interact with videos and images"""
+        if page_scripts.in_page_sampling(self.config):
+            return await self._interact_with_sampled_media()
+
+        try:
+            videos = await self.page.query_selector_all('video')
+            if videos and random.random() < 0.3:
+                video = random.choice(videos)
+                await video.scroll_into_view_if_needed()
+                await self._sleep(random.uniform(2, 5))
+                self.logger.debug("Interacted with video")
+
+            images = await self.page.query_selector_all('img')
+            if len(images) > 3:
+                num_images = min(random.randint(2, 4), len(images))
+                for _ in range(num_images):
+                    img = random.choice(images)
+                    await self.hover_element(img)
+                    await self._sleep(random.uniform(0.8, 2.0))
+                self.logger.debug(f"Viewed {num_images} images")
+
+            return True
+        except Exception as e:
+            self.logger.debug(f"Media interaction failed: {str(e)}")
+            return False
+
+    async def _interact_with_sampled_media(self) -> bool:
+        """Look at a few visible media elements chosen inside the page"""
+        handles = []
+        try:
+            media = await self.page.evaluate_handle(page_scripts.SAMPLE_MEDIA, page_scripts.media_options())
+            handles.append(media)
+            video = await media.get_property('video')
+            image_list = await media.get_property('images')
+            handles += [video, image_list]
+            images = list((await image_list.get_properties()).values())
+            handles += images
+
+            element = video.as_element()
+            if element is not None:
+                await self.hover_element(element)
+                await self._sleep(random.uniform(2, 5))
+                self.logger.debug("Interacted with video")
+
+            for img in images:
+                await self.hover_element(img.as_element())
+                await self._sleep(random.uniform(0.8, 2.0))
+            if images:
+                self.logger.debug(f"Viewed {len(images)} images")
+
+            return True
+        except Exception as e:
+            self.logger.debug(f"Media interaction failed: {str(e)}")
+            return False
+        finally:
+            for handle in handles:
+                try:
+                    await handle.dispose()
+                except Exception:
+                    pass
+
+    async def handle_popups(self):
+        """Close a popup, cookie banner or modal with one in-page script"""
+        try:
+            # Banners come back in fresh profiles, so a site is always
+            # probed; its known control is just tried first
+            url = self.page_url()
+            _, learned = self.selector_knowledge.lookup(url, 'popup')
+
+            dismissed = await self.page.evaluate(page_scripts.DISMISS_POPUP,
+                                                 page_scripts.popup_options(self.config, learned))
+            if not dismissed:
+                return False
+            self.selector_knowledge.record(url, 'popup', dismissed)
+
+            await self._sleep(0.5)
+            self.logger.debug(f"Closed popup/banner ({dismissed})")
+            return True
+        except Exception as e:
+            self.logger.debug(f"Popup handling failed: {str(e)}")
+            return False
+
+    async def fill_search_form(self, query: str) -> bool:
+        """Find and fill a search form"""
+        try:
+            url = self.page_url()
+            known, learned = self.selector_knowledge.lookup(url, 'search')
+            if known and learned is None:
+                return False  # No search box found on this site lately
+
+            # Try the site's known search box first, then the common ones
+            for selector in prefer(page_scripts.DEFAULT_SEARCH_SELECTORS, learned):
+                search_box = await self.page.query_selector(selector)
+                if not search_box:
+                    continue
+                await search_box.fill(query)
+                await self._sleep(0.5)
+                await search_box.press("Enter")
+                self.selector_knowledge.record(url, 'search', selector)
+                await self._sleep(2)
+                self.logger.info(f"Searched for: {query}")
+                return True
+
+            self.selector_knowledge.record(url, 'search', None)
+            return False
+        except Exception as e:
+            self.logger.debug(f"Search form fill failed: {str(e)}")
+            return False
+
+    async def is_alive(self) -> bool:
+        """Check the page is open, its renderer alive and the browser connected"""
+        try:
+            return (self.page is not None and not self.page.is_closed()
+                    and not self.page_crashed and self.engine.is_connected())
+        except Exception:
+            return False
+
+    async def memory_bytes(self) -> int:
+        """RSS of the shared browser (every agent's pages live in it)"""
+        return self.engine.memory_bytes()
+
+    async def recycle_browser(self, scope: str = 'browser') -> bool:
+        """Swap the page (tab) or context for a fresh one
+
+        The browser is shared by the whole fleet, so the browser scope
+        recycles this agent's context.
+        """
+        try:
+            if scope == 'tab':
+                old_page = self.page
+                self.page = await self._setup_page(await self.context.new_page())
+                await old_page.close()
+            else:
+                await self._recycle_context()
+            return True
+        except Exception as e:
+            self.logger.warning(f"Could not recycle {scope}: {str(e)}")
+            return False
+
+    async def restart_browser(self) -> bool:
+        """Replace a dead page, relaunching the shared browser if it went down"""
+        await self.close_browser()
+        if not await self.engine.ensure_running():
+            return False
+        return await self.open_browser()
+
+    async def close_browser(self):
+        """Close this agent's context (the shared browser stays up)"""
+        try:
+            if self.context:
+                await self.context.close()
+            self.logger.debug("Async Playwright page closed")
+        except Exception as e:
+            self.logger.debug(f"Error closing async page: {str(e)}")
+        finally:
+            self.context = None
+            self.page = None
+
+
+__all__ = [
+    'AsyncPlaywrightEngine',
+    'AsyncPlaywrightAgent',
+]
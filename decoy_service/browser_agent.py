@@ -3,21 +3,48 @@ Browser automation module using Selenium and Playwright
 Handles website navigation, clicking, form filling, etc.
 """
 
+import json
 import logging
-import time
+import os
 import random
+import time
 from typing import List, Optional, Dict, Any
 from abc import ABC, abstractmethod
 
+from .utils import CancellationToken, SystemClock, RandomnessGenerator, ProcessStats, ActivityTracker
+from . import page_scripts
+from .network import ResourcePolicy
+from .selector_knowledge import SelectorKnowledge, prefer
+
 
 class BrowserAgent(ABC):
     """Abstract base class for browser agents"""
+
+    # Whether the browser may only be driven (and closed) from the thread
+    # that opened it
+    thread_bound = False
     
     def __init__(self, logger: logging.Logger, config: Dict[str, Any]):
         self.logger = logger
         self.config = config
         self.browser = None
         self.driver = None
+        # Replaced by the service's token and clock so stop_session
+        # interrupts waits and simulations can run on virtual time
+        self.cancel_token = CancellationToken()
+        self.clock = SystemClock()
+        # Browser commands sent so far (WebDriver round-trips for Selenium)
+        self.round_trips = 0
+        # Which resource categories to block; the service swaps in its
+        # shared policy so blocked counts cover the whole fleet
+        self.resource_policy = ResourcePolicy(config)
+        # Which search box and popup selectors work per site; the service
+        # swaps in its shared knowledge base
+        self.selector_knowledge = SelectorKnowledge(config)
+
+    def _sleep(self, seconds: float):
+        """Interruptible wait; raises SessionCancelled once the session stops"""
+        self.clock.sleep(seconds, self.cancel_token)
     
     @abstractmethod
     def open_browser(self, headless: bool = True):
@@ -64,6 +91,55 @@ class BrowserAgent(ABC):
         """Close browser instance"""
         pass
 
+    def is_alive(self) -> bool:
+        """Whether the browser is still responding"""
+        return True
+
+    def restart_browser(self) -> bool:
+        """Tear down whatever is left of the browser and launch a fresh one"""
+        try:
+            self.close_browser()
+        except Exception as e:
+            self.logger.debug(f"Error closing dead browser: {str(e)}")
+        headless = self.config.get('browser', {}).get('headless', True)
+        return self.open_browser(headless=headless)
+
+    def memory_bytes(self) -> int:
+        """Resident memory of this agent's browser processes (0 if unknown)"""
+        return 0
+
+    def open_tab(self):
+        """Open another tab, make it current and return its handle (None if unsupported)"""
+        return None
+
+    def switch_tab(self, handle) -> bool:
+        """Make handle's tab current; False if that tab no longer exists"""
+        return handle is None
+
+    def current_tab(self):
+        """Handle of the tab commands currently act on"""
+        return None
+
+    def recycle_browser(self, scope: str = 'browser') -> bool:
+        """Replace the tab, context or whole browser to release memory"""
+        return self.restart_browser()
+
+    def harvest_links(self) -> List[str]:
+        """Same-site links of the current page for the link cache"""
+        return []
+
+    def page_url(self) -> Optional[str]:
+        """URL of the current page, keying the selector knowledge base"""
+        return None
+
+    def consume_transferred_bytes(self) -> int:
+        """Bytes the browser moved since the last call (0 if not measured)"""
+        return 0
+
+    def _bandwidth_tracking(self) -> bool:
+        """Whether to collect transfer sizes from network events (bandwidth.tracking)"""
+        return ActivityTracker.bandwidth_tracking(self.config)
+
 
 class SeleniumAgent(BrowserAgent):
     """Browser agent using Selenium WebDriver"""
@@ -74,9 +150,11 @@ class SeleniumAgent(BrowserAgent):
             from selenium import webdriver
             from selenium.webdriver.common.by import By
             from selenium.webdriver.support.ui import WebDriverWait
+            from selenium.common.exceptions import TimeoutException
             self.webdriver = webdriver
             self.By = By
             self.WebDriverWait = WebDriverWait
+            self.TimeoutException = TimeoutException
         except ImportError:
             raise ImportError("Selenium not installed. Run: pip install selenium")
     
@@ -92,8 +170,23 @@ class SeleniumAgent(BrowserAgent):
             options.add_argument('--disable-dev-shm-usage')
             options.add_argument('--disable-blink-features=AutomationControlled')
             options.add_argument(f'user-agent={self._get_user_agent()}')
+
+            # Anything but a full load returns from get() once the DOM is parsed
+            readiness = page_scripts.readiness_options(self.config)
+            options.page_load_strategy = 'normal' if readiness['strategy'] == 'load' else 'eager'
+
+            if self._bandwidth_tracking():
+                # Network events land in the performance log for byte counting
+                options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+                options.add_experimental_option('perfLoggingPrefs', {'enableNetwork': True, 'enablePage': False})
             
-            self.driver = self.webdriver.Chrome(options=options)
+            # Under the launch lock so other agents' process diffs skip it
+            with ProcessStats.LAUNCH_LOCK:
+                self.driver = self.webdriver.Chrome(options=options)
+            self.driver.set_page_load_timeout(readiness['deadline'])
+            self.driver.set_script_timeout(readiness['deadline'] + 5)
+            self._count_round_trips(self.driver)
+            self._apply_resource_policy()
             self.logger.info("Chrome browser opened")
             return True
             
@@ -101,14 +194,54 @@ class SeleniumAgent(BrowserAgent):
             self.logger.error(f"Failed to open browser: {str(e)}")
             return False
     
+    def _apply_resource_policy(self):
+        """Block the policy's resource categories by URL through Chrome DevTools"""
+        patterns = self.resource_policy.url_patterns(self.logger)
+        if not patterns:
+            return
+        try:
+            self.driver.execute_cdp_cmd('Network.enable', {})
+            self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+        except Exception as e:
+            self.logger.warning(f"Could not enable resource blocking: {str(e)}")
+
+    def _count_round_trips(self, driver):
+        """Count every command the driver sends to chromedriver"""
+        execute = driver.execute
+
+        def counted_execute(driver_command, params=None):
+            self.round_trips += 1
+            return execute(driver_command, params)
+
+        driver.execute = counted_execute
+
     def visit_url(self, url: str, timeout: int = 10) -> bool:
         """Visit a URL"""
         try:
             if not url.startswith('http'):
                 url = 'https://' + url
-            
-            self.driver.get(url)
-            time.sleep(2)  # Wait for page load
+
+            readiness = page_scripts.readiness_options(self.config)
+            started = time.monotonic()
+            previous_url = self.driver.current_url
+            try:
+                self.driver.get(url)
+            except self.TimeoutException:
+                # Deadline hit mid-load: keep what has rendered, unless
+                # navigation never got off the previous page
+                if self.driver.current_url == previous_url:
+                    raise
+                self.driver.execute_script("window.stop();")
+                self.logger.debug(f"Page not loaded within {readiness['deadline']:.0f}s, interacting anyway")
+            else:
+                self._wait_until_ready(readiness, readiness['deadline'] - (time.monotonic() - started))
+
+            if self.resource_policy.active:
+                self.resource_policy.record_counts(self.driver.execute_script(
+                    page_scripts.for_selenium(page_scripts.COUNT_BLOCKED),
+                    self.resource_policy.count_options()
+                ))
+
             self.logger.info(f"Navigated to: {url}")
             return True
             
@@ -116,6 +249,19 @@ class SeleniumAgent(BrowserAgent):
             self.logger.warning(f"Failed to visit {url}: {str(e)}")
             return False
     
+    def _wait_until_ready(self, readiness: Dict[str, Any], remaining: float):
+        """Wait in the page for the fcp/network_quiet strategies, up to remaining seconds"""
+        if readiness['strategy'] not in ('fcp', 'network_quiet') or remaining <= 0:
+            return
+        try:
+            self.driver.execute_async_script(
+                page_scripts.for_selenium_async(page_scripts.WAIT_FOR_READY),
+                {'mode': readiness['strategy'], 'timeoutMs': int(remaining * 1000),
+                 'quietMs': readiness['quietMs']}
+            )
+        except Exception as e:
+            self.logger.debug(f"Readiness wait failed: {str(e)}")
+
     def get_clickable_elements(self, max_elements: int = 10) -> List:
         """Get clickable elements"""
         try:
@@ -130,13 +276,21 @@ class SeleniumAgent(BrowserAgent):
     def random_click(self) -> bool:
         """Perform random click"""
         try:
-            elements = self.get_clickable_elements(max_elements=20)
-            if not elements:
+            if page_scripts.in_page_sampling(self.config):
+                # One script picks the target; only that element comes back
+                element = self.driver.execute_script(
+                    page_scripts.for_selenium(page_scripts.SAMPLE_CLICK_TARGET),
+                    page_scripts.click_options(self.config)
+                )
+            else:
+                elements = self.get_clickable_elements(max_elements=20)
+                element = random.choice(elements) if elements else None
+
+            if element is None:
                 return False
             
-            element = random.choice(elements)
             element.click()
-            time.sleep(random.uniform(1, 3))
+            self._sleep(random.uniform(1, 3))
             self.logger.debug("Random click performed")
             return True
             
@@ -154,6 +308,9 @@ class SeleniumAgent(BrowserAgent):
 
     def natural_scroll(self):
         """Scroll naturally like reading an article - simulates human reading behavior"""
+        if page_scripts.in_page_scroll(self.config):
+            return self._natural_scroll_in_page()
+
         try:
             page_height = self.get_page_height()
             current_position = 0
@@ -169,18 +326,18 @@ class SeleniumAgent(BrowserAgent):
 
                 # Reading pause - longer for larger scrolls (more content)
                 reading_time = random.uniform(1.5, 4.0) if scroll_amount > 250 else random.uniform(0.8, 2.0)
-                time.sleep(reading_time)
+                self._sleep(reading_time)
 
                 # Occasionally scroll up a bit (re-reading)
                 if random.random() < 0.15:  # 15% chance
                     scroll_up = random.randint(50, 150)
                     self.driver.execute_script(f"window.scrollBy(0, -{scroll_up});")
                     current_position -= scroll_up
-                    time.sleep(random.uniform(0.5, 1.5))
+                    self._sleep(random.uniform(0.5, 1.5))
 
                 # Occasionally pause longer (looking at images, thinking)
                 if random.random() < 0.2:  # 20% chance
-                    time.sleep(random.uniform(2.0, 5.0))
+                    self._sleep(random.uniform(2.0, 5.0))
 
             self.logger.debug("Natural scroll completed")
             return True
@@ -189,13 +346,39 @@ class SeleniumAgent(BrowserAgent):
             self.logger.debug(f"Natural scroll failed: {str(e)}")
             return False
 
+    def _natural_scroll_in_page(self) -> bool:
+        """Run the whole reading timeline inside the page
+
+        One script starts the timeline on page timers; the agent waits out
+        its planned duration (cancellably) and one more call reads back the
+        depth actually reached.
+        """
+        try:
+            planned_ms = self.driver.execute_script(
+                page_scripts.for_selenium(page_scripts.START_SCROLL_TIMELINE),
+                RandomnessGenerator.get_reading_timeline()
+            )
+        except Exception as e:
+            self.logger.debug(f"Natural scroll failed: {str(e)}")
+            return False
+
+        self._sleep(planned_ms / 1000)
+
+        try:
+            result = self.driver.execute_script(page_scripts.for_selenium(page_scripts.FINISH_SCROLL_TIMELINE))
+            self.logger.debug(f"Natural scroll reached {result['depth']}px of "
+                              f"{result['pageHeight']}px in {result['steps']} steps")
+        except Exception as e:
+            self.logger.debug(f"Could not read scroll depth: {str(e)}")
+        return True
+
     def hover_element(self, element):
         """Hover over an element to simulate mouse movement"""
         try:
             from selenium.webdriver.common.action_chains import ActionChains
             action = ActionChains(self.driver)
             action.move_to_element(element).perform()
-            time.sleep(random.uniform(0.3, 0.8))
+            self._sleep(random.uniform(0.3, 0.8))
             return True
         except Exception as e:
             self.logger.debug(f"Hover failed: {str(e)}")
@@ -210,6 +393,9 @@ class SeleniumAgent(BrowserAgent):
 
     def interact_with_media(self):
         """Interact with videos, images, and galleries on the page"""
+        if page_scripts.in_page_sampling(self.config):
+            return self._interact_with_sampled_media()
+
         try:
             # Look for videos
             videos = self.driver.find_elements(self.By.TAG_NAME, 'video')
@@ -218,7 +404,7 @@ class SeleniumAgent(BrowserAgent):
                 self.hover_element(video)
                 # Scroll to video
                 self.driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", video)
-                time.sleep(random.uniform(2, 5))  # "Watch" for a bit
+                self._sleep(random.uniform(2, 5))  # "Watch" for a bit
                 self.logger.debug("Interacted with video")
 
             # Look for image galleries
@@ -229,7 +415,7 @@ class SeleniumAgent(BrowserAgent):
                 for _ in range(num_images):
                     img = random.choice(images)
                     self.hover_element(img)
-                    time.sleep(random.uniform(0.8, 2.0))
+                    self._sleep(random.uniform(0.8, 2.0))
                 self.logger.debug(f"Viewed {num_images} images")
 
             return True
@@ -237,30 +423,49 @@ class SeleniumAgent(BrowserAgent):
             self.logger.debug(f"Media interaction failed: {str(e)}")
             return False
 
-    def handle_popups(self):
-        """Try to close common popups, cookie banners, modals"""
-        try:
-            # Common close button selectors
-            close_selectors = [
-                "button[aria-label*='close' i]",
-                "button[aria-label*='dismiss' i]",
-                ".close", ".modal-close", "[class*='close']",
-                "button:has-text('Accept')", "button:has-text('OK')",
-                "[class*='cookie'] button", "[id*='cookie'] button"
-            ]
-
-            for selector in close_selectors:
-                try:
-                    elements = self.driver.find_elements(self.By.CSS_SELECTOR, selector)
-                    if elements:
-                        elements[0].click()
-                        time.sleep(0.5)
-                        self.logger.debug("Closed popup/banner")
-                        return True
-                except:
-                    continue
+    def _interact_with_sampled_media(self) -> bool:
+        """Look at a few visible media elements chosen inside the page"""
+        try:
+            media = self.driver.execute_script(
+                page_scripts.for_selenium(page_scripts.SAMPLE_MEDIA),
+                page_scripts.media_options()
+            )
+
+            if media['video'] is not None:
+                self.hover_element(media['video'])
+                self._sleep(random.uniform(2, 5))  # "Watch" for a bit
+                self.logger.debug("Interacted with video")
+
+            for img in media['images']:
+                self.hover_element(img)
+                self._sleep(random.uniform(0.8, 2.0))
+            if media['images']:
+                self.logger.debug(f"Viewed {len(media['images'])} images")
 
+            return True
+        except Exception as e:
+            self.logger.debug(f"Media interaction failed: {str(e)}")
             return False
+
+    def handle_popups(self):
+        """Close a popup, cookie banner or modal with one in-page script"""
+        try:
+            # Banners come back in fresh profiles, so a site is always
+            # probed; its known control is just tried first
+            url = self.page_url()
+            _, learned = self.selector_knowledge.lookup(url, 'popup')
+
+            dismissed = self.driver.execute_script(
+                page_scripts.for_selenium(page_scripts.DISMISS_POPUP),
+                page_scripts.popup_options(self.config, learned)
+            )
+            if not dismissed:
+                return False
+            self.selector_knowledge.record(url, 'popup', dismissed)
+
+            self._sleep(0.5)
+            self.logger.debug(f"Closed popup/banner ({dismissed})")
+            return True
         except Exception as e:
             self.logger.debug(f"Popup handling failed: {str(e)}")
             return False
@@ -268,42 +473,135 @@ class SeleniumAgent(BrowserAgent):
     def fill_search_form(self, query: str) -> bool:
         """Find and fill a search form"""
         try:
-            # Try common search form selectors
-            selectors = [
-                "input[name='q']",
-                "input[type='search']",
-                "input[placeholder*='search' i]",
-                "input[placeholder*='Search' i]",
-            ]
-            
-            for selector in selectors:
+            url = self.page_url()
+            known, learned = self.selector_knowledge.lookup(url, 'search')
+            if known and learned is None:
+                return False  # No search box found on this site lately
+
+            # Try the site's known search box first, then the common ones
+            for selector in prefer(page_scripts.DEFAULT_SEARCH_SELECTORS, learned):
                 try:
                     search_box = self.driver.find_element(self.By.CSS_SELECTOR, selector)
                     search_box.clear()
                     search_box.send_keys(query)
-                    time.sleep(0.5)
+                    self._sleep(0.5)
                     search_box.send_keys("\n")  # Press Enter
-                    time.sleep(2)
-                    self.logger.info(f"Searched for: {query}")
-                    return True
-                except:
+                except Exception:
                     continue
-            
+                self.selector_knowledge.record(url, 'search', selector)
+                self._sleep(2)
+                self.logger.info(f"Searched for: {query}")
+                return True
+
+            self.selector_knowledge.record(url, 'search', None)
             return False
             
         except Exception as e:
             self.logger.debug(f"Search form fill failed: {str(e)}")
             return False
     
+    def harvest_links(self) -> List[str]:
+        """Same-site links of the current page, in one call"""
+        try:
+            return self.driver.execute_script(page_scripts.for_selenium(page_scripts.HARVEST_LINKS),
+                                              page_scripts.harvest_options(self.config)) or []
+        except Exception as e:
+            self.logger.debug(f"Link harvest failed: {str(e)}")
+            return []
+
+    def consume_transferred_bytes(self) -> int:
+        """Sum encoded bytes of finished requests from the performance log"""
+        if not self.driver or not self._bandwidth_tracking():
+            return 0
+        total = 0
+        try:
+            for entry in self.driver.get_log('performance'):
+                message = json.loads(entry['message'])['message']
+                if message.get('method') == 'Network.loadingFinished':
+                    total += int(message['params'].get('encodedDataLength', 0))
+        except Exception as e:
+            self.logger.debug(f"Could not read network events: {str(e)}")
+        return total
+
+    def is_alive(self) -> bool:
+        """Check the driver still answers a cheap WebDriver command"""
+        if not self.driver:
+            return False
+        try:
+            self.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def open_tab(self):
+        """Open a new window tab and switch to it"""
+        try:
+            self.driver.switch_to.new_window('tab')
+            return self.driver.current_window_handle
+        except Exception as e:
+            self.logger.debug(f"Could not open tab: {str(e)}")
+            return None
+
+    def switch_tab(self, handle) -> bool:
+        """Point later commands at handle's window"""
+        try:
+            self.driver.switch_to.window(handle)
+            return True
+        except Exception:
+            return False
+
+    def current_tab(self):
+        """Handle of the current window"""
+        try:
+            return self.driver.current_window_handle
+        except Exception:
+            return None
+
+    def page_url(self) -> Optional[str]:
+        """URL of the current window"""
+        try:
+            return self.driver.current_url
+        except Exception:
+            return None
+
+    def memory_bytes(self) -> int:
+        """RSS of chromedriver and every Chrome process it launched"""
+        try:
+            return ProcessStats.tree_rss_bytes(self.driver.service.process.pid)
+        except Exception:
+            return 0
+
+    def recycle_browser(self, scope: str = 'browser') -> bool:
+        """Swap the tab for a fresh one, or relaunch the browser
+
+        Chrome under Selenium has one profile per driver, so the context
+        scope relaunches the browser too.
+        """
+        if scope != 'tab':
+            return self.restart_browser()
+        try:
+            old_handle = self.driver.current_window_handle
+            self.driver.switch_to.new_window('tab')
+            new_handle = self.driver.current_window_handle
+            self.driver.switch_to.window(old_handle)
+            self.driver.close()
+            self.driver.switch_to.window(new_handle)
+            return True
+        except Exception as e:
+            self.logger.warning(f"Could not recycle tab: {str(e)}")
+            return False
+
     def close_browser(self):
         """Close browser"""
         if self.driver:
-            self.driver.quit()
-            self.logger.info("Browser closed")
+            try:
+                self.driver.quit()
+                self.logger.info("Browser closed")
+            finally:
+                self.driver = None
     
     def _get_user_agent(self) -> str:
         """Get user agent from config or use default"""
-        from .utils import RandomnessGenerator
         if self.config.get('browser', {}).get('rotate_user_agents'):
             return RandomnessGenerator.get_random_user_agent()
         return "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
@@ -311,41 +609,144 @@ class SeleniumAgent(BrowserAgent):
 
 class PlaywrightAgent(BrowserAgent):
     """Browser agent using Playwright"""
+
+    # Sync Playwright objects belong to the thread that created them
+    thread_bound = True
     
-    def __init__(self, logger: logging.Logger, config: Dict[str, Any]):
+    def __init__(self, logger: logging.Logger, config: Dict[str, Any], context_pool=None):
         super().__init__(logger, config)
+        # With a context pool the agent borrows an isolated context from a
+        # shared browser process instead of launching its own; otherwise
+        # self.context is a context of its own browser, so tabs can be
+        # opened in it (pages from browser.new_page() can't have siblings)
+        self.context_pool = context_pool
+        self.context = None
+        self.page = None
+        self.browser_context = None
+        # Bytes reported by the page's Network.loadingFinished events
+        self.transferred_bytes = 0
+        # Set when the renderer crashes; the page object stays "open"
+        self.page_crashed = False
+        # Driver processes started for this agent's own browser
+        self.process_pids = []
         try:
-            from playwright.sync_api import sync_playwright
-            self.playwright = sync_playwright()
+            from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
+            self.TimeoutError = PlaywrightTimeoutError
+            self._sync_playwright = sync_playwright
+            if context_pool is None:
+                self.playwright = sync_playwright()
         except ImportError:
             raise ImportError("Playwright not installed. Run: pip install playwright")
     
     def open_browser(self, headless: bool = True):
         """Open browser with Playwright"""
         try:
-            self.browser_context = self.playwright.start()
-            self.browser = self.browser_context.chromium.launch(headless=headless)
-            self.page = self.browser.new_page()
+            if self.context_pool is not None:
+                self.context = self.context_pool.acquire()
+                self.page = self._setup_page(self.context.new_page())
+                self.logger.info("Playwright context acquired from pool")
+                return True
+
+            with ProcessStats.launch_children() as launched:
+                self.browser_context = self.playwright.start()
+                self.browser = self.browser_context.chromium.launch(headless=headless)
+            self.process_pids = launched
+            self.context = self.browser.new_context()
+            self.page = self._setup_page(self.context.new_page())
             self.logger.info("Playwright browser opened")
             return True
         except Exception as e:
             self.logger.error(f"Failed to open Playwright browser: {str(e)}")
             return False
     
+    def _setup_page(self, page):
+        """Route a new page's requests through the resource policy and count its bytes"""
+        self.page_crashed = False
+        page.on('crash', self._on_crash)
+        if self.resource_policy.active:
+            page.route('**/*', self._route_request)
+        if self._bandwidth_tracking():
+            try:
+                cdp = page.context.new_cdp_session(page)
+                cdp.send('Network.enable')
+                cdp.on('Network.loadingFinished', self._on_loading_finished)
+            except Exception as e:
+                self.logger.debug(f"Could not track network events: {str(e)}")
+        return page
+
+    def _on_loading_finished(self, params):
+        self.transferred_bytes += int(params.get('encodedDataLength', 0))
+
+    def _on_crash(self, page):
+        self.page_crashed = True
+        self.logger.warning("Playwright page crashed")
+
+    def harvest_links(self) -> List[str]:
+        """Same-site links of the current page, in one call"""
+        try:
+            return self.page.evaluate(page_scripts.HARVEST_LINKS, page_scripts.harvest_options(self.config)) or []
+        except Exception as e:
+            self.logger.debug(f"Link harvest failed: {str(e)}")
+            return []
+
+    def consume_transferred_bytes(self) -> int:
+        """Bytes the page moved since the last call"""
+        transferred, self.transferred_bytes = self.transferred_bytes, 0
+        return transferred
+
+    def _route_request(self, route):
+        """Abort blocked fonts/media/images; everything else continues"""
+        request = route.request
+        if self.resource_policy.should_block(request.resource_type, request.url):
+            self.resource_policy.record_blocked(request.resource_type)
+            route.abort('blockedbyclient')
+        else:
+            route.continue_()
+
     def visit_url(self, url: str) -> bool:
         """Visit URL with Playwright"""
         try:
             if not url.startswith('http'):
                 url = 'https://' + url
+
+            if self.context_pool is not None and self.context_pool.needs_recycle(self.context):
+                self.context = self.context_pool.recycle(self.context)
+                self.page = self._setup_page(self.context.new_page())
             
-            self.page.goto(url, wait_until='load')
-            time.sleep(2)
+            readiness = page_scripts.readiness_options(self.config)
+            started = time.monotonic()
+            previous_url = self.page.url
+            try:
+                self.page.goto(url, wait_until='load' if readiness['strategy'] == 'load' else 'domcontentloaded',
+                               timeout=readiness['deadline'] * 1000)
+            except self.TimeoutError:
+                # Deadline hit mid-load: keep what has rendered, unless
+                # navigation never got off the previous page
+                if self.page.url == previous_url:
+                    raise
+                self.logger.debug(f"Page not loaded within {readiness['deadline']:.0f}s, interacting anyway")
+            else:
+                self._wait_until_ready(readiness, readiness['deadline'] - (time.monotonic() - started))
+
+            if self.context_pool is not None:
+                self.context_pool.record_visit(self.context)
             self.logger.info(f"Navigated to: {url}")
             return True
         except Exception as e:
             self.logger.warning(f"Failed to visit {url}: {str(e)}")
             return False
     
+    def _wait_until_ready(self, readiness: Dict[str, Any], remaining: float):
+        """Wait in the page for the fcp/network_quiet strategies, up to remaining seconds"""
+        if readiness['strategy'] not in ('fcp', 'network_quiet') or remaining <= 0:
+            return
+        try:
+            self.page.evaluate(page_scripts.WAIT_FOR_READY,
+                               {'mode': readiness['strategy'], 'timeoutMs': int(remaining * 1000),
+                                'quietMs': readiness['quietMs']})
+        except Exception as e:
+            self.logger.debug(f"Readiness wait failed: {str(e)}")
+
     def get_clickable_elements(self, max_elements: int = 10) -> List:
         """Get clickable elements"""
         try:
@@ -358,18 +759,37 @@ class PlaywrightAgent(BrowserAgent):
     def random_click(self) -> bool:
         """Perform random click"""
         try:
+            if page_scripts.in_page_sampling(self.config):
+                return self._click_sampled_target()
+
             elements = self.get_clickable_elements(max_elements=20)
             if not elements:
                 return False
             
             element = random.choice(elements)
             element.click()
-            time.sleep(random.uniform(1, 3))
+            self._sleep(random.uniform(1, 3))
             self.logger.debug("Random click performed")
             return True
         except Exception as e:
             self.logger.debug(f"Click failed: {str(e)}")
             return False
+
+    def _click_sampled_target(self) -> bool:
+        """Click a target chosen in the page by SAMPLE_CLICK_TARGET"""
+        handle = self.page.evaluate_handle(page_scripts.SAMPLE_CLICK_TARGET,
+                                           page_scripts.click_options(self.config))
+        try:
+            element = handle.as_element()
+            if element is None:
+                return False
+            element.click()
+        finally:
+            handle.dispose()
+
+        self._sleep(random.uniform(1, 3))
+        self.logger.debug("Random click performed")
+        return True
     
     def scroll_page(self, amount: int = 500):
         """Scroll page"""
@@ -381,6 +801,9 @@ class PlaywrightAgent(BrowserAgent):
 
     def natural_scroll(self):
         """Scroll naturally like reading an article"""
+        if page_scripts.in_page_scroll(self.config):
+            return self._natural_scroll_in_page()
+
         try:
             page_height = self.get_page_height()
             current_position = 0
@@ -391,16 +814,16 @@ class PlaywrightAgent(BrowserAgent):
                 current_position += scroll_amount
 
                 reading_time = random.uniform(1.5, 4.0) if scroll_amount > 250 else random.uniform(0.8, 2.0)
-                time.sleep(reading_time)
+                self._sleep(reading_time)
 
                 if random.random() < 0.15:
                     scroll_up = random.randint(50, 150)
                     self.page.evaluate(f"window.scrollBy(0, -{scroll_up})")
                     current_position -= scroll_up
-                    time.sleep(random.uniform(0.5, 1.5))
+                    self._sleep(random.uniform(0.5, 1.5))
 
                 if random.random() < 0.2:
-                    time.sleep(random.uniform(2.0, 5.0))
+                    self._sleep(random.uniform(2.0, 5.0))
 
             self.logger.debug("Natural scroll completed")
             return True
@@ -408,11 +831,30 @@ class PlaywrightAgent(BrowserAgent):
             self.logger.debug(f"Natural scroll failed: {str(e)}")
             return False
 
+    def _natural_scroll_in_page(self) -> bool:
+        """Run the whole reading timeline inside the page (see SeleniumAgent)"""
+        try:
+            planned_ms = self.page.evaluate(page_scripts.START_SCROLL_TIMELINE,
+                                            RandomnessGenerator.get_reading_timeline())
+        except Exception as e:
+            self.logger.debug(f"Natural scroll failed: {str(e)}")
+            return False
+
+        self._sleep(planned_ms / 1000)
+
+        try:
+            result = self.page.evaluate(page_scripts.FINISH_SCROLL_TIMELINE)
+            self.logger.debug(f"Natural scroll reached {result['depth']}px of "
+                              f"{result['pageHeight']}px in {result['steps']} steps")
+        except Exception as e:
+            self.logger.debug(f"Could not read scroll depth: {str(e)}")
+        return True
+
     def hover_element(self, element):
         """Hover over an element"""
         try:
             element.hover()
-            time.sleep(random.uniform(0.3, 0.8))
+            self._sleep(random.uniform(0.3, 0.8))
             return True
         except Exception as e:
             self.logger.debug(f"Hover failed: {str(e)}")
@@ -427,12 +869,15 @@ class PlaywrightAgent(BrowserAgent):
 
     def interact_with_media(self):
         """Interact with videos and images"""
+        if page_scripts.in_page_sampling(self.config):
+            return self._interact_with_sampled_media()
+
         try:
             videos = self.page.query_selector_all('video')
             if videos and random.random() < 0.3:
                 video = random.choice(videos)
                 video.scroll_into_view_if_needed()
-                time.sleep(random.uniform(2, 5))
+                self._sleep(random.uniform(2, 5))
                 self.logger.debug("Interacted with video")
 
             images = self.page.query_selector_all('img')
@@ -441,7 +886,7 @@ class PlaywrightAgent(BrowserAgent):
                 for _ in range(num_images):
                     img = random.choice(images)
                     self.hover_element(img)
-                    time.sleep(random.uniform(0.8, 2.0))
+                    self._sleep(random.uniform(0.8, 2.0))
                 self.logger.debug(f"Viewed {num_images} images")
 
             return True
@@ -449,34 +894,201 @@ class PlaywrightAgent(BrowserAgent):
             self.logger.debug(f"Media interaction failed: {str(e)}")
             return False
 
-    def handle_popups(self):
-        """Close common popups and cookie banners"""
+    def _interact_with_sampled_media(self) -> bool:
+        """Look at a few visible media elements chosen inside the page
+
+        Only the sampled handles cross into Python, and all of them are
+        disposed as soon as the interaction is over.
+        """
+        handles = []
         try:
-            close_selectors = [
-                "button[aria-label*='close' i]",
-                ".close", ".modal-close",
-                "button:has-text('Accept')", "button:has-text('OK')"
-            ]
+            media = self.page.evaluate_handle(page_scripts.SAMPLE_MEDIA, page_scripts.media_options())
+            handles.append(media)
+            video = media.get_property('video')
+            image_list = media.get_property('images')
+            handles += [video, image_list]
+            images = list(image_list.get_properties().values())
+            handles += images
+
+            element = video.as_element()
+            if element is not None:
+                self.hover_element(element)
+                self._sleep(random.uniform(2, 5))
+                self.logger.debug("Interacted with video")
 
-            for selector in close_selectors:
+            for img in images:
+                self.hover_element(img.as_element())
+                self._sleep(random.uniform(0.8, 2.0))
+            if images:
+                self.logger.debug(f"Viewed {len(images)} images")
+
+            return True
+        except Exception as e:
+            self.logger.debug(f"Media interaction failed: {str(e)}")
+            return False
+        finally:
+            for handle in handles:
                 try:
-                    element = self.page.query_selector(selector)
-                    if element:
-                        element.click()
-                        time.sleep(0.5)
-                        self.logger.debug("Closed popup/banner")
-                        return True
-                except:
+                    handle.dispose()
+                except Exception:
+                    pass
+
+    def handle_popups(self):
+        """Close a popup, cookie banner or modal with one in-page script"""
+        try:
+            # Banners come back in fresh profiles, so a site is always
+            # probed; its known control is just tried first
+            url = self.page_url()
+            _, learned = self.selector_knowledge.lookup(url, 'popup')
+
+            dismissed = self.page.evaluate(page_scripts.DISMISS_POPUP,
+                                           page_scripts.popup_options(self.config, learned))
+            if not dismissed:
+                return False
+            self.selector_knowledge.record(url, 'popup', dismissed)
+
+            self._sleep(0.5)
+            self.logger.debug(f"Closed popup/banner ({dismissed})")
+            return True
+        except Exception as e:
+            self.logger.debug(f"Popup handling failed: {str(e)}")
+            return False
+
+    def fill_search_form(self, query: str) -> bool:
+        """Find and fill a search form"""
+        try:
+            url = self.page_url()
+            known, learned = self.selector_knowledge.lookup(url, 'search')
+            if known and learned is None:
+                return False  # No search box found on this site lately
+
+            # Try the site's known search box first, then the common ones
+            for selector in prefer(page_scripts.DEFAULT_SEARCH_SELECTORS, learned):
+                search_box = self.page.query_selector(selector)
+                if not search_box:
                     continue
+                search_box.fill(query)
+                self._sleep(0.5)
+                search_box.press("Enter")
+                self.selector_knowledge.record(url, 'search', selector)
+                self._sleep(2)
+                self.logger.info(f"Searched for: {query}")
+                return True
 
+            self.selector_knowledge.record(url, 'search', None)
             return False
         except Exception as e:
-            self.logger.debug(f"Popup handling failed: {str(e)}")
+            self.logger.debug(f"Search form fill failed: {str(e)}")
             return False
 
+    def is_alive(self) -> bool:
+        """Check the page is open, its renderer alive and its browser connected"""
+        try:
+            if self.page is None or self.page.is_closed() or self.page_crashed:
+                return False
+            browser = self.page.context.browser
+            return browser is None or browser.is_connected()
+        except Exception:
+            return False
+
+    def open_tab(self):
+        """Open a page in the current page's context and make it current"""
+        try:
+            self.page = self._setup_page(self.page.context.new_page())
+            return self.page
+        except Exception as e:
+            self.logger.debug(f"Could not open tab: {str(e)}")
+            return None
+
+    def switch_tab(self, handle) -> bool:
+        """Make handle (a page) the one later commands act on"""
+        if handle is None or handle.is_closed():
+            return False
+        self.page = handle
+        return True
+
+    def current_tab(self):
+        """The current page"""
+        return self.page
+
+    def page_url(self) -> Optional[str]:
+        """URL of the current page"""
+        return self.page.url if self.page else None
+
+    def memory_bytes(self) -> int:
+        """RSS of this agent's Playwright driver and browser processes
+
+        A pooled context shares the pool's browser, whose memory is counted
+        as every browser process of this service.
+        """
+        if self.process_pids:
+            return sum(ProcessStats.tree_rss_bytes(pid) for pid in self.process_pids)
+        return ProcessStats.tree_rss_bytes(os.getpid(), include_self=False)
+
+    def recycle_browser(self, scope: str = 'browser') -> bool:
+        """Swap the page (tab), its context or the whole browser for a fresh one"""
+        if scope == 'browser':
+            return self.restart_browser()
+        try:
+            if scope == 'context':
+                if self.context_pool is not None:
+                    return self.restart_browser()
+                # Closing the old context closes its pages (every tab)
+                old_context, self.context = self.context, self.browser.new_context()
+                self.page = self._setup_page(self.context.new_page())
+                old_context.close()
+            else:
+                old_page = self.page
+                self.page = self._setup_page(self.context.new_page())
+                old_page.close()
+            return True
+        except Exception as e:
+            self.logger.warning(f"Could not recycle {scope}: {str(e)}")
+            return False
+
+    def restart_browser(self) -> bool:
+        """Replace a dead page: a fresh pool context, or a fresh browser"""
+        if self.context_pool is not None:
+            try:
+                # The shared browser itself may be what crashed
+                if not self.context_pool.ensure_browser():
+                    return False
+                # A crashed context must not go back to the idle list
+                self.context = self.context_pool.recycle(self.context)
+                self.page = self._setup_page(self.context.new_page())
+                self.logger.info("Playwright context replaced from pool")
+                return True
+            except Exception as e:
+                self.logger.error(f"Failed to replace Playwright context: {str(e)}")
+                return False
+
+        self.close_browser()
+        if self.browser_context:
+            try:
+                self.browser_context.stop()
+            except Exception:
+                pass
+        self.page = None
+        self.context = None
+        self.browser = None
+        self.browser_context = None
+        self.process_pids = []
+        # A Playwright driver instance can only be started once
+        self.playwright = self._sync_playwright()
+        headless = self.config.get('browser', {}).get('headless', True)
+        return self.open_browser(headless=headless)
+
     def close_browser(self):
         """Close browser"""
         try:
+            if self.context_pool is not None:
+                if self.context:
+                    self.context_pool.release(self.context)
+                self.context = None
+                self.page = None
+                self.logger.info("Playwright context returned to pool")
+                return
+
             if self.page:
                 self.page.close()
             if self.browser:
@@ -488,12 +1100,25 @@ class PlaywrightAgent(BrowserAgent):
             self.logger.error(f"Error closing browser: {str(e)}")
 
 
-def create_agent(logger: logging.Logger, config: Dict[str, Any]) -> BrowserAgent:
-    """Factory function to create appropriate browser agent"""
-    browser_type = config.get('browser', {}).get('type', 'selenium').lower()
+def create_agent(logger: logging.Logger, config: Dict[str, Any],
+                 context_pool=None, browser_type: str = None) -> BrowserAgent:
+    """Factory function to create appropriate browser agent
+
+    browser_type overrides browser.type, e.g. for one agent of a mixed fleet.
+    """
+    browser_type = (browser_type or config.get('browser', {}).get('type', 'selenium')).lower()
     
     if browser_type == 'playwright':
-        return PlaywrightAgent(logger, config)
+        return PlaywrightAgent(logger, config, context_pool=context_pool)
+    elif browser_type == 'simulated':
+        from .simulation import SimulatedAgent
+        return SimulatedAgent(logger, config)
+    elif browser_type == 'http':
+        from .http_agent import HttpAgent
+        return HttpAgent(logger, config)
+    elif browser_type == 'cdp':
+        from .cdp_agent import CdpAgent
+        return CdpAgent(logger, config)
     else:
         return SeleniumAgent(logger, config)
 
@@ -0,0 +1,332 @@
+"""
+Browser pooling - reuse browser processes instead of launching one per session
+"""
+
+import logging
+import threading
+from typing import Dict, Any, Callable, Optional
+
+from .utils import ProcessStats
+
+
+class PlaywrightContextPool:
+    """One long-lived Chromium process handing out isolated BrowserContexts
+
+    Each context has its own cookies and storage, so agents and sessions stay
+    isolated while sharing a single browser process. A context is closed and
+    replaced once it has served max_visits_per_context visits.
+
+    Sync Playwright objects are bound to the thread that created them, so the
+    pool must be started and used from a single thread.
+    """
+
+    def __init__(self, logger: logging.Logger, config: Dict[str, Any]):
+        self.logger = logger
+        self.config = config
+        pool_config = config.get('browser', {}).get('context_pool', {})
+        self.max_visits = pool_config.get('max_visits_per_context', 50)
+
+        self.playwright = None
+        self.browser = None
+        self.idle_contexts = []
+        self.visit_counts = {}
+        self.contexts_created = 0
+        self.contexts_recycled = 0
+        self.browser_relaunches = 0
+        self.headless = True
+        self._owner_thread = None
+
+        try:
+            from playwright.sync_api import sync_playwright
+            self._sync_playwright = sync_playwright
+        except ImportError:
+            raise ImportError("Playwright not installed. Run: pip install playwright")
+
+    def start(self, headless: bool = True) -> bool:
+        """Launch the shared browser process"""
+        try:
+            self._owner_thread = threading.get_ident()
+            self.headless = headless
+            # Under the launch lock so agents' process diffs skip it
+            with ProcessStats.LAUNCH_LOCK:
+                self.playwright = self._sync_playwright().start()
+                self.browser = self.playwright.chromium.launch(headless=headless)
+            self.logger.info("Playwright context pool started")
+            return True
+        except Exception as e:
+            self.logger.error(f"Failed to start context pool: {str(e)}")
+            return False
+
+    def is_owner_thread(self) -> bool:
+        """Whether the calling thread may use this pool"""
+        return threading.get_ident() == self._owner_thread
+
+    def _check_thread(self):
+        if self.browser is None:
+            raise RuntimeError("Context pool is not started")
+        if not self.is_owner_thread():
+            raise RuntimeError("Context pool used from a thread other than the one that started it")
+
+    def ensure_browser(self) -> bool:
+        """Relaunch the shared browser if it crashed or disconnected
+
+        The dead browser's contexts are dropped; agents still holding one
+        get a fresh context from recycle().
+        """
+        if not self.is_owner_thread():
+            raise RuntimeError("Context pool used from a thread other than the one that started it")
+        try:
+            if self.browser is not None and self.browser.is_connected():
+                return True
+        except Exception:
+            pass
+
+        self.logger.warning("Pooled browser is gone; relaunching")
+        self.idle_contexts = []
+        self.visit_counts = {}
+        if self.playwright is not None:
+            try:
+                self.playwright.stop()
+            except Exception as e:
+                self.logger.debug(f"Error stopping dead pool driver: {str(e)}")
+        self.browser = None
+        self.playwright = None
+        if not self.start(self.headless):
+            return False
+        self.browser_relaunches += 1
+        return True
+
+    def acquire(self):
+        """Hand out an idle context, or create a fresh one"""
+        self._check_thread()
+
+        if self.idle_contexts:
+            return self.idle_contexts.pop()
+
+        context = self.browser.new_context(user_agent=self._get_user_agent())
+        self.visit_counts[context] = 0
+        self.contexts_created += 1
+        return context
+
+    def record_visit(self, context):
+        """Count a completed visit made in a context"""
+        if context in self.visit_counts:
+            self.visit_counts[context] += 1
+
+    def needs_recycle(self, context) -> bool:
+        """Whether a context has reached its visit limit"""
+        if not self.max_visits:
+            return False
+        return self.visit_counts.get(context, 0) >= self.max_visits
+
+    def recycle(self, context):
+        """Close a worn-out context and hand out a fresh one in its place"""
+        self._close_context(context)
+        self.contexts_recycled += 1
+        self.logger.debug("Recycled browser context")
+        return self.acquire()
+
+    def release(self, context):
+        """Return a context to the pool once its agent or session is done"""
+        self._check_thread()
+
+        if self.needs_recycle(context):
+            self._close_context(context)
+            self.contexts_recycled += 1
+            return
+
+        for page in list(context.pages):
+            try:
+                page.close()
+            except Exception:
+                pass
+        self.idle_contexts.append(context)
+
+    def _close_context(self, context):
+        self.visit_counts.pop(context, None)
+        try:
+            context.close()
+        except Exception as e:
+            self.logger.debug(f"Error closing context: {str(e)}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool counters for status reporting"""
+        return {
+            'contexts_created': self.contexts_created,
+            'contexts_recycled': self.contexts_recycled,
+            'idle_contexts': len(self.idle_contexts),
+            'browser_relaunches': self.browser_relaunches,
+        }
+
+    def stop(self):
+        """Close every context and the shared browser process"""
+        if self.browser is None:
+            return
+        if not self.is_owner_thread():
+            self.logger.debug("Context pool can only be stopped from its owner thread")
+            return
+
+        try:
+            for context in self.idle_contexts:
+                self._close_context(context)
+            self.idle_contexts = []
+            self.browser.close()
+            self.playwright.stop()
+            self.logger.info("Playwright context pool stopped")
+        except Exception as e:
+            self.logger.error(f"Error stopping context pool: {str(e)}")
+        finally:
+            self.browser = None
+            self.playwright = None
+
+    def _get_user_agent(self) -> str:
+        """Get user agent from config or use default"""
+        from .utils import RandomnessGenerator
+        if self.config.get('browser', {}).get('rotate_user_agents'):
+            return RandomnessGenerator.get_random_user_agent()
+        return "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+
+class WarmBrowserPool:
+    """Keeps pre-launched, idle browser agents ready to hand out
+
+    A background thread launches browsers until size are idle and
+    periodically drops any that stopped responding. acquire() never waits
+    for a launch: it returns an idle agent or None.
+
+    Only agents whose driver can move between threads can be pooled; sync
+    Playwright objects stay bound to the thread that launched them.
+    """
+
+    THREAD_BOUND_TYPES = ('playwright', 'playwright_async')
+
+    def __init__(self, logger: logging.Logger, config: Dict[str, Any],
+                 agent_factory: Callable = None):
+        self.logger = logger
+        self.config = config
+        browser_config = config.get('browser', {})
+        pool_config = browser_config.get('warm_pool', {})
+        self.size = pool_config.get('size', 0)
+        self.health_check_interval = pool_config.get('health_check_interval', 30)
+        self.headless = browser_config.get('headless', True)
+
+        if agent_factory is None:
+            from .browser_agent import create_agent
+            agent_factory = lambda: create_agent(self.logger, self.config)
+        self.agent_factory = agent_factory
+
+        self.idle_agents = []
+        self.agents_launched = 0
+        self.agents_discarded = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.running = False
+
+    def is_supported(self) -> bool:
+        """Whether the configured browser type can be pooled"""
+        browser_type = self.config.get('browser', {}).get('type', 'selenium').lower()
+        return browser_type not in self.THREAD_BOUND_TYPES
+
+    def start(self) -> bool:
+        """Start the background refill thread"""
+        if self.size <= 0:
+            return False
+        if not self.is_supported():
+            self.logger.warning("Warm browser pool does not support Playwright agents; disabled")
+            return False
+
+        self.running = True
+        self._thread = threading.Thread(target=self._refill_loop, name="WarmBrowserPool", daemon=True)
+        self._thread.start()
+        self.logger.info(f"Warm browser pool started (size {self.size})")
+        return True
+
+    def acquire(self) -> Optional[Any]:
+        """Take an idle, pre-launched agent, or None if none is ready"""
+        with self._lock:
+            agent = self.idle_agents.pop() if self.idle_agents else None
+        # Replace what was taken in the background
+        self._wake.set()
+        return agent
+
+    def idle_count(self) -> int:
+        """Number of browsers ready to hand out"""
+        with self._lock:
+            return len(self.idle_agents)
+
+    def _refill_loop(self):
+        while self.running:
+            self._wake.clear()
+            self._discard_dead_agents()
+
+            while self.running and self.idle_count() < self.size:
+                agent = self._launch_agent()
+                if agent is None:
+                    break
+                with self._lock:
+                    self.idle_agents.append(agent)
+
+            self._wake.wait(self.health_check_interval)
+
+    def _launch_agent(self):
+        try:
+            agent = self.agent_factory()
+            if not agent.open_browser(headless=self.headless):
+                return None
+            self.agents_launched += 1
+            self.logger.debug("Warm browser launched")
+            return agent
+        except Exception as e:
+            self.logger.error(f"Failed to launch warm browser: {str(e)}")
+            return None
+
+    def _discard_dead_agents(self):
+        with self._lock:
+            agents = list(self.idle_agents)
+
+        for agent in agents:
+            if agent.is_alive():
+                continue
+            with self._lock:
+                if agent not in self.idle_agents:
+                    continue
+                self.idle_agents.remove(agent)
+            self.agents_discarded += 1
+            self.logger.info("Discarded unresponsive warm browser")
+            try:
+                agent.close_browser()
+            except Exception:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Pool counters for status reporting"""
+        return {
+            'size': self.size,
+            'idle_browsers': self.idle_count(),
+            'browsers_launched': self.agents_launched,
+            'browsers_discarded': self.agents_discarded,
+        }
+
+    def stop(self):
+        """Stop refilling and close every idle browser"""
+        self.running = False
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5.0)
+
+        with self._lock:
+            agents = self.idle_agents
+            self.idle_agents = []
+
+        for agent in agents:
+            try:
+                agent.close_browser()
+            except Exception as e:
+                self.logger.debug(f"Error closing warm browser: {str(e)}")
+
+
+__all__ = [
+    'PlaywrightContextPool',
+    'WarmBrowserPool',
+]
@@ -0,0 +1,653 @@
+"""
+Direct Chrome DevTools Protocol agent - no WebDriver, no chromedriver
+Launches Chrome itself and drives it over the DevTools websocket
+"""
+
+import json
+import logging
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from typing import List, Dict, Any, Optional, Callable
+
+from .browser_agent import BrowserAgent
+from .network import BLOCKABLE_CATEGORIES
+from .utils import RandomnessGenerator, ProcessStats
+from . import page_scripts
+from .selector_knowledge import prefer
+
+
+# Chrome executables tried in order when cdp.chrome_path is not set
+CHROME_CANDIDATES = (
+    'google-chrome',
+    'google-chrome-stable',
+    'chromium',
+    'chromium-browser',
+    'chrome',
+    '/Applications/Google Chrome.app/Contents/MacOS/Google Chrome',
+)
+
+# Page.lifecycleEvent that ends the readiness wait for each strategy.
+# network_quiet uses Chrome's own idle window (at most two connections
+# for 500ms) rather than browser.page_readiness.quiet_ms.
+READINESS_EVENTS = {
+    'load': 'load',
+    'domcontentloaded': 'DOMContentLoaded',
+    'eager': 'DOMContentLoaded',
+    'fcp': 'firstContentfulPaint',
+    'network_quiet': 'networkAlmostIdle',
+}
+
+
+class CdpError(Exception):
+    """A DevTools command failed, timed out or lost its connection"""
+
+
+class _EventWaiter:
+    """Buffers one event type so a caller can wait for a matching one"""
+
+    def __init__(self, method: str, session_id: Optional[str]):
+        self.method = method
+        self.session_id = session_id
+        self.events = []
+        self._condition = threading.Condition()
+
+    def push(self, params: Dict[str, Any]):
+        with self._condition:
+            self.events.append(params)
+            self._condition.notify_all()
+
+    def wait_for(self, predicate: Callable[[Dict[str, Any]], bool], timeout: float) -> Optional[Dict[str, Any]]:
+        """First buffered or future event matching predicate, or None at timeout"""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            checked = 0
+            while True:
+                for params in self.events[checked:]:
+                    if predicate(params):
+                        return params
+                checked = len(self.events)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+
+
+class CdpConnection:
+    """One DevTools websocket shared by the browser and its page sessions
+
+    Commands are matched to responses by id on a reader thread; events go
+    to listeners registered with on() and waiters created with expect().
+    """
+
+    def __init__(self, logger: logging.Logger, websocket_module, url: str):
+        self.logger = logger
+        self.ws = websocket_module.create_connection(url, suppress_origin=True, enable_multithread=True)
+        self.closed = False
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._pending = {}
+        self._listeners = {}
+        self._waiters = []
+        self._reader = threading.Thread(target=self._read_loop, name="CdpReader", daemon=True)
+        self._reader.start()
+
+    def send(self, method: str, params: Dict[str, Any] = None, session_id: str = None,
+             timeout: float = 30) -> Dict[str, Any]:
+        """Send one command and wait for its result"""
+        if self.closed:
+            raise CdpError("DevTools connection closed")
+        slot = {'event': threading.Event(), 'message': None}
+        with self._lock:
+            self._next_id += 1
+            command_id = self._next_id
+            self._pending[command_id] = slot
+        message = {'id': command_id, 'method': method, 'params': params or {}}
+        if session_id:
+            message['sessionId'] = session_id
+        try:
+            self.ws.send(json.dumps(message))
+            if not slot['event'].wait(timeout):
+                raise CdpError(f"{method} timed out after {timeout:.0f}s")
+        finally:
+            with self._lock:
+                self._pending.pop(command_id, None)
+
+        response = slot['message']
+        if response is None:
+            raise CdpError("DevTools connection closed")
+        if 'error' in response:
+            raise CdpError(f"{method}: {response['error'].get('message')}")
+        return response.get('result', {})
+
+    def on(self, method: str, callback: Callable[[Dict[str, Any], Optional[str]], None]):
+        """Call callback(params, session_id) for every event of a type"""
+        self._listeners.setdefault(method, []).append(callback)
+
+    def expect(self, method: str, session_id: str = None) -> _EventWaiter:
+        """Start buffering events of a type; pair with forget()"""
+        waiter = _EventWaiter(method, session_id)
+        with self._lock:
+            self._waiters.append(waiter)
+        return waiter
+
+    def forget(self, waiter: _EventWaiter):
+        with self._lock:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def close(self):
+        self.closed = True
+        try:
+            self.ws.close()
+        except Exception:
+            pass
+
+    def _read_loop(self):
+        while not self.closed:
+            try:
+                message = json.loads(self.ws.recv())
+            except Exception:
+                break
+
+            if 'id' in message:
+                with self._lock:
+                    slot = self._pending.get(message['id'])
+                if slot:
+                    slot['message'] = message
+                    slot['event'].set()
+                continue
+
+            method = message.get('method')
+            params = message.get('params', {})
+            session_id = message.get('sessionId')
+            with self._lock:
+                waiters = [w for w in self._waiters
+                           if w.method == method and w.session_id in (None, session_id)]
+            for waiter in waiters:
+                waiter.push(params)
+            for callback in self._listeners.get(method, []):
+                try:
+                    callback(params, session_id)
+                except Exception as e:
+                    self.logger.debug(f"DevTools event handler for {method} failed: {str(e)}")
+
+        # Wake every caller still waiting for a response
+        self.closed = True
+        with self._lock:
+            for slot in self._pending.values():
+                slot['event'].set()
+
+
+class CdpAgent(BrowserAgent):
+    """Browser agent speaking the DevTools protocol over Chrome's websocket
+
+    Every action is one websocket message to the browser instead of an HTTP
+    request to chromedriver and a DevTools command behind it. Clicks, hovers
+    and scrolls are real Input.dispatchMouseEvent events; page readiness
+    waits on Chrome's own lifecycle events.
+    """
+
+    def __init__(self, logger: logging.Logger, config: Dict[str, Any]):
+        super().__init__(logger, config)
+        cdp_config = config.get('cdp', {})
+        self.chrome_path = cdp_config.get('chrome_path') or None
+        self.launch_timeout = cdp_config.get('launch_timeout', 20)
+        self.process = None
+        self.connection = None
+        self.user_data_dir = None
+        self.session_id = None
+        self.target_id = None
+        # Page sessions by target id, and the ones whose renderer crashed
+        self.sessions = {}
+        self.crashed_sessions = set()
+        # BrowserContext the pages live in (None: Chrome's default context)
+        self.browser_context_id = None
+        # Added to by the connection's reader thread, taken by the session's
+        self.transferred_bytes = 0
+        self._bytes_lock = threading.Lock()
+        self.viewport = (1366, 768)
+        self.mouse = (0, 0)
+        try:
+            import websocket
+            self.websocket = websocket
+        except ImportError:
+            raise ImportError("websocket-client not installed. Run: pip install websocket-client")
+
+    def _find_chrome(self) -> Optional[str]:
+        if self.chrome_path:
+            return self.chrome_path
+        for candidate in CHROME_CANDIDATES:
+            path = shutil.which(candidate) or (candidate if os.path.isfile(candidate) else None)
+            if path:
+                return path
+        return None
+
+    def _wait_for_endpoint(self) -> str:
+        """Browser websocket URL from the DevToolsActivePort file Chrome writes"""
+        port_file = os.path.join(self.user_data_dir, 'DevToolsActivePort')
+        deadline = time.monotonic() + self.launch_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise CdpError(f"Chrome exited with code {self.process.returncode}")
+            try:
+                with open(port_file, 'r') as f:
+                    lines = f.read().split()
+                if len(lines) >= 2:
+                    return f"ws://127.0.0.1:{lines[0]}{lines[1]}"
+            except OSError:
+                pass
+            time.sleep(0.1)
+        raise CdpError(f"Chrome did not open DevTools within {self.launch_timeout}s")
+
+    def open_browser(self, headless: bool = True):
+        """Launch Chrome with remote debugging and attach to its first page"""
+        try:
+            chrome = self._find_chrome()
+            if not chrome:
+                raise CdpError("Chrome not found; set cdp.chrome_path")
+
+            self.user_data_dir = tempfile.mkdtemp(prefix='decoy-cdp-')
+            args = [
+                chrome,
+                f'--user-data-dir={self.user_data_dir}',
+                '--remote-debugging-port=0',
+                '--no-first-run',
+                '--no-default-browser-check',
+                '--no-sandbox',
+                '--disable-dev-shm-usage',
+                '--disable-blink-features=AutomationControlled',
+                f'--window-size={self.viewport[0]},{self.viewport[1]}',
+                f'--user-agent={self._get_user_agent()}',
+            ]
+            if headless:
+                args.append('--headless=new')
+            args.append('about:blank')
+            # Under the launch lock so other agents' process diffs skip it
+            with ProcessStats.LAUNCH_LOCK:
+                self.process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+            self.connection = CdpConnection(self.logger, self.websocket, self._wait_for_endpoint())
+            if self._bandwidth_tracking():
+                self.connection.on('Network.loadingFinished', self._on_loading_finished)
+            self.connection.on('Network.loadingFailed', self._on_loading_failed)
+            self.connection.on('Inspector.targetCrashed', self._on_target_crashed)
+
+            targets = self._send('Target.getTargets', session=False)['targetInfos']
+            page = next((t for t in targets if t['type'] == 'page'), None)
+            target_id = page['targetId'] if page else None
+            self._attach_page(target_id)
+            self.logger.info("Chrome opened over DevTools")
+            return True
+        except Exception as e:
+            self.logger.error(f"Failed to open browser: {str(e)}")
+            self.close_browser()
+            return False
+
+    def _send(self, method: str, params: Dict[str, Any] = None, session: bool = True,
+              timeout: float = 30) -> Dict[str, Any]:
+        """One DevTools command, to the current page unless session is False"""
+        self.round_trips += 1
+        return self.connection.send(method, params, self.session_id if session else None, timeout)
+
+    def _attach_page(self, target_id: str = None, browser_context_id: str = None) -> str:
+        """Attach to (or create) a page target, enable its domains and make it current"""
+        if target_id is None:
+            params = {'url': 'about:blank'}
+            if browser_context_id:
+                params['browserContextId'] = browser_context_id
+            target_id = self._send('Target.createTarget', params, session=False)['targetId']
+        self.session_id = self._send('Target.attachToTarget', {'targetId': target_id, 'flatten': True},
+                                     session=False)['sessionId']
+        self.target_id = target_id
+        self.sessions[target_id] = self.session_id
+
+        self._send('Page.enable')
+        self._send('Page.setLifecycleEventsEnabled', {'enabled': True})
+        self._send('Inspector.enable')
+        if self._bandwidth_tracking() or self.resource_policy.active:
+            self._send('Network.enable')
+        patterns = self.resource_policy.url_patterns(self.logger)
+        if patterns:
+            self._send('Network.setBlockedURLs', {'urls': patterns})
+        return target_id
+
+    def _on_loading_finished(self, params, session_id):
+        with self._bytes_lock:
+            self.transferred_bytes += int(params.get('encodedDataLength', 0))
+
+    def _on_loading_failed(self, params, session_id):
+        if params.get('blockedReason'):
+            category = params.get('type', '').lower()
+            if category in BLOCKABLE_CATEGORIES:
+                self.resource_policy.record_blocked(category)
+
+    def _on_target_crashed(self, params, session_id):
+        self.crashed_sessions.add(session_id)
+        self.logger.warning("Chrome page crashed")
+
+    def _evaluate(self, expression: str, timeout: float = 30):
+        """Evaluate an expression in the page and return its value"""
+        result = self._send('Runtime.evaluate', {'expression': expression, 'returnByValue': True,
+                                                 'awaitPromise': True}, timeout=timeout)
+        if 'exceptionDetails' in result:
+            raise CdpError(result['exceptionDetails'].get('text', 'script error'))
+        return result['result'].get('value')
+
+    def _call(self, script: str, options: Any = None, timeout: float = 30):
+        """Call a page_scripts function expression with one options argument"""
+        return self._evaluate(f"({script.strip()})({json.dumps(options)})", timeout)
+
+    def _mouse(self, event_type: str, x: float, y: float, **params):
+        self._send('Input.dispatchMouseEvent', dict(params, type=event_type, x=x, y=y))
+        self.mouse = (x, y)
+
+    def _move_to(self, x: float, y: float):
+        """Move the pointer to (x, y) in a few steps, like a hand would"""
+        start_x, start_y = self.mouse
+        steps = random.randint(3, 6)
+        for i in range(1, steps + 1):
+            self._mouse('mouseMoved', start_x + (x - start_x) * i / steps, start_y + (y - start_y) * i / steps)
+
+    def visit_url(self, url: str) -> bool:
+        """Navigate and wait for the readiness strategy's lifecycle event"""
+        try:
+            if not url.startswith('http'):
+                url = 'https://' + url
+
+            readiness = page_scripts.readiness_options(self.config)
+            event = READINESS_EVENTS.get(readiness['strategy'], 'DOMContentLoaded')
+            waiter = self.connection.expect('Page.lifecycleEvent', self.session_id)
+            try:
+                result = self._send('Page.navigate', {'url': url}, timeout=readiness['deadline'] + 5)
+                if result.get('errorText'):
+                    self.logger.warning(f"Failed to visit {url}: {result['errorText']}")
+                    return False
+
+                loader_id = result.get('loaderId')
+                ready = waiter.wait_for(lambda params: params.get('name') == event
+                                        and params.get('loaderId') == loader_id,
+                                        readiness['deadline'])
+            finally:
+                self.connection.forget(waiter)
+
+            if ready is None:
+                # Deadline hit mid-load: keep what has rendered
+                self._send('Page.stopLoading')
+                self.logger.debug(f"Page not ready within {readiness['deadline']:.0f}s, interacting anyway")
+
+            self.logger.info(f"Navigated to: {url}")
+            return True
+        except Exception as e:
+            self.logger.warning(f"Failed to visit {url}: {str(e)}")
+            return False
+
+    def get_clickable_elements(self, max_elements: int = 10) -> List:
+        """Viewport points of visible clickable elements"""
+        try:
+            sample = page_scripts.with_points(page_scripts.SAMPLE_CLICK_TARGET)
+            options = json.dumps(page_scripts.click_options(self.config))
+            # One round-trip: sample max_elements times, drop the misses
+            return self._evaluate(f"Array.from({{length: {int(max_elements)}}}, "
+                                  f"() => ({sample})({options})).filter(Boolean)") or []
+        except Exception as e:
+            self.logger.debug(f"Failed to get clickable elements: {str(e)}")
+            return []
+
+    def random_click(self) -> bool:
+        """Move to an in-page sampled target and click it with mouse events"""
+        try:
+            point = self._call(page_scripts.with_points(page_scripts.SAMPLE_CLICK_TARGET),
+                               page_scripts.click_options(self.config))
+            if point is None:
+                return False
+
+            self._move_to(point['x'], point['y'])
+            self._sleep(random.uniform(0.1, 0.4))
+            self._mouse('mousePressed', point['x'], point['y'], button='left', clickCount=1)
+            self._mouse('mouseReleased', point['x'], point['y'], button='left', clickCount=1)
+            self._sleep(random.uniform(1, 3))
+            self.logger.debug("Random click performed")
+            return True
+        except Exception as e:
+            self.logger.debug(f"Click failed: {str(e)}")
+            return False
+
+    def scroll_page(self, amount: int = 500):
+        """Scroll with a mouse wheel event"""
+        try:
+            x, y = self.mouse if self.mouse != (0, 0) else (self.viewport[0] / 2, self.viewport[1] / 2)
+            self._mouse('mouseWheel', x, y, deltaX=0, deltaY=amount)
+            self.logger.debug(f"Scrolled {amount}px")
+        except Exception as e:
+            self.logger.debug(f"Scroll failed: {str(e)}")
+
+    def natural_scroll(self):
+        """Wheel through the reading timeline down to 80% of the page"""
+        try:
+            depth = int(self.get_page_height() * 0.8)
+            for amount, pause_ms in RandomnessGenerator.get_reading_timeline(depth):
+                self.scroll_page(amount)
+                self._sleep(pause_ms / 1000)
+            return True
+        except Exception as e:
+            self.logger.debug(f"Natural scroll failed: {str(e)}")
+            return False
+
+    def hover_element(self, element):
+        """Move the pointer over a point from get_clickable_elements"""
+        try:
+            self._move_to(element['x'], element['y'])
+            self._sleep(random.uniform(0.3, 0.8))
+            return True
+        except Exception as e:
+            self.logger.debug(f"Hover failed: {str(e)}")
+            return False
+
+    def get_page_height(self) -> int:
+        """Get page height"""
+        try:
+            return int(self._evaluate("document.documentElement.scrollHeight") or 0)
+        except Exception:
+            return 0
+
+    def interact_with_media(self):
+        """Hover a few visible media elements chosen inside the page"""
+        try:
+            media = self._call(page_scripts.with_points(page_scripts.SAMPLE_MEDIA), page_scripts.media_options())
+            if not media:
+                return False
+
+            if media['video'] is not None:
+                self.hover_element(media['video'])
+                self._sleep(random.uniform(2, 5))  # "Watch" for a bit
+                self.logger.debug("Interacted with video")
+
+            for image in media['images']:
+                self.hover_element(image)
+                self._sleep(random.uniform(0.8, 2.0))
+            if media['images']:
+                self.logger.debug(f"Viewed {len(media['images'])} images")
+            return True
+        except Exception as e:
+            self.logger.debug(f"Media interaction failed: {str(e)}")
+            return False
+
+    def handle_popups(self):
+        """Close a popup, cookie banner or modal with one in-page script"""
+        try:
+            # Banners come back in fresh profiles, so a site is always
+            # probed; its known control is just tried first
+            url = self.page_url()
+            _, learned = self.selector_knowledge.lookup(url, 'popup')
+
+            dismissed = self._call(page_scripts.DISMISS_POPUP, page_scripts.popup_options(self.config, learned))
+            if not dismissed:
+                return False
+            self.selector_knowledge.record(url, 'popup', dismissed)
+            self._sleep(0.5)
+            self.logger.debug(f"Closed popup/banner ({dismissed})")
+            return True
+        except Exception as e:
+            self.logger.debug(f"Popup handling failed: {str(e)}")
+            return False
+
+    def fill_search_form(self, query: str) -> bool:
+        """Focus the search box, type the query key by key and press Enter"""
+        try:
+            url = self.page_url()
+            known, learned = self.selector_knowledge.lookup(url, 'search')
+            if known and learned is None:
+                return False  # No search box found on this site lately
+
+            selectors = prefer(page_scripts.DEFAULT_SEARCH_SELECTORS, learned)
+            found = self._call(page_scripts.FOCUS_SEARCH_INPUT, {'selectors': selectors})
+            if not found:
+                self.selector_knowledge.record(url, 'search', None)
+                return False
+
+            for char in query:
+                self._send('Input.dispatchKeyEvent', {'type': 'char', 'text': char})
+                self._sleep(random.uniform(0.05, 0.2))
+            self._sleep(0.5)
+            for event_type in ('keyDown', 'keyUp'):
+                self._send('Input.dispatchKeyEvent', {'type': event_type, 'key': 'Enter', 'code': 'Enter',
+                                                      'windowsVirtualKeyCode': 13, 'text': '\r'})
+            self.selector_knowledge.record(url, 'search', found)
+            self._sleep(2)
+            self.logger.info(f"Searched for: {query}")
+            return True
+        except Exception as e:
+            self.logger.debug(f"Search form fill failed: {str(e)}")
+            return False
+
+    def harvest_links(self) -> List[str]:
+        """Same-site links of the current page, in one call"""
+        try:
+            return self._call(page_scripts.HARVEST_LINKS, page_scripts.harvest_options(self.config)) or []
+        except Exception as e:
+            self.logger.debug(f"Link harvest failed: {str(e)}")
+            return []
+
+    def page_url(self) -> Optional[str]:
+        """URL of the current page"""
+        try:
+            return self._evaluate('location.href')
+        except Exception:
+            return None
+
+    def consume_transferred_bytes(self) -> int:
+        """Bytes of finished requests since the last call"""
+        with self._bytes_lock:
+            transferred, self.transferred_bytes = self.transferred_bytes, 0
+        return transferred
+
+    def open_tab(self):
+        """Open a page target, attach to it and make it current"""
+        try:
+            return self._attach_page(browser_context_id=self.browser_context_id)
+        except Exception as e:
+            self.logger.debug(f"Could not open tab: {str(e)}")
+            return None
+
+    def switch_tab(self, handle) -> bool:
+        """Make handle's page session current"""
+        if handle not in self.sessions:
+            return False
+        self.target_id = handle
+        self.session_id = self.sessions[handle]
+        return True
+
+    def current_tab(self):
+        """Target id of the current page"""
+        return self.target_id
+
+    def recycle_browser(self, scope: str = 'browser') -> bool:
+        """Swap the page (tab), its context or the whole browser for a fresh one"""
+        if scope == 'browser':
+            return self.restart_browser()
+        try:
+            if scope == 'context':
+                old_context, old_targets = self.browser_context_id, list(self.sessions)
+                self.browser_context_id = self._send('Target.createBrowserContext',
+                                                     session=False)['browserContextId']
+                self._attach_page(browser_context_id=self.browser_context_id)
+                # Every tab lived in the old context and goes with it
+                for target in old_targets:
+                    self.sessions.pop(target, None)
+                if old_context:
+                    self._send('Target.disposeBrowserContext', {'browserContextId': old_context},
+                               session=False)
+                else:
+                    # Chrome's default context can't be disposed
+                    for target in old_targets:
+                        self._send('Target.closeTarget', {'targetId': target}, session=False)
+                return True
+
+            old_target = self.target_id
+            self._attach_page(browser_context_id=self.browser_context_id)
+            self.sessions.pop(old_target, None)
+            self._send('Target.closeTarget', {'targetId': old_target}, session=False)
+            return True
+        except Exception as e:
+            self.logger.warning(f"Could not recycle {scope}: {str(e)}")
+            return False
+
+    def memory_bytes(self) -> int:
+        """RSS of the Chrome process tree"""
+        if not self.process:
+            return 0
+        return ProcessStats.tree_rss_bytes(self.process.pid)
+
+    def is_alive(self) -> bool:
+        """Chrome is running, the websocket open and the current page not crashed"""
+        return (self.process is not None and self.process.poll() is None
+                and self.connection is not None and not self.connection.closed
+                and self.session_id not in self.crashed_sessions)
+
+    def close_browser(self):
+        """Close Chrome and remove its temporary profile"""
+        asked_to_close = False
+        if self.connection:
+            try:
+                self.connection.send('Browser.close', timeout=5)
+                asked_to_close = True
+            except Exception:
+                pass
+            self.connection.close()
+            self.connection = None
+        if self.process:
+            if not asked_to_close:
+                self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+            self.logger.info("Browser closed")
+        if self.user_data_dir:
+            shutil.rmtree(self.user_data_dir, ignore_errors=True)
+            self.user_data_dir = None
+        self.session_id = None
+        self.target_id = None
+        self.sessions = {}
+        self.crashed_sessions = set()
+        self.browser_context_id = None
+
+    def _get_user_agent(self) -> str:
+        """Get user agent from config or use default"""
+        if self.config.get('browser', {}).get('rotate_user_agents'):
+            return RandomnessGenerator.get_random_user_agent()
+        return "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+
+__all__ = [
+    'CdpAgent',
+    'CdpConnection',
+    'CdpError',
+]
@@ -79,6 +79,10 @@ class DaemonClient:
         """Get activity log"""
         return self.send_command('activity-log')
     
+    def metrics(self):
+        """Get Prometheus-format metrics"""
+        return self.send_command('metrics')
+    
     def shutdown(self):
         """Shutdown daemon"""
         return self.send_command('shutdown')
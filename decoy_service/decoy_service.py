@@ -3,20 +3,36 @@ Main decoy service orchestrator
 Coordinates browser agents and generates random browsing activity
 """
 
+import asyncio
 import logging
 import time
 import random
+import threading
 from typing import Dict, Any, List
 from datetime import datetime, timedelta
 
-from .utils import Logger, ConfigManager, ActivityTracker, RandomnessGenerator
+from .utils import (Logger, ConfigManager, ActivityTracker, RandomnessGenerator,
+                    CancellationToken, SessionCancelled, SystemClock)
 from .browser_agent import create_agent
+from .async_agent import AsyncPlaywrightEngine, AsyncPlaywrightAgent
+from .browser_pool import PlaywrightContextPool, WarmBrowserPool
+from .simulation import VirtualClock, SimulatedAgent
+from .metrics import MetricsRegistry, instrument_agent
+from .network import ResourcePolicy
+from .link_cache import LinkCache
+from .selector_knowledge import SelectorKnowledge
+from .search_engines import SearchEngineRegistry
+
+
+# Agent methods that may replace the current tab (its handle must be re-read)
+TAB_REPLACING_METHODS = ('restart_browser', 'recycle_browser')
 
 
 class DecoyService:
     """Main service class that coordinates decoy activity"""
     
-    def __init__(self, config_dir: str = 'config'):
+    def __init__(self, config_dir: str = 'config', context_pool: PlaywrightContextPool = None,
+                 browser_pool: WarmBrowserPool = None, clock=None):
         # Load configuration
         self.config_manager = ConfigManager(config_dir)
         self.settings = self.config_manager.load_settings()
@@ -26,15 +42,47 @@ class DecoyService:
         self.logger = Logger.setup_logging(self.settings)
         self.logger.info("Decoy Service initialized")
         
+        # Time source: simulated agents run on virtual time by default
+        if clock is None:
+            browser_type = self.settings.get('browser', {}).get('type', 'selenium').lower()
+            clock = VirtualClock() if browser_type == 'simulated' else SystemClock()
+        self.clock = clock
+
         # Activity tracking
-        self.tracker = ActivityTracker(self.logger)
+        self.tracker = ActivityTracker(self.logger, clock=self.clock)
+
+        # Latency and outcome of every agent primitive and service step
+        self.metrics = MetricsRegistry()
+
+        # Fonts/media/images blocked by every agent, with savings estimate
+        self.resource_policy = ResourcePolicy(self.settings)
+
+        # Same-site links per domain, shared by every agent
+        self.link_cache = LinkCache(self.settings, clock=self.clock)
+        # Search box and popup selectors learned per site, kept on disk
+        self.selector_knowledge = SelectorKnowledge(self.settings, clock=self.clock)
+        # Built-in engines plus any from websites.yaml's search_engines
+        self.search_engines = SearchEngineRegistry(self.config_manager.search_engines)
         
-        # Browser agent
+        # Browser agents (self.agent is the first one, kept for single-agent callers)
         self.agent = None
+        self.agents = []
+        self._agents_lock = threading.Lock()
+
+        # Shared Playwright browser handing out contexts; may be passed in by
+        # a long-lived owner (e.g. the scheduler) so it outlives the session
+        self.context_pool = context_pool
+        self._owns_context_pool = False
+
+        # Pre-launched browsers to take from instead of launching on start
+        self.browser_pool = browser_pool
         
-        # Session control
+        # Session control; every wait goes through the token so a stop
+        # interrupts dwell times immediately
         self.running = False
+        self.cancel_token = CancellationToken()
         self.start_time = None
+        self.session_duration = 0
     
     def _flatten_website_list(self) -> List[str]:
         """Flatten website categories into a single list"""
@@ -47,9 +95,20 @@ class DecoyService:
         """Get search queries from config"""
         return self.websites_config.get('search_queries', [])
     
-    def _get_random_website(self) -> str:
-        """Get a random website from config"""
+    def _get_random_website(self, prefer_light: bool = False) -> str:
+        """Get a random website from config
+
+        With prefer_light, pick from the lighter half of the sites by average
+        measured transfer (sites not yet measured count as average).
+        """
         websites = self._flatten_website_list()
+        if prefer_light and len(websites) > 1:
+            weights = {url: self.tracker.get_average_transfer(url) for url in websites}
+            measured = sorted(w for w in weights.values() if w is not None)
+            if measured:
+                median = measured[len(measured) // 2]
+                ranked = sorted(websites, key=lambda url: median if weights[url] is None else weights[url])
+                websites = ranked[:max(1, len(ranked) // 2)]
         return RandomnessGenerator.get_random_element(websites)
     
     def _get_random_query(self) -> str:
@@ -59,13 +118,48 @@ class DecoyService:
             return "random topic"
         return RandomnessGenerator.get_random_element(queries)
     
-    def _interact_with_page(self):
-        """Perform deep, natural interactions on current page"""
+    def _run_steps(self, agent, steps):
+        """Drive a step generator against a synchronous agent
+
+        Step generators yield either a number of seconds to wait or a tuple
+        of (agent method name, *args); the method's return value is sent
+        back into the generator.
+        """
+        result = None
+        while True:
+            try:
+                step = steps.send(result)
+            except StopIteration:
+                return
+            if isinstance(step, tuple):
+                method, *args = step
+                result = getattr(agent, method)(*args)
+            else:
+                self.clock.sleep(step, self.cancel_token)
+                result = None
+
+    async def _run_steps_async(self, agent, steps):
+        """Drive a step generator against an asyncio agent"""
+        result = None
+        while True:
+            try:
+                step = steps.send(result)
+            except StopIteration:
+                return
+            if isinstance(step, tuple):
+                method, *args = step
+                result = await getattr(agent, method)(*args)
+            else:
+                await self.clock.sleep_async(step, self.cancel_token)
+                result = None
+
+    def _interact_steps(self):
+        """Steps for deep, natural interactions on current page"""
         config = self.settings.get('clicking', {})
 
         # Handle popups first (cookie banners, etc.)
-        self.agent.handle_popups()
-        time.sleep(random.uniform(0.5, 1.0))
+        yield ('handle_popups',)
+        yield random.uniform(0.5, 1.0)
 
         # Choose interaction style: deep reading vs quick browsing
         interaction_style = random.choice(['deep_read', 'quick_browse', 'media_focus'])
@@ -74,26 +168,26 @@ class DecoyService:
             # Natural scrolling as if reading an article
             self.logger.debug("Deep reading interaction")
             if config.get('enable_scrolling', True):
-                self.agent.natural_scroll()
+                yield ('natural_scroll',)
 
             # Occasional clicks while reading
             num_clicks = random.randint(1, 2)
             for _ in range(num_clicks):
-                if self.agent.random_click():
+                if (yield ('random_click',)):
                     self.tracker.record_click()
-                time.sleep(random.uniform(1.5, 3.0))
+                yield random.uniform(1.5, 3.0)
 
         elif interaction_style == 'media_focus':
             # Focus on images and videos
             self.logger.debug("Media-focused interaction")
-            self.agent.interact_with_media()
+            yield ('interact_with_media',)
 
             # Some scrolling to find more media
             if config.get('enable_scrolling', True):
                 scroll_amount = random.randint(300, 600)
-                self.agent.scroll_page(scroll_amount)
-                time.sleep(random.uniform(1.0, 2.0))
-                self.agent.interact_with_media()
+                yield ('scroll_page', scroll_amount)
+                yield random.uniform(1.0, 2.0)
+                yield ('interact_with_media',)
 
         else:  # quick_browse
             # Quick scanning with multiple clicks
@@ -103,29 +197,58 @@ class DecoyService:
             num_clicks = random.randint(clicks_min, clicks_max)
 
             for _ in range(num_clicks):
-                if self.agent.random_click():
+                if (yield ('random_click',)):
                     self.tracker.record_click()
 
-                delay = RandomnessGenerator.get_random_delay(2, 5)
-                time.sleep(delay)
+                yield RandomnessGenerator.get_random_delay(2, 5)
 
             # Basic scrolling
             if config.get('enable_scrolling', True):
                 scroll_amount = random.randint(300, 1000)
-                self.agent.scroll_page(scroll_amount)
-                time.sleep(1)
-    
-    def _visit_and_interact(self):
-        """Visit a website and interact with it naturally"""
-        website = self._get_random_website()
+                yield ('scroll_page', scroll_amount)
+                yield 1
+
+    def _bandwidth_budget(self) -> int:
+        """Hourly byte budget (bandwidth.max_mb_per_hour), 0 when unlimited"""
+        max_mb = self.settings.get('bandwidth', {}).get('max_mb_per_hour', 0) or 0
+        return int(max_mb * 1024 * 1024)
+
+    def _bandwidth_pressure(self) -> float:
+        """Share of the hourly byte budget used over the last hour"""
+        budget = self._bandwidth_budget()
+        if not budget:
+            return 0.0
+        return self.tracker.get_bytes_last_hour() / budget
+
+    def _transfer_steps(self, url: str):
+        """Steps to collect the bytes the agent moved for url"""
+        transferred = yield ('consume_transferred_bytes',)
+        if transferred:
+            self.tracker.record_transfer(url, transferred)
+
+    def _harvest_steps(self, url: str):
+        """Steps to store the current page's same-site links in the link cache"""
+        if self.link_cache.enabled:
+            self.link_cache.add(url, (yield ('harvest_links',)))
+
+    def _visit_steps(self, prefer_light: bool = False):
+        """Steps to visit a website and interact with it naturally"""
+        website = self._get_random_website(prefer_light)
+        cache_config = self.settings.get('link_cache', {})
 
-        self.logger.info(f"Visiting: {website}")
+        # Start on a page found on an earlier visit rather than the homepage
+        page = website
+        if random.random() < cache_config.get('deep_link_chance', 0.5):
+            page = self.link_cache.pick(website) or website
 
-        if self.agent.visit_url(website):
-            self.tracker.record_website_visit(website)
+        self.logger.info(f"Visiting: {page}")
+
+        if (yield ('visit_url', page)):
+            self.tracker.record_website_visit(page)
+            yield from self._harvest_steps(page)
 
             # Initial page load pause (human-like)
-            time.sleep(random.uniform(1.5, 3.0))
+            yield random.uniform(1.5, 3.0)
 
             # Random dwell time - longer for "interesting" pages
             activity_config = self.settings.get('activity', {})
@@ -140,99 +263,555 @@ class DecoyService:
             dwell_time = RandomnessGenerator.get_random_delay(dwell_min, dwell_max)
 
             # Deep interaction with the page
-            self._interact_with_page()
+            yield from self._interact_steps()
+
+            # Wander on to a few more pages of the same site
+            visited = [page]
+            for _ in range(random.randint(0, cache_config.get('extra_pages_max', 2))):
+                link = self.link_cache.pick(website, exclude=visited)
+                if link is None:
+                    break
+                yield RandomnessGenerator.get_random_delay(2, 5)
+                if not (yield ('visit_url', link)):
+                    self.link_cache.discard(link)
+                    break
+                visited.append(link)
+                self.tracker.record_website_visit(link)
+                yield from self._harvest_steps(link)
+                yield from self._interact_steps()
 
             # Remaining dwell time for final "reading"
             remaining_time = dwell_time - 10  # Account for interaction time
             if remaining_time > 0:
-                time.sleep(remaining_time)
-    
-    def _perform_search(self):
-        """Perform a random search on a search engine"""
-        search_engines = [
-            "https://www.google.com",
-            "https://www.bing.com",
-            "https://duckduckgo.com",
-        ]
-        
-        engine = random.choice(search_engines)
+                yield remaining_time
+            yield from self._transfer_steps(website)
+            return True
+
+        if page != website:
+            self.link_cache.discard(page)
+        self.tracker.record_visit_failure(page)
+        yield from self._transfer_steps(website)
+        return False
+
+    def _search_steps(self):
+        """Steps to perform a random search on a search engine
+
+        Most searches load the results page directly; search.realistic_ratio
+        of them load the homepage and type into its search form instead.
+        """
+        name = self.search_engines.pick()
         query = self._get_random_query()
-        
-        self.logger.info(f"Searching: '{query}' on {engine}")
-        
-        if self.agent.visit_url(engine):
-            if self.agent.fill_search_form(query):
-                self.tracker.record_search(query)
-                
-                # Dwell on search results
-                dwell_time = RandomnessGenerator.get_random_delay(10, 20)
-                self._interact_with_page()
-                time.sleep(dwell_time - 5)
+        engine = self.search_engines.home_url(name)
+
+        if random.random() < self.settings.get('search', {}).get('realistic_ratio', 0.2):
+            self.logger.info(f"Searching: '{query}' on {engine} (search form)")
+            if not (yield ('visit_url', engine)):
+                self.tracker.record_visit_failure(engine)
+                yield from self._transfer_steps(engine)
+                return False
+            searched = yield ('fill_search_form', query)
+        else:
+            results_url = self.search_engines.results_url(name, query)
+            self.logger.info(f"Searching: '{query}' on {engine}")
+            searched = yield ('visit_url', results_url)
+            if not searched:
+                self.tracker.record_visit_failure(results_url)
+
+        if searched:
+            self.tracker.record_search(query)
+            
+            # Dwell on search results
+            dwell_time = RandomnessGenerator.get_random_delay(10, 20)
+            yield from self._interact_steps()
+            yield dwell_time - 5
+            yield from self._transfer_steps(engine)
+            return True
+        yield from self._transfer_steps(engine)
+        return False
+
+    def _recovery_steps(self, prefix: str = "", recovery: Dict[str, Any] = None):
+        """Steps to relaunch a dead browser in place, backing off between attempts
+
+        recovery is the agent's shared restart state ('generation' counts
+        relaunches, 'recovering' is set while one is under way).
+        """
+        service_config = self.settings.get('service', {})
+        backoff = service_config.get('browser_restart_backoff', 5)
+        max_backoff = service_config.get('browser_restart_backoff_max', 300)
+        if recovery is None:
+            recovery = {'generation': 0, 'recovering': False}
+
+        self.logger.warning(f"{prefix}Browser is not responding; relaunching")
+        detected = self.clock.now()
+        attempts = 0
+        recovery['recovering'] = True
+        try:
+            while self.running:
+                attempts += 1
+                started = time.perf_counter()
+                recovered = yield ('restart_browser',)
+                self.metrics.record('service.recovery', time.perf_counter() - started, success=bool(recovered))
+                if recovered:
+                    recovery['generation'] += 1
+                    self.tracker.record_recovery((self.clock.now() - detected).total_seconds(), attempts)
+                    return True
+
+                delay = min(backoff * (2 ** (attempts - 1)), max_backoff)
+                self.logger.warning(f"{prefix}Browser relaunch attempt {attempts} failed; "
+                                    f"retrying in {delay:.0f}s")
+                yield delay
+            return False
+        finally:
+            recovery['recovering'] = False
+
+    def _shared_recovery_steps(self, generation: int, recovery: Dict[str, Any], prefix: str = ""):
+        """Steps to recover after a failed action, relaunching at most once per crash
+
+        Tabs share one browser: a tab whose action failed waits for a
+        relaunch another tab has started, and only relaunches itself if the
+        browser is still dead and nobody has relaunched it since generation
+        (the restart generation seen when the action began).
+        """
+        while self.running:
+            if recovery['recovering']:
+                yield 1
+                continue
+            if recovery['generation'] != generation:
+                return True  # Already relaunched; the driver reopens this tab
+            alive = yield ('is_alive',)
+            # Another tab may have started a relaunch meanwhile
+            if recovery['recovering'] or recovery['generation'] != generation:
+                continue
+            if alive:
+                return True
+            return (yield from self._recovery_steps(prefix, recovery))
+        return False
+
+    def _recycle_steps(self, visits: int, prefix: str = "", recovery: Dict[str, Any] = None):
+        """Steps to recycle the agent's browser once it crosses the memory or visit limit
+
+        Returns whether the agent now runs on a fresh tab, context or browser.
+        """
+        recycling = self.settings.get('browser', {}).get('recycling', {})
+        max_rss = recycling.get('max_rss_mb', 0) * 1024 * 1024
+        max_visits = recycling.get('max_visits', 0)
+        if not max_rss and not max_visits:
+            return False
+
+        rss = (yield ('memory_bytes',)) or 0
+        if max_rss and rss >= max_rss:
+            reason = 'memory'
+        elif max_visits and visits >= max_visits:
+            reason = 'visits'
+        else:
+            return False
+
+        scope = recycling.get('scope', 'browser')
+        started = time.perf_counter()
+        recycled = yield ('recycle_browser', scope)
+        self.metrics.record('service.recycle', time.perf_counter() - started, success=bool(recycled))
+        if recycled:
+            self.tracker.record_recycle(scope, reason, rss, (yield ('memory_bytes',)) or 0)
+            return True
+
+        # A failed browser relaunch leaves nothing to drive
+        if not (yield ('is_alive',)):
+            return (yield from self._recovery_steps(prefix, recovery))
+        return False
+
+    def _session_steps(self, worker_id: int = None, tab: int = None, recovery: Dict[str, Any] = None):
+        """Steps for one agent's (or one tab's) visit/search loop until the session ends
+
+        Tabs of one agent pass the same recovery state, so a crash is
+        recovered by one relaunch.
+        """
+        activity_config = self.settings.get('activity', {})
+        click_interval_min = activity_config.get('click_interval_min', 2)
+        click_interval_max = activity_config.get('click_interval_max', 8)
+
+        labels = []
+        if worker_id is not None:
+            labels.append(f"agent #{worker_id + 1}")
+        if tab is not None:
+            labels.append(f"tab {tab + 1}")
+        prefix = f"[{' '.join(labels)}] " if labels else ""
+        activity_count = 0
+        visits_since_recycle = 0
+        if recovery is None:
+            recovery = {'generation': 0, 'recovering': False}
+
+        while self.running:
+            if self._session_expired():
+                self.logger.info(f"{prefix}Session duration expired")
+                break
+
+            # Hourly byte budget: wait it out when spent, go lighter near it
+            pressure = self._bandwidth_pressure()
+            if pressure >= 1:
+                wait = min(max(self.tracker.seconds_until_bytes_below(self._bandwidth_budget()), 1), 300)
+                self.logger.info(f"{prefix}Hourly bandwidth budget reached. Pausing {wait:.0f}s...")
+                yield wait
+                continue
+
+            # Random action: visit website or search
+            if random.random() > 0.3:  # 70% website visits, 30% searches
+                step, steps = 'service.visit', self._visit_steps(prefer_light=pressure >= 0.75)
+            else:
+                step, steps = 'service.search', self._search_steps()
+
+            generation = recovery['generation']
+            started = time.perf_counter()
+            succeeded = yield from steps
+            self.metrics.record(step, time.perf_counter() - started, success=bool(succeeded))
+
+            # A failure may mean the browser died; relaunch it before going on
+            if not succeeded:
+                yield from self._shared_recovery_steps(generation, recovery, prefix)
+                if recovery['generation'] != generation:
+                    visits_since_recycle = 0
+
+            activity_count += 1
+            visits_since_recycle += 1
+
+            # Keep long sessions inside their memory envelope
+            if (yield from self._recycle_steps(visits_since_recycle, prefix, recovery)):
+                visits_since_recycle = 0
+
+            # Random interval between activities
+            interval = RandomnessGenerator.get_random_delay(
+                click_interval_min,
+                click_interval_max
+            )
+            # Stretch up to 3x as the last quarter of the budget is used
+            if pressure > 0.75:
+                interval *= 1 + 2 * min((pressure - 0.75) / 0.25, 1)
+
+            self.logger.info(f"{prefix}Activity #{activity_count} complete. "
+                           f"Waiting {interval:.1f}s before next activity...")
+            yield interval
+
+    def _interact_with_page(self, agent):
+        """Perform deep, natural interactions on current page"""
+        self._run_steps(agent, self._interact_steps())
+
+    def _visit_and_interact(self, agent):
+        """Visit a website and interact with it naturally"""
+        self._run_steps(agent, self._visit_steps())
+
+    def _perform_search(self, agent):
+        """Perform a random search on a search engine"""
+        self._run_steps(agent, self._search_steps())
     
     def _session_expired(self) -> bool:
         """Check if session duration has expired"""
-        session_duration = self.settings.get('service', {}).get('session_duration', 0)
-        
-        if session_duration == 0:  # Infinite session
+        if not self.session_duration:  # Infinite session
             return False
         
-        elapsed = (datetime.now() - self.start_time).total_seconds() / 60
-        return elapsed >= session_duration
+        elapsed = (self.clock.now() - self.start_time).total_seconds() / 60
+        return elapsed >= self.session_duration
     
+    def _context_pool_enabled(self) -> bool:
+        """Whether sync Playwright agents should share a context pool"""
+        browser_config = self.settings.get('browser', {})
+        return (browser_config.get('type', 'selenium').lower() == 'playwright'
+                and browser_config.get('context_pool', {}).get('enabled', False))
+
+    def _register_agent(self, agent):
+        """Track an opened agent so status and stop_session can see it"""
+        agent.cancel_token = self.cancel_token
+        agent.clock = self.clock
+        agent.resource_policy = self.resource_policy
+        if isinstance(agent, SimulatedAgent):
+            # Simulated outcomes stay in the agent's in-memory store
+            agent.selector_knowledge.clock = self.clock
+        else:
+            agent.selector_knowledge = self.selector_knowledge
+        instrument_agent(agent, self.metrics)
+        # Thread-bound agents may only be closed from this thread
+        agent.owner_thread = threading.get_ident()
+        with self._agents_lock:
+            self.agents.append(agent)
+            if self.agent is None:
+                self.agent = agent
+
+    def _deregister_agent(self, agent) -> bool:
+        """Forget a tracked agent; False if it was already gone"""
+        with self._agents_lock:
+            if agent not in self.agents:
+                return False
+            self.agents.remove(agent)
+            if self.agent is agent:
+                self.agent = self.agents[0] if self.agents else None
+            return True
+
+    def _close_agent(self, agent):
+        """Close a tracked agent's browser once, whoever gets there first"""
+        if not self._deregister_agent(agent):
+            return
+        try:
+            agent.close_browser()
+        except Exception as e:
+            self.logger.debug(f"Error closing browser: {str(e)}")
+
+    def _agent_type(self, worker_id: int):
+        """Agent type of one worker: service.agent_types cycled, else browser.type"""
+        agent_types = self.settings.get('service', {}).get('agent_types') or []
+        if not agent_types:
+            return self.settings.get('browser', {}).get('type', 'selenium').lower()
+        return agent_types[worker_id % len(agent_types)].lower()
+
+    def _open_agent(self, worker_id: int = 0):
+        """Create a browser agent and open its browser, or return None on failure"""
+        agent_type = self._agent_type(worker_id)
+        browser_type = self.settings.get('browser', {}).get('type', 'selenium').lower()
+
+        # Warm browsers are of browser.type only
+        if self.browser_pool is not None and agent_type == browser_type:
+            agent = self.browser_pool.acquire()
+            if agent is not None:
+                self.logger.info(f"Agent #{worker_id + 1} took a warm browser from the pool")
+                self._register_agent(agent)
+                return agent
+
+        agent = create_agent(self.logger, self.settings, context_pool=self.context_pool,
+                             browser_type=agent_type)
+
+        headless = self.settings.get('browser', {}).get('headless', True)
+        if not agent.open_browser(headless=headless):
+            self.logger.error(f"Failed to open browser for agent #{worker_id + 1}")
+            return None
+
+        self._register_agent(agent)
+        return agent
+
+    def _run_activity_loop(self, agent, worker_id: int = None):
+        """Run the visit/search loop for one agent until the session ends"""
+        num_tabs = max(1, int(self.settings.get('service', {}).get('tabs_per_agent', 1)))
+        if num_tabs > 1:
+            self._run_tabs(agent, worker_id, num_tabs)
+        else:
+            self._run_steps(agent, self._session_steps(worker_id))
+
+    def _run_tabs(self, agent, worker_id: int, num_tabs: int):
+        """Interleave several tabs' visit/search loops on one agent
+
+        Every tab runs its own session step generator. A wait only
+        reschedules its tab, so the time one tab spends loading or dwelling
+        is used to act in the others; the agent switches tabs before each
+        action of a different tab than the last.
+        """
+        handles = [agent.current_tab()]
+        while len(handles) < num_tabs:
+            handle = agent.open_tab()
+            if handle is None:
+                self.logger.warning(f"Agent supports {len(handles)} tab(s); running {len(handles)}")
+                break
+            handles.append(handle)
+
+        # Offset the tabs' first visits so they sit at different stages
+        now = self.clock.now()
+        recovery = {'generation': 0, 'recovering': False}  # One relaunch per crash
+        tabs = [{'handle': handle, 'steps': self._session_steps(worker_id, tab, recovery),
+                 'wake': now + timedelta(seconds=tab * random.uniform(2, 5)), 'result': None}
+                for tab, handle in enumerate(handles)]
+        active = None
+
+        while tabs:
+            tab = min(tabs, key=lambda entry: entry['wake'])
+            delay = (tab['wake'] - self.clock.now()).total_seconds()
+            if delay > 0:
+                self.clock.sleep(delay, self.cancel_token)
+
+            try:
+                step = tab['steps'].send(tab['result'])
+            except StopIteration:
+                tabs.remove(tab)
+                continue
+
+            if not isinstance(step, tuple):
+                tab['result'] = None
+                tab['wake'] = self.clock.now() + timedelta(seconds=step)
+                continue
+
+            if tab is not active:
+                # A relaunch or recycle in another tab may have closed this one
+                if agent.switch_tab(tab['handle']):
+                    active = tab
+                else:
+                    handle = agent.open_tab()
+                    if handle is None and not agent.is_alive():
+                        # Crashed: the step fails into the shared recovery and
+                        # the tab is reopened after the relaunch
+                        active = None
+                    elif handle is None and len(tabs) > 1:
+                        # No replacement tab: retire this loop, the others go on
+                        self.logger.warning(f"Could not reopen a tab; running {len(tabs) - 1}")
+                        tab['steps'].close()
+                        tabs.remove(tab)
+                        continue
+                    else:
+                        # The last loop carries on in whatever tab is current
+                        tab['handle'] = handle if handle is not None else agent.current_tab()
+                        active = tab
+
+            method, *args = step
+            tab['result'] = getattr(agent, method)(*args)
+            if method in TAB_REPLACING_METHODS:
+                tab['handle'] = agent.current_tab()
+            tab['wake'] = self.clock.now()
+
+    def _agent_worker(self, worker_id: int, stagger_seconds: float):
+        """Worker thread body: wait for its stagger slot, open a browser and run"""
+        agent = None
+        try:
+            # Stagger browser launches so agents don't act in lockstep
+            self.clock.sleep(worker_id * stagger_seconds, self.cancel_token)
+
+            agent = self._open_agent(worker_id)
+            if agent is None:
+                return
+
+            self.logger.info(f"[agent #{worker_id + 1}] Worker started")
+            self._run_activity_loop(agent, worker_id)
+
+        except SessionCancelled:
+            self.logger.debug(f"[agent #{worker_id + 1}] Worker cancelled")
+
+        except Exception as e:
+            self.logger.error(f"[agent #{worker_id + 1}] Worker failed: {str(e)}", exc_info=True)
+
+        finally:
+            # Closed here, on the thread that opened it, unless stop_session
+            # already could
+            if agent is not None:
+                self._close_agent(agent)
+            self.clock.remove_participant()
+
+    def _run_worker_pool(self, num_agents: int):
+        """Run several independent agents at once, all feeding self.tracker"""
+        stagger_seconds = self.settings.get('service', {}).get('agent_stagger_seconds', 10)
+        self.logger.info(f"Starting worker pool with {num_agents} agents "
+                         f"(staggered {stagger_seconds}s apart)")
+
+        # Every worker waits on the clock; announce them all before any starts
+        self.clock.add_participants(num_agents)
+
+        workers = []
+        for worker_id in range(num_agents):
+            worker = threading.Thread(
+                target=self._agent_worker,
+                args=(worker_id, stagger_seconds),
+                name=f"DecoyAgent-{worker_id + 1}",
+                daemon=True
+            )
+            worker.start()
+            workers.append(worker)
+
+        # Poll so KeyboardInterrupt still reaches the main thread
+        for worker in workers:
+            while worker.is_alive():
+                worker.join(timeout=1.0)
+
+    async def _async_agent_worker(self, engine: AsyncPlaywrightEngine,
+                                  worker_id: int, stagger_seconds: float):
+        """Coroutine body for one page of the async fleet"""
+        try:
+            await self.clock.sleep_async(worker_id * stagger_seconds, self.cancel_token)
+
+            agent = AsyncPlaywrightAgent(self.logger, self.settings, engine)
+            if not await agent.open_browser():
+                self.logger.error(f"Failed to open page for agent #{worker_id + 1}")
+                return
+            self._register_agent(agent)
+
+            try:
+                await self._run_steps_async(agent, self._session_steps(worker_id))
+            finally:
+                await agent.close_browser()
+                self._deregister_agent(agent)
+
+        except SessionCancelled:
+            self.logger.debug(f"[agent #{worker_id + 1}] Worker cancelled")
+
+        except Exception as e:
+            self.logger.error(f"[agent #{worker_id + 1}] Worker failed: {str(e)}", exc_info=True)
+
+    async def _run_async_fleet(self, num_agents: int) -> bool:
+        """Run every agent as a page of one shared browser on one event loop"""
+        engine = AsyncPlaywrightEngine(self.logger, self.settings)
+
+        headless = self.settings.get('browser', {}).get('headless', True)
+        if not await engine.start(headless=headless):
+            self.logger.error("Failed to open browser")
+            return False
+
+        stagger_seconds = self.settings.get('service', {}).get('agent_stagger_seconds', 10)
+        self.logger.info(f"Starting async fleet with {num_agents} agents "
+                         f"(staggered {stagger_seconds}s apart)")
+
+        try:
+            await asyncio.gather(*(
+                self._async_agent_worker(engine, worker_id, stagger_seconds)
+                for worker_id in range(num_agents)
+            ))
+        finally:
+            await engine.stop()
+        return True
+
     def start_session(self, duration_minutes: int = 0):
         """Start a decoy activity session"""
         try:
             self.logger.info("="*60)
             self.logger.info("STARTING DECOY SERVICE SESSION")
             self.logger.info("="*60)
-            
-            # Create browser agent
-            self.agent = create_agent(self.logger, self.settings)
-            
-            # Open browser
-            headless = self.settings.get('browser', {}).get('headless', True)
-            if not self.agent.open_browser(headless=headless):
+
+            num_agents = max(1, int(self.settings.get('service', {}).get('parallel_agents', 1)))
+
+            browser_type = self.settings.get('browser', {}).get('type', 'selenium').lower()
+
+            self.running = True
+            self.cancel_token = CancellationToken()
+            self.start_time = self.clock.now()
+            # An explicit duration (e.g. from the scheduler) overrides settings
+            self.session_duration = (duration_minutes or
+                                     self.settings.get('service', {}).get('session_duration', 0))
+
+            if browser_type == 'playwright_async':
+                # The whole fleet shares one thread and one browser process
+                return asyncio.run(self._run_async_fleet(num_agents))
+
+            if num_agents > 1:
+                if self.context_pool is not None:
+                    # Sync Playwright objects can't cross threads
+                    self.logger.warning("Context pool is not shared with parallel agents; "
+                                        "each agent launches its own browser")
+                    self.context_pool = None
+                self._run_worker_pool(num_agents)
+                return True
+
+            if self.context_pool is None and self._context_pool_enabled():
+                self.context_pool = PlaywrightContextPool(self.logger, self.settings)
+                self._owns_context_pool = True
+                headless = self.settings.get('browser', {}).get('headless', True)
+                if not self.context_pool.start(headless=headless):
+                    self.logger.error("Failed to open browser")
+                    return False
+
+            # Single agent: run the loop in the calling thread
+            if self._open_agent() is None:
                 self.logger.error("Failed to open browser")
                 return False
-            
-            self.running = True
-            self.start_time = datetime.now()
-            
-            activity_config = self.settings.get('activity', {})
-            click_interval_min = activity_config.get('click_interval_min', 2)
-            click_interval_max = activity_config.get('click_interval_max', 8)
-            
-            activity_count = 0
-            
-            # Main activity loop
-            while self.running:
-                if self._session_expired():
-                    self.logger.info("Session duration expired")
-                    break
-                
-                # Random action: visit website or search
-                if random.random() > 0.3:  # 70% website visits, 30% searches
-                    self._visit_and_interact()
-                else:
-                    self._perform_search()
-                
-                activity_count += 1
-                
-                # Random interval between activities
-                interval = RandomnessGenerator.get_random_delay(
-                    click_interval_min,
-                    click_interval_max
-                )
-                
-                self.logger.info(f"Activity #{activity_count} complete. "
-                               f"Waiting {interval:.1f}s before next activity...")
-                time.sleep(interval)
-            
+
+            self._run_activity_loop(self.agent)
             return True
             
         except KeyboardInterrupt:
             self.logger.info("Session interrupted by user")
             return True
+
+        except SessionCancelled:
+            self.logger.info("Session cancelled")
+            return True
         
         except Exception as e:
             self.logger.error(f"Error during session: {str(e)}", exc_info=True)
@@ -244,10 +823,29 @@ class DecoyService:
     def stop_session(self):
         """Stop the decoy session"""
         self.running = False
+        # Wake every agent out of its current wait before closing browsers
+        self.cancel_token.cancel()
+
+        with self._agents_lock:
+            agents = list(self.agents)
 
-        if self.agent:
-            self.agent.close_browser()
+        for agent in agents:
+            # Async agents close themselves inside their own event loop, and
+            # thread-bound ones (sync Playwright) on their own thread once
+            # they see the cancellation; they stay tracked until then
+            if asyncio.iscoroutinefunction(agent.close_browser):
+                continue
+            if agent.thread_bound and agent.owner_thread != threading.get_ident():
+                continue
+            self._close_agent(agent)
 
+        if self._owns_context_pool and self.context_pool is not None:
+            if self.context_pool.is_owner_thread():
+                self.context_pool.stop()
+                self.context_pool = None
+                self._owns_context_pool = False
+
+        self.selector_knowledge.flush()
         self.tracker.print_summary()
         self.logger.info("="*60)
         self.logger.info("DECOY SERVICE SESSION ENDED")
@@ -255,11 +853,9 @@ class DecoyService:
 
     def get_status(self) -> Dict[str, Any]:
         """Get current service status and stats for API/extension"""
-        from datetime import datetime
-
         # Calculate session duration
         if self.tracker.stats.get('session_start'):
-            session_duration = (datetime.now() - self.tracker.stats['session_start']).total_seconds() / 60
+            session_duration = (self.clock.now() - self.tracker.stats['session_start']).total_seconds() / 60
         else:
             session_duration = 0
 
@@ -268,8 +864,17 @@ class DecoyService:
                 'sitesVisited': self.tracker.stats.get('websites_visited', 0),
                 'clicksMade': self.tracker.stats.get('clicks_made', 0),
                 'searchesPerformed': self.tracker.stats.get('search_queries', 0),
-                'sessionDurationMinutes': round(session_duration, 1)
-            }
+                'sessionDurationMinutes': round(session_duration, 1),
+                'activeAgents': len(self.agents)
+            },
+            'metrics': self.metrics.snapshot(),
+            'network': self.resource_policy.get_stats(),
+            'bandwidth': dict(self.tracker.get_bandwidth_stats(),
+                              budget_bytes_per_hour=self._bandwidth_budget()),
+            'recovery': self.tracker.get_recovery_stats(),
+            'recycling': self.tracker.get_recycle_stats(),
+            'link_cache': self.link_cache.get_stats(),
+            'selector_knowledge': self.selector_knowledge.get_stats()
         }
 
 
@@ -0,0 +1,379 @@
+"""
+Lightweight HTTP-only agent - decoy traffic without a browser
+Fetches pages over a pooled keep-alive session, follows parsed links and
+loads a sample of each page's subresources and tracker endpoints
+"""
+
+import logging
+import random
+from html.parser import HTMLParser
+from typing import List, Dict, Any, Optional
+from urllib.parse import urljoin, urlencode, urlparse, urldefrag
+
+from .browser_agent import BrowserAgent
+from .utils import RandomnessGenerator
+from . import page_scripts
+
+
+# Subresource tags and the resource category each one loads
+_RESOURCE_TAGS = {
+    'script': ('src', 'script'),
+    'img': ('src', 'image'),
+    'video': ('src', 'media'),
+    'audio': ('src', 'media'),
+    'source': ('src', 'media'),
+    'iframe': ('src', 'document'),
+}
+
+# Headers a desktop Chrome sends with a top-level navigation
+_NAVIGATION_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Upgrade-Insecure-Requests': '1',
+}
+
+
+class _PageParser(HTMLParser):
+    """Collect links, subresources, forms and text size from one HTML page"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.base = None
+        self.links = []
+        self.resources = []
+        self.forms = []
+        self.text_chars = 0
+        self._form = None
+        self._skip_text = 0
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {name: value or '' for name, value in attrs}
+
+        if tag == 'base' and attrs.get('href') and self.base is None:
+            self.base = attrs['href']
+        elif tag == 'a' and attrs.get('href'):
+            self.links.append(attrs['href'])
+        elif tag == 'link' and attrs.get('href'):
+            rel = attrs.get('rel', '').lower()
+            if 'stylesheet' in rel:
+                self.resources.append(('stylesheet', attrs['href']))
+            elif 'icon' in rel:
+                self.resources.append(('image', attrs['href']))
+        elif tag in _RESOURCE_TAGS:
+            attr, category = _RESOURCE_TAGS[tag]
+            if attrs.get(attr):
+                self.resources.append((category, attrs[attr]))
+        elif tag == 'form':
+            self._form = {'action': attrs.get('action', ''), 'method': attrs.get('method', 'get').lower(),
+                          'fields': {}, 'query_field': None}
+            self.forms.append(self._form)
+        elif tag == 'input' and self._form is not None and attrs.get('name'):
+            input_type = attrs.get('type', 'text').lower()
+            if input_type in ('text', 'search') and self._form['query_field'] is None:
+                self._form['query_field'] = attrs['name']
+            elif input_type == 'hidden':
+                self._form['fields'][attrs['name']] = attrs.get('value', '')
+        elif tag == 'textarea' and self._form is not None and attrs.get('name'):
+            if self._form['query_field'] is None:
+                self._form['query_field'] = attrs['name']
+
+        if tag in ('script', 'style', 'noscript'):
+            self._skip_text += 1
+
+    def handle_endtag(self, tag):
+        if tag == 'form':
+            self._form = None
+        elif tag in ('script', 'style', 'noscript') and self._skip_text:
+            self._skip_text -= 1
+
+    def handle_data(self, data):
+        if not self._skip_text:
+            self.text_chars += len(data.strip())
+
+
+class HttpAgent(BrowserAgent):
+    """Agent with the BrowserAgent interface over plain HTTP requests
+
+    A few MB of memory instead of a browser's few hundred: pages are fetched
+    with a keep-alive requests.Session, random_click follows a parsed link,
+    and each page load pulls a sample of its scripts, stylesheets and images
+    plus every tracker-looking endpoint. Nothing is rendered or executed, so
+    script-driven trackers only see the request for the script itself.
+    """
+
+    def __init__(self, logger: logging.Logger, config: Dict[str, Any]):
+        super().__init__(logger, config)
+        http_config = config.get('http_agent', {})
+        self.pool_size = http_config.get('pool_size', 10)
+        self.subresource_rate = http_config.get('subresource_rate', 0.3)
+        self.max_subresources = http_config.get('max_subresources', 12)
+        self.max_subresource_bytes = http_config.get('max_subresource_kb', 512) * 1024
+        self.session = None
+        self.current_url = None
+        self.page = None
+        self.page_height = 0
+        self.transferred_bytes = 0
+        # Saved (current_url, page, page_height) of the tabs not in use
+        self.tabs = {}
+        self.active_tab = 0
+        try:
+            import requests
+            from requests.adapters import HTTPAdapter
+            self.requests = requests
+            self.HTTPAdapter = HTTPAdapter
+        except ImportError:
+            raise ImportError("requests not installed. Run: pip install requests")
+
+    def open_browser(self, headless: bool = True):
+        """Open a pooled keep-alive HTTP session"""
+        try:
+            self.session = self.requests.Session()
+            adapter = self.HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+            self.session.headers.update({'User-Agent': self._get_user_agent()})
+            self.current_url = None
+            self.page = None
+            self.tabs = {}
+            self.active_tab = 0
+            self.logger.info("HTTP session opened")
+            return True
+        except Exception as e:
+            self.logger.error(f"Failed to open HTTP session: {str(e)}")
+            return False
+
+    def _get(self, url: str, referer: Optional[str] = None, stream: bool = False, headers: Dict[str, str] = None):
+        """One GET through the session, counted as a round-trip"""
+        request_headers = dict(headers or {})
+        if referer:
+            request_headers['Referer'] = referer
+        self.round_trips += 1
+        timeout = page_scripts.readiness_options(self.config)['deadline']
+        return self.session.get(url, headers=request_headers, timeout=timeout, stream=stream)
+
+    def _load(self, url: str, referer: Optional[str] = None) -> bool:
+        """Fetch a document, parse it and load a sample of its subresources"""
+        response = self._get(url, referer, headers=_NAVIGATION_HEADERS)
+        self.transferred_bytes += int(response.headers.get('Content-Length') or len(response.content))
+        if response.status_code >= 400:
+            self.logger.warning(f"Failed to visit {url}: HTTP {response.status_code}")
+            return False
+
+        self.current_url = response.url
+        self.page = _PageParser()
+        if 'html' in response.headers.get('Content-Type', 'text/html'):
+            try:
+                self.page.feed(response.text)
+            except Exception as e:
+                self.logger.debug(f"Could not parse {url}: {str(e)}")
+        # ~80 characters per 24px line, never shorter than one screen
+        self.page_height = max(1080, self.page.text_chars // 80 * 24)
+
+        self._load_subresources()
+        return True
+
+    def _resolve(self, href: str) -> Optional[str]:
+        """Absolute http(s) URL of a link or resource on the current page"""
+        base = urljoin(self.current_url, self.page.base) if self.page.base else self.current_url
+        url = urldefrag(urljoin(base, href.strip()))[0]
+        return url if urlparse(url).scheme in ('http', 'https') else None
+
+    def _is_tracker(self, url: str) -> bool:
+        lowered = url.lower()
+        return any(pattern in lowered for pattern in self.resource_policy.pixel_patterns)
+
+    def _load_subresources(self):
+        """Load every tracker endpoint and a random sample of the rest"""
+        trackers, others = [], []
+        for category, href in self.page.resources:
+            url = self._resolve(href)
+            if not url or self.resource_policy.should_block(category, url):
+                continue
+            (trackers if self._is_tracker(url) else others).append(url)
+
+        sample = [url for url in others if random.random() < self.subresource_rate]
+        for url in trackers + sample[:self.max_subresources]:
+            self._fetch_subresource(url)
+
+    def _fetch_subresource(self, url: str):
+        """Fetch one subresource, reading at most max_subresource_kb of it"""
+        try:
+            with self._get(url, referer=self.current_url, stream=True, headers={'Accept': '*/*'}) as response:
+                received = 0
+                for chunk in response.iter_content(16384):
+                    received += len(chunk)
+                    if received >= self.max_subresource_bytes:
+                        break
+                self.transferred_bytes += received
+        except Exception as e:
+            self.logger.debug(f"Subresource {url} failed: {str(e)}")
+
+    def visit_url(self, url: str) -> bool:
+        """Fetch a page and its sampled subresources"""
+        try:
+            if not url.startswith('http'):
+                url = 'https://' + url
+            if not self._load(url):
+                return False
+            self.logger.info(f"Navigated to: {url}")
+            return True
+        except Exception as e:
+            self.logger.warning(f"Failed to visit {url}: {str(e)}")
+            return False
+
+    def harvest_links(self) -> List[str]:
+        """Same-site links of the current page, already parsed on load"""
+        if not self.page:
+            return []
+        origin = urlparse(self.current_url).netloc
+        links = []
+        for href in self.page.links:
+            url = self._resolve(href)
+            if url and url != self.current_url and urlparse(url).netloc == origin and url not in links:
+                links.append(url)
+        return links[:page_scripts.harvest_options(self.config)['limit']]
+
+    def get_clickable_elements(self, max_elements: int = 10) -> List:
+        """Links on the current page a click may follow"""
+        if not self.page:
+            return []
+        same_origin = page_scripts.click_options(self.config)['sameOriginOnly']
+        origin = urlparse(self.current_url).netloc
+        links = []
+        for href in self.page.links:
+            url = self._resolve(href)
+            if not url or url == self.current_url:
+                continue
+            if same_origin and urlparse(url).netloc != origin:
+                continue
+            links.append(url)
+        return random.sample(links, min(max_elements, len(links)))
+
+    def random_click(self) -> bool:
+        """Follow a random link from the current page"""
+        try:
+            links = self.get_clickable_elements(max_elements=1)
+            if not links:
+                return False
+            url = links[0]
+            self._sleep(random.uniform(0.3, 0.8))
+            if not self._load(url, referer=self.current_url):
+                return False
+            self.logger.debug(f"Clicked link: {url}")
+            return True
+        except Exception as e:
+            self.logger.debug(f"Click failed: {str(e)}")
+            return False
+
+    def scroll_page(self, amount: int = 500):
+        """Spend the time a scroll would take"""
+        self._sleep(random.uniform(0.3, 0.8))
+
+    def natural_scroll(self):
+        """Spend the reading timeline's pauses for the page's estimated height"""
+        timeline = RandomnessGenerator.get_reading_timeline(int(self.page_height * 0.8))
+        self._sleep(sum(pause for _, pause in timeline) / 1000)
+        return True
+
+    def hover_element(self, element):
+        """Spend the time a hover would take"""
+        self._sleep(random.uniform(0.3, 0.8))
+        return True
+
+    def get_page_height(self) -> int:
+        """Page height estimated from the amount of text"""
+        return self.page_height
+
+    def interact_with_media(self):
+        """Look at a few of the page's images, loading them if not yet sampled"""
+        if not self.page:
+            return False
+        images = [self._resolve(href) for category, href in self.page.resources if category == 'image']
+        images = [url for url in images if url and not self.resource_policy.should_block('image', url)]
+        for url in random.sample(images, min(len(images), random.randint(2, 4))):
+            self._fetch_subresource(url)
+            self._sleep(random.uniform(0.8, 2.0))
+        return True
+
+    def handle_popups(self):
+        """Nothing renders, so there is never a popup"""
+        return False
+
+    def page_url(self) -> Optional[str]:
+        """URL of the current page"""
+        return self.current_url
+
+    def fill_search_form(self, query: str) -> bool:
+        """Submit the page's search form as a plain GET request"""
+        try:
+            if not self.page:
+                return False
+            form = next((form for form in self.page.forms
+                         if form['query_field'] and form['method'] == 'get'), None)
+            if form is not None:
+                params = dict(form['fields'])
+                params[form['query_field']] = query
+                action = urljoin(self.current_url, form['action'] or self.current_url)
+            else:
+                # Most engines answer /search?q=
+                params = {'q': query}
+                action = urljoin(self.current_url, '/search')
+
+            self._sleep(random.uniform(1.0, 3.0))  # Typing the query
+            separator = '&' if urlparse(action).query else '?'
+            if not self._load(f"{action}{separator}{urlencode(params)}", referer=self.current_url):
+                return False
+            self.logger.info(f"Searched for: {query}")
+            return True
+        except Exception as e:
+            self.logger.debug(f"Search form fill failed: {str(e)}")
+            return False
+
+    def open_tab(self):
+        """Start a blank page state, keeping the current one for switch_tab"""
+        self.tabs[self.active_tab] = (self.current_url, self.page, self.page_height)
+        self.active_tab = max(self.tabs) + 1
+        self.current_url, self.page, self.page_height = None, None, 0
+        return self.active_tab
+
+    def switch_tab(self, handle) -> bool:
+        """Restore handle's page state"""
+        if handle == self.active_tab:
+            return True
+        if handle not in self.tabs:
+            return False
+        self.tabs[self.active_tab] = (self.current_url, self.page, self.page_height)
+        self.current_url, self.page, self.page_height = self.tabs.pop(handle)
+        self.active_tab = handle
+        return True
+
+    def current_tab(self):
+        """Id of the current page state"""
+        return self.active_tab
+
+    def consume_transferred_bytes(self) -> int:
+        """Bytes received since the last call"""
+        transferred, self.transferred_bytes = self.transferred_bytes, 0
+        return transferred
+
+    def is_alive(self) -> bool:
+        """Whether the session is open"""
+        return self.session is not None
+
+    def close_browser(self):
+        """Close the HTTP session and its pooled connections"""
+        if self.session:
+            self.session.close()
+            self.session = None
+            self.logger.info("HTTP session closed")
+
+    def _get_user_agent(self) -> str:
+        """Get user agent from config or use default"""
+        if self.config.get('browser', {}).get('rotate_user_agents'):
+            return RandomnessGenerator.get_random_user_agent()
+        return "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+
+__all__ = [
+    'HttpAgent',
+]
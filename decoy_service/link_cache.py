@@ -0,0 +1,101 @@
+"""
+Per-domain link cache - same-site links harvested from visited pages so
+later visits can start on a deep page and wander within the site
+"""
+
+import random
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
+from urllib.parse import urlparse
+
+from .utils import SystemClock
+
+
+class LinkCache:
+    """Bounded LRU of same-site links per domain, each entry expiring after a TTL
+
+    Configured by the link_cache section in settings.yaml. One cache is
+    shared by every agent of a service.
+    """
+
+    def __init__(self, config: Dict[str, Any], clock=None):
+        cache_config = config.get('link_cache', {})
+        self.enabled = cache_config.get('enabled', False)
+        self.max_domains = cache_config.get('max_domains', 200)
+        self.max_links = cache_config.get('max_links_per_domain', 50)
+        self.ttl_seconds = cache_config.get('ttl_minutes', 60) * 60
+        self.clock = clock or SystemClock()
+
+        self._lock = threading.Lock()
+        # domain -> (harvested at, links), least recently used first
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def domain(url: str) -> str:
+        """Cache key of a URL: its host without a leading www."""
+        host = urlparse(url if '://' in url else f"https://{url}").netloc.lower()
+        return host[4:] if host.startswith('www.') else host
+
+    def add(self, url: str, links: List[str]):
+        """Store the links harvested from a page of url's domain"""
+        if not self.enabled or not links:
+            return
+        domain = self.domain(url)
+        links = [link for link in links if self.domain(link) == domain]
+        with self._lock:
+            if domain in self._entries:
+                # Newest links first, keeping earlier ones up to the limit
+                _, known = self._entries.pop(domain)
+                links = links + [link for link in known if link not in links]
+            self._entries[domain] = (self.clock.now(), links[:self.max_links])
+            while len(self._entries) > self.max_domains:
+                self._entries.popitem(last=False)
+
+    def get(self, url: str) -> List[str]:
+        """Fresh cached links of url's domain (empty on a miss)"""
+        if not self.enabled:
+            return []
+        domain = self.domain(url)
+        with self._lock:
+            entry = self._entries.get(domain)
+            if entry and (self.clock.now() - entry[0]).total_seconds() >= self.ttl_seconds:
+                del self._entries[domain]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return []
+            self._entries.move_to_end(domain)
+            self.hits += 1
+            return list(entry[1])
+
+    def pick(self, url: str, exclude: List[str] = ()) -> Optional[str]:
+        """A random cached link of url's domain, or None"""
+        links = [link for link in self.get(url) if link not in exclude]
+        return random.choice(links) if links else None
+
+    def discard(self, link: str):
+        """Forget a link that failed to load"""
+        domain = self.domain(link)
+        with self._lock:
+            entry = self._entries.get(domain)
+            if entry and link in entry[1]:
+                entry[1].remove(link)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Cache size and hit counts for status reporting"""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'domains': len(self._entries),
+                'links': sum(len(links) for _, links in self._entries.values()),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+__all__ = [
+    'LinkCache',
+]
@@ -0,0 +1,297 @@
+"""
+Per-action instrumentation - latency histograms and success/failure counts
+for every BrowserAgent primitive and DecoyService step
+"""
+
+import asyncio
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, List, Tuple
+
+
+class LatencyHistogram:
+    """Bucketed latency histogram (seconds) with percentile estimates
+
+    Fixed buckets keep memory constant, let histograms from several
+    processes be merged and map directly onto Prometheus histograms.
+    """
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+    def __init__(self):
+        # One extra bucket for observations above the last bound
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """Estimate the q-th percentile (0-100) by interpolating within a bucket"""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.BUCKETS[i - 1] if i > 0 else 0.0
+                upper = self.BUCKETS[i] if i < len(self.BUCKETS) else self.max
+                # Never report more than was actually observed
+                upper = min(upper, self.max)
+                lower = min(lower, upper)
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.max
+
+    def merge(self, other: 'LatencyHistogram'):
+        for i, bucket_count in enumerate(other.counts):
+            self.counts[i] += bucket_count
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+
+class ActionStats:
+    """Latency, outcome and round-trip counts for one named action"""
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.successes = 0
+        self.failures = 0
+        self.round_trips = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Raw state, mergeable across processes"""
+        return {
+            'buckets': list(self.histogram.counts),
+            'count': self.histogram.count,
+            'sum': self.histogram.total,
+            'max': self.histogram.max,
+            'successes': self.successes,
+            'failures': self.failures,
+            'round_trips': self.round_trips,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ActionStats':
+        stats = cls()
+        stats.histogram.counts = list(data['buckets'])
+        stats.histogram.count = data['count']
+        stats.histogram.total = data['sum']
+        stats.histogram.max = data.get('max', 0.0)
+        stats.successes = data['successes']
+        stats.failures = data['failures']
+        stats.round_trips = data['round_trips']
+        return stats
+
+    def merge(self, other: 'ActionStats'):
+        self.histogram.merge(other.histogram)
+        self.successes += other.successes
+        self.failures += other.failures
+        self.round_trips += other.round_trips
+
+
+class MetricsRegistry:
+    """Thread-safe collection of ActionStats keyed by action name"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.actions = {}
+
+    def record(self, name: str, seconds: float, success: bool = True, round_trips: int = 0):
+        """Record one call of an action"""
+        with self._lock:
+            stats = self.actions.get(name)
+            if stats is None:
+                stats = self.actions[name] = ActionStats()
+            stats.histogram.observe(seconds)
+            if success:
+                stats.successes += 1
+            else:
+                stats.failures += 1
+            stats.round_trips += round_trips
+
+    @contextmanager
+    def time(self, name: str):
+        """Time a block; an exception counts as a failure"""
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record(name, time.perf_counter() - started, success=False)
+            raise
+        self.record(name, time.perf_counter() - started)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Human-readable summary: counts, p50/p95/p99 and round-trips per call"""
+        with self._lock:
+            result = {}
+            for name, stats in sorted(self.actions.items()):
+                histogram = stats.histogram
+                calls = histogram.count
+                result[name] = {
+                    'count': calls,
+                    'success': stats.successes,
+                    'failure': stats.failures,
+                    'mean_ms': round(histogram.total / calls * 1000, 1) if calls else 0,
+                    'p50_ms': round(histogram.percentile(50) * 1000, 1),
+                    'p95_ms': round(histogram.percentile(95) * 1000, 1),
+                    'p99_ms': round(histogram.percentile(99) * 1000, 1),
+                    'round_trips_per_call': round(stats.round_trips / calls, 2) if calls else 0,
+                }
+            return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Raw state of every action, for merging in another process"""
+        with self._lock:
+            return {name: stats.to_dict() for name, stats in self.actions.items()}
+
+    def merge_dict(self, data: Dict[str, Any]):
+        """Add raw state produced by to_dict()"""
+        with self._lock:
+            for name, raw in data.items():
+                incoming = ActionStats.from_dict(raw)
+                if name in self.actions:
+                    self.actions[name].merge(incoming)
+                else:
+                    self.actions[name] = incoming
+
+
+class PrometheusExposition:
+    """Builds a response in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self.lines = []
+
+    @staticmethod
+    def _escape(value) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+    @classmethod
+    def _labels(cls, labels: Dict[str, Any]) -> str:
+        if not labels:
+            return ''
+        return '{' + ','.join(f'{key}="{cls._escape(value)}"' for key, value in labels.items()) + '}'
+
+    def add(self, name: str, metric_type: str, help_text: str, samples: List[Tuple[Dict[str, str], float]]):
+        """Add a counter or gauge; samples are (labels, value) pairs"""
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {metric_type}")
+        for labels, value in samples:
+            self.lines.append(f"{name}{self._labels(labels)} {value}")
+
+    def add_histograms(self, name: str, help_text: str, registry: MetricsRegistry, label: str):
+        """Add one histogram per action in a registry, labelled by action name"""
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} histogram")
+        with registry._lock:
+            actions = sorted(registry.actions.items())
+            for action, stats in actions:
+                histogram = stats.histogram
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.BUCKETS, histogram.counts):
+                    cumulative += bucket_count
+                    self.lines.append(f"{name}_bucket{self._labels({label: action, 'le': bound})} {cumulative}")
+                self.lines.append(f"{name}_bucket{self._labels({label: action, 'le': '+Inf'})} {histogram.count}")
+                self.lines.append(f"{name}_sum{self._labels({label: action})} {histogram.total}")
+                self.lines.append(f"{name}_count{self._labels({label: action})} {histogram.count}")
+
+    def render(self) -> str:
+        return '\n'.join(self.lines) + '\n'
+
+
+# BrowserAgent primitives wrapped by instrument_agent
+INSTRUMENTED_METHODS = (
+    'visit_url',
+    'get_clickable_elements',
+    'random_click',
+    'scroll_page',
+    'natural_scroll',
+    'hover_element',
+    'get_page_height',
+    'interact_with_media',
+    'handle_popups',
+    'fill_search_form',
+    'harvest_links',
+)
+
+# Primitives whose False result means "nothing to do" rather than failure
+NEUTRAL_RESULT_METHODS = ('handle_popups',)
+
+
+def _wrap(agent, method, name: str, registry: MetricsRegistry):
+    """Wrap one bound agent method so each call is recorded as agent.<name>"""
+    metric = f"agent.{name}"
+
+    def outcome(result) -> bool:
+        # Primitives signal failure by returning False
+        return result is not False or name in NEUTRAL_RESULT_METHODS
+
+    if asyncio.iscoroutinefunction(method):
+        @functools.wraps(method)
+        async def async_wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            trips = getattr(agent, 'round_trips', 0)
+            try:
+                result = await method(*args, **kwargs)
+            except Exception:
+                registry.record(metric, time.perf_counter() - started, False,
+                                getattr(agent, 'round_trips', 0) - trips)
+                raise
+            registry.record(metric, time.perf_counter() - started, outcome(result),
+                            getattr(agent, 'round_trips', 0) - trips)
+            return result
+        return async_wrapper
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        trips = getattr(agent, 'round_trips', 0)
+        try:
+            result = method(*args, **kwargs)
+        except Exception:
+            registry.record(metric, time.perf_counter() - started, False,
+                            getattr(agent, 'round_trips', 0) - trips)
+            raise
+        registry.record(metric, time.perf_counter() - started, outcome(result),
+                        getattr(agent, 'round_trips', 0) - trips)
+        return result
+    return wrapper
+
+
+def instrument_agent(agent, registry: MetricsRegistry):
+    """Record latency and outcome of every primitive an agent exposes
+
+    Wraps methods on the instance, so nested calls (random_click calling
+    get_clickable_elements) are recorded too. Safe to call more than once.
+    """
+    if getattr(agent, '_metrics_registry', None) is registry:
+        return agent
+
+    for name in INSTRUMENTED_METHODS:
+        method = getattr(agent, name, None)
+        if method is None:
+            continue
+        # Unwrap a previous registry's wrapper rather than stacking them
+        method = getattr(method, '__wrapped__', method)
+        setattr(agent, name, _wrap(agent, method, name, registry))
+
+    agent._metrics_registry = registry
+    return agent
+
+
+__all__ = [
+    'LatencyHistogram',
+    'MetricsRegistry',
+    'PrometheusExposition',
+    'instrument_agent',
+    'INSTRUMENTED_METHODS',
+]
@@ -0,0 +1,150 @@
+"""
+Resource blocking policy - drop fonts, media and images a decoy visit
+doesn't need while scripts, XHR and tracking pixels still load
+"""
+
+import logging
+import threading
+from typing import Dict, Any, List, Optional
+
+
+# Resource categories the policy may block; everything else always loads
+BLOCKABLE_CATEGORIES = ('font', 'media', 'image')
+
+# URL patterns per category for engines that block by URL (Chrome DevTools).
+# These can't spare tracking pixels (keep_patterns), so image patterns are
+# only used with block_images_by_url.
+CATEGORY_URL_PATTERNS = {
+    'font': ['*.woff*', '*.ttf*', '*.otf*', '*.eot*'],
+    'media': ['*.mp4*', '*.webm*', '*.m4s*', '*.mp3*', '*.ogg*'],
+    'image': ['*.jpg*', '*.jpeg*', '*.png*', '*.webp*', '*.avif*'],
+}
+
+# URL fragments of images that are really tracking pixels/beacons
+DEFAULT_PIXEL_PATTERNS = ['pixel', 'beacon', 'track', '1x1', 'collect', 'analytics', '/p.gif']
+
+# Typical transfer size per blocked request, used to estimate savings
+DEFAULT_ESTIMATED_KB = {'font': 30, 'media': 1000, 'image': 80}
+
+
+class ResourcePolicy:
+    """Per-category allow/block rules and blocked-request accounting
+
+    Configured by network.resource_blocking in settings.yaml. One policy is
+    shared by all agents of a service so its stats cover the whole fleet.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        blocking = config.get('network', {}).get('resource_blocking', {})
+        self.enabled = blocking.get('enabled', False)
+        rules = blocking.get('rules', {})
+        self.blocked = {category for category in BLOCKABLE_CATEGORIES
+                        if rules.get(category, 'allow') == 'block'}
+        self.pixel_patterns = [p.lower() for p in blocking.get('keep_patterns') or DEFAULT_PIXEL_PATTERNS]
+        # Engines blocking by URL (Selenium, CDP) would drop pixels too
+        self.images_by_url = blocking.get('block_images_by_url', False)
+        self.estimated_kb = dict(DEFAULT_ESTIMATED_KB)
+        self.estimated_kb.update(blocking.get('estimated_kb', {}))
+
+        self._lock = threading.Lock()
+        self.blocked_requests = {category: 0 for category in BLOCKABLE_CATEGORIES}
+        self.url_blocking = False     # Applied by an engine that blocks by URL pattern
+        self.counted_in_page = False  # Some counts inferred from failed loads in the page
+        self._warned = False
+
+    @property
+    def active(self) -> bool:
+        """Whether any category is actually blocked"""
+        return self.enabled and bool(self.blocked)
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        """Decide for one request (Playwright resource types)"""
+        if not self.active or resource_type not in self.blocked:
+            return False
+        if resource_type == 'image':
+            lowered = url.lower()
+            if any(pattern in lowered for pattern in self.pixel_patterns):
+                return False
+        return True
+
+    def _blocked_by_url(self) -> set:
+        """Categories engines that block by URL pattern may block"""
+        if self.images_by_url:
+            return self.blocked
+        return self.blocked - {'image'}
+
+    def url_patterns(self, logger: logging.Logger = None) -> List[str]:
+        """Blocked URL patterns for Network.setBlockedURLs
+
+        Marks the policy as applied by URL, so status reports what that
+        actually blocks, and warns (once) about rules it can't honour.
+        """
+        if not self.active:
+            return []
+        blocked = self._blocked_by_url()
+        with self._lock:
+            self.url_blocking = True
+            warn = blocked != self.blocked and not self._warned
+            self._warned = self._warned or warn
+        if warn and logger is not None:
+            logger.warning("Resource blocking by URL pattern leaves images loading "
+                           "(rules.image is block, but block_images_by_url is off)")
+        return [pattern for category in sorted(blocked)
+                for pattern in CATEGORY_URL_PATTERNS[category]]
+
+    def count_options(self) -> Dict[str, bool]:
+        """Options for page_scripts.COUNT_BLOCKED (URL-pattern blocking)"""
+        blocked = self._blocked_by_url()
+        return {category: category in blocked for category in BLOCKABLE_CATEGORIES}
+
+    def blocked_categories(self) -> List[str]:
+        """Categories actually blocked (fewer when an engine blocks by URL)"""
+        if not self.active:
+            return []
+        return sorted(self._blocked_by_url() if self.url_blocking else self.blocked)
+
+    def record_blocked(self, category: str, count: int = 1):
+        """Count blocked requests of one category"""
+        if count <= 0:
+            return
+        with self._lock:
+            self.blocked_requests[category] = self.blocked_requests.get(category, 0) + count
+
+    def record_counts(self, counts: Optional[Dict[str, int]]):
+        """Count blocked requests reported by page_scripts.COUNT_BLOCKED
+
+        The page only sees failed loads, so these counts are estimates and
+        are kept to the categories blocked by URL.
+        """
+        blocked = self._blocked_by_url()
+        counts = {category: count for category, count in (counts or {}).items()
+                  if category in blocked and count > 0}
+        if counts:
+            self.counted_in_page = True
+        for category, count in counts.items():
+            self.record_blocked(category, count)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Blocked requests per category and estimated bytes saved
+
+        blocked_requests is 'estimated' once a URL-blocking engine inferred
+        counts from failed loads; estimated_bytes_saved is always an
+        estimate (count x estimated_kb per category).
+        """
+        with self._lock:
+            blocked = dict(self.blocked_requests)
+            counted_in_page = self.counted_in_page
+        return {
+            'enabled': self.active,
+            'blocked_categories': self.blocked_categories(),
+            'blocked_requests': blocked,
+            'blocked_requests_accuracy': 'estimated' if counted_in_page else 'exact',
+            'estimated_bytes_saved': sum(count * self.estimated_kb.get(category, 0) * 1024
+                                         for category, count in blocked.items()),
+        }
+
+
+__all__ = [
+    'ResourcePolicy',
+    'BLOCKABLE_CATEGORIES',
+]
@@ -0,0 +1,427 @@
+"""
+JavaScript run inside the page by the browser agents
+Each script is a function expression taking one options object, so the same
+source works with Playwright's evaluate() and Selenium's execute_script()
+"""
+
+import random
+from typing import Dict, Any, Optional
+
+from .selector_knowledge import prefer
+
+
+# Pick one click target in the page: visible, inside the viewport and (for
+# links) same-origin. Only the chosen element crosses back to Python.
+SAMPLE_CLICK_TARGET = """
+(options) => {
+    const selector = 'a[href], button, [onclick], input[type="button"], [role="button"]';
+    const width = window.innerWidth;
+    const height = window.innerHeight;
+    const candidates = [];
+
+    for (const el of document.querySelectorAll(selector)) {
+        if (el.disabled) continue;
+
+        if (el.tagName === 'A') {
+            // New tabs and non-http links would leave the agent stranded
+            if (el.target === '_blank') continue;
+            if (!/^https?:$/.test(el.protocol)) continue;
+            if (options.sameOriginOnly && el.origin !== location.origin) continue;
+        }
+
+        const rect = el.getBoundingClientRect();
+        if (rect.width < 1 || rect.height < 1) continue;
+        if (rect.bottom <= 0 || rect.right <= 0 || rect.top >= height || rect.left >= width) continue;
+
+        const style = getComputedStyle(el);
+        if (style.visibility === 'hidden' || style.pointerEvents === 'none' || Number(style.opacity) === 0) continue;
+
+        candidates.push(el);
+    }
+
+    if (!candidates.length) return null;
+    return candidates[Math.floor(Math.random() * candidates.length)];
+}
+"""
+
+
+# Pick a few visible, in-viewport media elements to look at. Returns
+# {video, images}; icons and tracking pixels are ignored.
+SAMPLE_MEDIA = """
+(options) => {
+    const width = window.innerWidth;
+    const height = window.innerHeight;
+    const inView = (el) => {
+        const rect = el.getBoundingClientRect();
+        if (rect.width < 50 || rect.height < 50) return false;
+        if (rect.bottom <= 0 || rect.right <= 0 || rect.top >= height || rect.left >= width) return false;
+        return getComputedStyle(el).visibility !== 'hidden';
+    };
+    const sample = (items, count) => {
+        const pool = items.slice();
+        const chosen = [];
+        while (pool.length && chosen.length < count) {
+            chosen.push(pool.splice(Math.floor(Math.random() * pool.length), 1)[0]);
+        }
+        return chosen;
+    };
+
+    let video = null;
+    if (options.video) {
+        video = sample(Array.from(document.querySelectorAll('video')).filter(inView), 1)[0] || null;
+    }
+    const images = sample(Array.from(document.querySelectorAll('img')).filter(inView), options.images);
+    return {video: video, images: images};
+}
+"""
+
+
+# Close/accept controls of cookie banners and modals, most specific first
+DEFAULT_POPUP_SELECTORS = [
+    "#onetrust-accept-btn-handler",
+    "button#L2AGLb",
+    "[data-testid*='accept' i]",
+    "[class*='cookie' i] button",
+    "[id*='cookie' i] button",
+    "[class*='consent' i] button",
+    "[id*='consent' i] button",
+    "[role='dialog'] button[aria-label*='close' i]",
+    "button[aria-label*='close' i]",
+    "button[aria-label*='dismiss' i]",
+    ".modal-close",
+    ".close",
+]
+
+# Button labels that dismiss a banner, matched case-insensitively
+DEFAULT_POPUP_TEXTS = [
+    "accept all",
+    "accept",
+    "i agree",
+    "agree",
+    "allow all",
+    "got it",
+    "ok",
+    "no thanks",
+    "close",
+]
+
+# Evaluate every popup pattern in one pass and click the best visible match.
+# Selector matches rank by list position, then button-text matches.
+DISMISS_POPUP = """
+(options) => {
+    const isVisible = (el) => {
+        const rect = el.getBoundingClientRect();
+        if (rect.width < 1 || rect.height < 1) return false;
+        const style = getComputedStyle(el);
+        return style.visibility !== 'hidden' && style.display !== 'none' && Number(style.opacity) !== 0;
+    };
+
+    let best = null;
+    let bestRank = Infinity;
+
+    options.selectors.forEach((selector, rank) => {
+        if (rank >= bestRank) return;
+        let matches;
+        try {
+            matches = document.querySelectorAll(selector);
+        } catch (e) {
+            return;  // Invalid selector in the library
+        }
+        for (const el of matches) {
+            if (isVisible(el)) {
+                best = {el: el, label: selector};
+                bestRank = rank;
+                break;
+            }
+        }
+    });
+
+    if (!best) {
+        const texts = options.texts.map((text) => text.toLowerCase());
+        const buttons = document.querySelectorAll('button, [role="button"], input[type="button"], input[type="submit"], a');
+        for (const el of buttons) {
+            const text = (el.innerText || el.value || '').trim().toLowerCase();
+            const rank = texts.indexOf(text);
+            if (rank !== -1 && options.selectors.length + rank < bestRank && isVisible(el)) {
+                best = {el: el, label: text};
+                bestRank = options.selectors.length + rank;
+            }
+        }
+    }
+
+    if (!best) return null;
+    best.el.click();
+    return best.label;
+}
+"""
+
+
+# Run a reading timeline of [scroll_px, pause_ms] steps with page timers.
+# Returns at once with the planned duration (steps past 80% of the page
+# height are dropped); progress is kept in window.__decoyScroll.
+START_SCROLL_TIMELINE = """
+(timeline) => {
+    const limit = () => document.documentElement.scrollHeight * 0.8;
+    const state = {done: false, stopped: false, depth: 0, steps: 0};
+    window.__decoyScroll = state;
+
+    // Plan against the current height so the caller knows how long to wait
+    const planned = [];
+    let position = window.scrollY;
+    for (const step of timeline) {
+        if (step[0] > 0 && position >= limit()) break;
+        planned.push(step);
+        position = Math.max(0, position + step[0]);
+    }
+
+    let index = 0;
+    const next = () => {
+        if (state.stopped || index >= planned.length) {
+            state.done = true;
+            return;
+        }
+        const [amount, pause] = planned[index++];
+        // Stop early if the page shrank below the reading limit
+        if (amount > 0 && window.scrollY >= limit()) {
+            state.done = true;
+            return;
+        }
+        window.scrollBy(0, amount);
+        state.steps += 1;
+        state.depth = Math.max(state.depth, Math.round(window.scrollY + window.innerHeight));
+        setTimeout(next, pause);
+    };
+    next();
+
+    return planned.reduce((total, step) => total + step[1], 0);
+}
+"""
+
+# Stop a running timeline and report how far it got
+FINISH_SCROLL_TIMELINE = """
+() => {
+    const state = window.__decoyScroll || {depth: 0, steps: 0, done: false};
+    state.stopped = true;
+    return {depth: state.depth, steps: state.steps, done: state.done,
+            pageHeight: document.documentElement.scrollHeight};
+}
+"""
+
+
+# Resolve once the page is usable: first contentful paint ("fcp") or no
+# resource finishing loading for quietMs ("network_quiet"), whichever
+# strategy is asked for, or at timeoutMs at the latest.
+WAIT_FOR_READY = """
+(options) => new Promise((resolve) => {
+    let observer = null;
+    let quietTimer = null;
+    let deadline = null;
+    const finish = (reason) => {
+        clearTimeout(deadline);
+        clearTimeout(quietTimer);
+        if (observer) observer.disconnect();
+        resolve(reason);
+    };
+    deadline = setTimeout(() => finish('deadline'), options.timeoutMs);
+
+    if (options.mode === 'fcp') {
+        const painted = () => performance.getEntriesByName('first-contentful-paint').length > 0;
+        if (painted()) return finish('fcp');
+        observer = new PerformanceObserver(() => { if (painted()) finish('fcp'); });
+        observer.observe({type: 'paint', buffered: true});
+    } else {
+        // Resource entries appear as requests complete; restart the quiet
+        // window on each one
+        const restart = () => {
+            clearTimeout(quietTimer);
+            quietTimer = setTimeout(() => finish('quiet'), options.quietMs);
+        };
+        observer = new PerformanceObserver(restart);
+        observer.observe({type: 'resource'});
+        restart();
+    }
+})
+"""
+
+
+# Estimate blocked requests from failed loads of the categories blocked by
+# URL pattern (Selenium never sees the requests). A load that failed for
+# another reason but matches the patterns is counted too.
+COUNT_BLOCKED = """
+(options) => {
+    const counts = {font: 0, media: 0, image: 0};
+    if (options.image) {
+        for (const img of document.images) {
+            if (img.complete && img.naturalWidth === 0 && /\\.(jpe?g|png|webp|avif)/i.test(img.currentSrc || img.src)) {
+                counts.image += 1;
+            }
+        }
+    }
+    if (options.media) {
+        for (const el of document.querySelectorAll('video, audio')) {
+            if (el.error && /\\.(mp4|webm|m4s|mp3|ogg)/i.test(el.currentSrc || el.src)) counts.media += 1;
+        }
+    }
+    if (options.font && document.fonts) {
+        document.fonts.forEach((font) => { if (font.status === 'error') counts.font += 1; });
+    }
+    return counts;
+}
+"""
+
+
+# Same-site links a reader could follow, deduplicated and without fragments,
+# files or account pages; harvested once per page load for the link cache
+HARVEST_LINKS = """
+(options) => {
+    const here = location.href.split('#')[0];
+    const seen = new Set();
+    const links = [];
+    for (const a of document.querySelectorAll('a[href]')) {
+        if (a.target === '_blank' || a.hasAttribute('download')) continue;
+        if (!/^https?:$/.test(a.protocol) || a.origin !== location.origin) continue;
+        if (/\\.(pdf|zip|jpe?g|png|gif|mp3|mp4)$/i.test(a.pathname)) continue;
+        if (/(log-?in|log-?out|sign-?in|sign-?up|register|account|cart|checkout)/i.test(a.pathname)) continue;
+        const url = a.href.split('#')[0];
+        if (url === here || seen.has(url)) continue;
+        seen.add(url);
+        links.push(url);
+        if (links.length >= options.limit) break;
+    }
+    return links;
+}
+"""
+
+
+# Viewport center of an element, for agents that click and hover with real
+# input events instead of element handles
+ELEMENT_POINT = """
+(el) => {
+    const rect = el.getBoundingClientRect();
+    return {x: rect.left + rect.width / 2, y: rect.top + rect.height / 2};
+}
+"""
+
+# Search box selectors, most specific first
+DEFAULT_SEARCH_SELECTORS = [
+    "input[name='q']",
+    "input[type='search']",
+    "input[placeholder*='search' i]",
+]
+
+# Focus and clear the first search box matching any of options.selectors.
+# Returns the selector that matched, or null.
+FOCUS_SEARCH_INPUT = """
+(options) => {
+    for (const selector of options.selectors) {
+        const el = document.querySelector(selector);
+        if (el) {
+            el.focus();
+            el.select();
+            return selector;
+        }
+    }
+    return null;
+}
+"""
+
+
+def for_selenium(script: str) -> str:
+    """Wrap a page script so execute_script() calls it with its arguments"""
+    return f"return ({script.strip()}).apply(null, arguments);"
+
+
+def with_points(script: str) -> str:
+    """Wrap a sampling script so its elements come back as viewport points
+
+    Works for SAMPLE_CLICK_TARGET (one element or null) and SAMPLE_MEDIA
+    ({video, images}).
+    """
+    return (f"(options) => {{ const point = ({ELEMENT_POINT.strip()});"
+            f" const found = ({script.strip()})(options);"
+            " if (!found) return null;"
+            " if (found.nodeType) return point(found);"
+            " return {video: found.video ? point(found.video) : null, images: found.images.map(point)}; }")
+
+
+def for_selenium_async(script: str) -> str:
+    """Wrap a promise-returning page script for execute_async_script()"""
+    return ("const done = arguments[arguments.length - 1];"
+            f"Promise.resolve(({script.strip()}).apply(null, Array.prototype.slice.call(arguments, 0, -1)))"
+            ".then(done, () => done(null));")
+
+
+def readiness_options(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Page readiness strategy and per-visit deadline (browser.page_readiness)"""
+    readiness = config.get('browser', {}).get('page_readiness', {})
+    return {
+        'strategy': readiness.get('strategy', 'domcontentloaded'),
+        'deadline': float(readiness.get('deadline_seconds', 8)),
+        'quietMs': int(readiness.get('quiet_ms', 500)),
+    }
+
+
+def click_options(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Options for SAMPLE_CLICK_TARGET from the clicking settings"""
+    clicking = config.get('clicking', {})
+    return {'sameOriginOnly': clicking.get('same_origin_only', False)}
+
+
+def media_options() -> Dict[str, Any]:
+    """Options for SAMPLE_MEDIA: sometimes watch a video, look at 2-4 images"""
+    return {'video': random.random() < 0.3, 'images': random.randint(2, 4)}
+
+
+def popup_options(config: Dict[str, Any], preferred: Optional[str] = None) -> Dict[str, Any]:
+    """Options for DISMISS_POPUP from the popups settings
+
+    preferred is a selector or button text known to work on the site; it
+    is tried before the others of its list.
+    """
+    popups = config.get('popups', {})
+    return {
+        'selectors': prefer(popups.get('selectors') or DEFAULT_POPUP_SELECTORS, preferred),
+        'texts': prefer(popups.get('button_texts') or DEFAULT_POPUP_TEXTS, preferred),
+    }
+
+
+def harvest_options(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Options for HARVEST_LINKS from the link_cache settings"""
+    return {'limit': config.get('link_cache', {}).get('max_links_per_domain', 50)}
+
+
+def in_page_scroll(config: Dict[str, Any]) -> bool:
+    """Whether natural_scroll runs as one in-page timeline (clicking.scroll_mode)"""
+    return config.get('clicking', {}).get('scroll_mode', 'steps') == 'page'
+
+
+def in_page_sampling(config: Dict[str, Any]) -> bool:
+    """Whether click and media targets are chosen inside the page (clicking.sampling)"""
+    return config.get('clicking', {}).get('sampling', 'legacy') == 'page'
+
+
+__all__ = [
+    'SAMPLE_CLICK_TARGET',
+    'SAMPLE_MEDIA',
+    'DISMISS_POPUP',
+    'DEFAULT_POPUP_SELECTORS',
+    'DEFAULT_POPUP_TEXTS',
+    'START_SCROLL_TIMELINE',
+    'FINISH_SCROLL_TIMELINE',
+    'WAIT_FOR_READY',
+    'COUNT_BLOCKED',
+    'HARVEST_LINKS',
+    'ELEMENT_POINT',
+    'DEFAULT_SEARCH_SELECTORS',
+    'FOCUS_SEARCH_INPUT',
+    'for_selenium',
+    'with_points',
+    'for_selenium_async',
+    'readiness_options',
+    'click_options',
+    'media_options',
+    'popup_options',
+    'harvest_options',
+    'in_page_scroll',
+    'in_page_sampling',
+]
@@ -7,19 +7,32 @@ import logging
 import schedule
 import time
 import threading
+from datetime import datetime, timedelta
 from typing import Dict, Any
 from .decoy_service import DecoyService
+from .browser_pool import PlaywrightContextPool
 
 
 class DecoyScheduler:
     """Schedule decoy activity at regular intervals"""
     
-    def __init__(self, config_dir: str = 'config', logger: logging.Logger = None):
+    def __init__(self, config_dir: str = 'config', logger: logging.Logger = None,
+                 browser_pool=None, clock=None):
         self.config_dir = config_dir
+        self.browser_pool = browser_pool
+        # Passed to every session; a VirtualClock makes simulate() possible
+        self.clock = clock
         self.logger = logger or logging.getLogger('DecoyScheduler')
         self.service = DecoyService(config_dir)
         self.scheduler = schedule.Scheduler()
         self.running = False
+        self._stop_event = threading.Event()
+        self.current_service = None
+        self.session_summaries = []
+        self.failed_sessions = 0
+
+        # Shared across sessions; created lazily in the scheduler thread
+        self.context_pool = None
     
     def schedule_daily(self, hour: int, minute: int, duration_minutes: int = 30):
         """Schedule decoy activity daily at specific time"""
@@ -53,17 +66,102 @@ class DecoyScheduler:
         self.logger.info(f"Scheduled decoy session every {minutes} minutes "
                         f"for {duration_minutes} minutes")
     
+    def _is_simulated(self) -> bool:
+        """Whether sessions run on a VirtualClock (and so with simulated agents)"""
+        return self.clock is not None and hasattr(self.clock, 'advance')
+
     def _run_session(self, duration_minutes: int = 0):
         """Run a decoy service session"""
         self.logger.info(f"Starting scheduled decoy session ({duration_minutes}m)")
-        
-        # Create a fresh service instance for each session
-        service = DecoyService(self.config_dir)
-        service.start_session(duration_minutes)
+
+        if self._is_simulated():
+            # Virtual time only makes sense with simulated agents, whatever
+            # browser settings.yaml names
+            service = DecoyService(self.config_dir, clock=self.clock)
+            service.settings.setdefault('browser', {})['type'] = 'simulated'
+            service.settings.setdefault('service', {})['agent_types'] = []
+        else:
+            # Create a fresh service instance for each session, reusing one
+            # browser process across sessions when the context pool is enabled
+            service = DecoyService(self.config_dir, context_pool=self._get_context_pool(),
+                                   browser_pool=self.browser_pool, clock=self.clock)
+        self.current_service = service
+        succeeded = False
+        try:
+            succeeded = service.start_session(duration_minutes)
+        finally:
+            self.current_service = None
+            summary = service.tracker.get_summary()
+            if succeeded and (summary['websites_visited'] or summary['search_queries']):
+                self.session_summaries.append(summary)
+            else:
+                self.failed_sessions += 1
+                self.logger.warning("Scheduled decoy session failed or did no activity")
+
+    def _get_context_pool(self):
+        """Start the shared context pool on first use, if enabled"""
+        if not self.service._context_pool_enabled():
+            return None
+
+        if self.context_pool is None:
+            settings = self.service.settings
+            pool = PlaywrightContextPool(self.logger, settings)
+            if not pool.start(headless=settings.get('browser', {}).get('headless', True)):
+                return None
+            self.context_pool = pool
+
+        return self.context_pool
     
+    def simulate(self, hours: float) -> Dict[str, Any]:
+        """Run the schedule for hours of virtual time and report what ran
+
+        Requires a VirtualClock. Sessions run back to back on virtual time;
+        the gap before each one is the scheduler's own idle time. Only
+        sessions that ran and did something count; failures are reported
+        separately.
+        """
+        if not self._is_simulated():
+            raise ValueError("simulate() needs a VirtualClock")
+
+        end = self.clock.now() + timedelta(hours=hours)
+        first_summary = len(self.session_summaries)
+        first_failure = self.failed_sessions
+
+        # schedule computes next_run from the real clock; keep each job's
+        # next run on virtual time instead
+        next_runs = {job: self._virtual_next_run(job) for job in self.scheduler.jobs}
+        while next_runs:
+            job = min(next_runs, key=next_runs.get)
+            if next_runs[job] >= end:
+                break
+            self.clock.advance(max(0.0, (next_runs[job] - self.clock.now()).total_seconds()))
+            job.run()
+            if job in self.scheduler.jobs:
+                next_runs[job] = self._virtual_next_run(job)
+            else:
+                del next_runs[job]  # The job cancelled itself
+
+        summaries = self.session_summaries[first_summary:]
+        totals = {}
+        for summary in summaries:
+            for key, value in summary.items():
+                totals[key] = totals.get(key, 0) + value
+
+        return {
+            'simulated_hours': hours,
+            'sessions_run': len(summaries),
+            'sessions_failed': self.failed_sessions - first_failure,
+            'totals': totals,
+        }
+
+    def _virtual_next_run(self, job) -> datetime:
+        """job.next_run, set from the real clock, as a time on the virtual clock"""
+        return self.clock.now() + (job.next_run - datetime.now())
+
     def start(self):
         """Start the scheduler in a background thread"""
         self.running = True
+        self._stop_event.clear()
         scheduler_thread = threading.Thread(target=self._run_scheduler, daemon=True)
         scheduler_thread.start()
         self.logger.info("Scheduler started")
@@ -72,11 +170,19 @@ class DecoyScheduler:
         """Run scheduler loop"""
         while self.running:
             self.scheduler.run_pending()
-            time.sleep(60)  # Check every minute
+            self._stop_event.wait(60)  # Check every minute
+
+        # The pool belongs to this thread, so it is shut down here
+        if self.context_pool is not None:
+            self.context_pool.stop()
+            self.context_pool = None
     
     def stop(self):
-        """Stop the scheduler"""
+        """Stop the scheduler and any session it is running"""
         self.running = False
+        self._stop_event.set()
+        if self.current_service is not None:
+            self.current_service.stop_session()
         self.logger.info("Scheduler stopped")
 
 
@@ -0,0 +1,90 @@
+"""
+Search engine registry - results-page URL templates so a search is one page
+load instead of homepage, search form and results
+"""
+
+import random
+from typing import Dict, Any, List
+from urllib.parse import quote, quote_plus, urlparse
+
+
+# Engines always available; websites.yaml's search_engines section may
+# override these by name or add more. {query} is replaced by the encoded query.
+DEFAULT_SEARCH_ENGINES = {
+    'google': {
+        'home': 'https://www.google.com',
+        'results': 'https://www.google.com/search?q={query}',
+    },
+    'bing': {
+        'home': 'https://www.bing.com',
+        'results': 'https://www.bing.com/search?q={query}',
+    },
+    'duckduckgo': {
+        'home': 'https://duckduckgo.com',
+        'results': 'https://duckduckgo.com/?q={query}&ia=web',
+    },
+}
+
+# How a query is encoded into a results URL
+QUERY_ENCODERS = {
+    'plus': quote_plus,                              # Spaces as '+' (form encoding)
+    'percent': lambda query: quote(query, safe=''),  # Spaces as '%20'
+}
+
+
+class SearchEngineRegistry:
+    """Known search engines and how to build their results-page URLs
+
+    Each engine has a home URL (for the search form), a results URL
+    template, a query encoding ('plus' or 'percent') and a relative weight.
+    An engine configured with enabled: false is removed.
+    """
+
+    def __init__(self, engines: Dict[str, Dict[str, Any]] = None):
+        merged = {name: dict(engine) for name, engine in DEFAULT_SEARCH_ENGINES.items()}
+        for name, engine in (engines or {}).items():
+            merged.setdefault(name, {}).update(engine or {})
+
+        self.engines = {}
+        for name, engine in merged.items():
+            if not engine.get('enabled', True):
+                continue
+            if 'results' not in engine or '{query}' not in engine['results']:
+                raise ValueError(f"Search engine {name!r} needs a results URL with {{query}}")
+            if engine.get('encoding', 'plus') not in QUERY_ENCODERS:
+                raise ValueError(f"Search engine {name!r} has unknown encoding {engine['encoding']!r}; "
+                                 f"use one of: {', '.join(QUERY_ENCODERS)}")
+            self.engines[name] = engine
+
+    def names(self) -> List[str]:
+        """Names of the enabled engines"""
+        return list(self.engines)
+
+    def pick(self) -> str:
+        """A random engine name, weighted by each engine's weight"""
+        names = self.names()
+        if not names:
+            raise ValueError("No search engines enabled")
+        weights = [float(self.engines[name].get('weight', 1.0)) for name in names]
+        return random.choices(names, weights=weights)[0]
+
+    def home_url(self, name: str) -> str:
+        """Page with the engine's search form (defaults to the results URL's origin)"""
+        engine = self.engines[name]
+        if engine.get('home'):
+            return engine['home']
+        results = urlparse(engine['results'])
+        return f"{results.scheme}://{results.netloc}"
+
+    def results_url(self, name: str, query: str) -> str:
+        """Results page of query on the engine"""
+        engine = self.engines[name]
+        encode = QUERY_ENCODERS[engine.get('encoding', 'plus')]
+        return engine['results'].replace('{query}', encode(query))
+
+
+__all__ = [
+    'DEFAULT_SEARCH_ENGINES',
+    'QUERY_ENCODERS',
+    'SearchEngineRegistry',
+]
@@ -0,0 +1,185 @@
+"""
+Selector knowledge base - which search box and popup selectors worked on
+each site, so later visits try the known-good one first and skip probes
+for controls a site does not have
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .utils import SystemClock
+
+
+# Relative knowledge paths are anchored here, not at the working directory
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def prefer(candidates: List[str], selector: Optional[str]) -> List[str]:
+    """Candidates with a known-good selector moved to the front"""
+    if selector is None or selector not in candidates:
+        return list(candidates)
+    return [selector] + [candidate for candidate in candidates if candidate != selector]
+
+
+class SelectorKnowledge:
+    """Per-domain outcome of selector probes, persisted as compact JSON
+
+    Each domain maps a kind ('search', 'popup') to [selector, timestamp],
+    where a null selector means none of the candidates matched. A learned
+    selector is only replaced by another one that works, never by an
+    absence (a dismissed banner stays away while its cookie lasts); sites
+    where nothing ever matched are retried after absent_ttl_hours.
+
+    The file is read on first use and rewritten once flush_every outcomes
+    are pending (or flush_seconds have passed), merged with what other
+    processes have written meanwhile. A relative path is taken from the
+    package directory; with an empty path the knowledge is kept in memory
+    only.
+
+    Configured by the selector_knowledge section in settings.yaml.
+    """
+
+    def __init__(self, config: Dict[str, Any], clock=None):
+        knowledge_config = config.get('selector_knowledge', {})
+        self.enabled = knowledge_config.get('enabled', True)
+        self.path = knowledge_config.get('path', 'data/selector_knowledge.json')
+        if self.path and not os.path.isabs(self.path):
+            self.path = os.path.join(PACKAGE_DIR, self.path)
+        self.absent_ttl_seconds = knowledge_config.get('absent_ttl_hours', 24) * 3600
+        self.max_domains = knowledge_config.get('max_domains', 5000)
+        self.flush_every = knowledge_config.get('flush_every', 20)
+        self.flush_seconds = knowledge_config.get('flush_seconds', 300)
+        self.clock = clock or SystemClock()
+
+        self._lock = threading.Lock()
+        self._domains = None  # Loaded on first use
+        self._pending = {}    # (domain, kind) -> [selector, timestamp] not yet written
+        self._last_flush = 0.0
+        self.hits = 0     # Known-good selector tried first
+        self.skips = 0    # Probes skipped for a known absence
+        self.learned = 0  # Outcomes recorded
+        self.flushes = 0
+
+    @staticmethod
+    def domain(url: str) -> str:
+        """Knowledge key of a URL: its host without a leading www."""
+        host = urlparse(url if '://' in url else f"https://{url}").netloc.lower()
+        return host[4:] if host.startswith('www.') else host
+
+    def _read_file(self) -> Dict[str, Dict[str, list]]:
+        """Domains stored on disk, or an empty dict if the file is missing or unreadable"""
+        if not self.path:
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _ensure_loaded(self):
+        """Read the file once (caller holds the lock)"""
+        if self._domains is None:
+            self._domains = self._read_file()
+            self._last_flush = self.clock.now().timestamp()
+
+    def lookup(self, url: Optional[str], kind: str) -> Tuple[bool, Optional[str]]:
+        """(whether url's site has a usable outcome for kind, the selector that worked)
+
+        (True, None) means no candidate matched recently, so probing can be
+        skipped; (False, None) means nothing is known.
+        """
+        if not self.enabled or not url:
+            return False, None
+        domain = self.domain(url)
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._domains.get(domain, {}).get(kind)
+            if entry is None:
+                return False, None
+            selector, timestamp = entry
+            if selector is not None:
+                self.hits += 1
+                return True, selector
+            if self.clock.now().timestamp() - timestamp >= self.absent_ttl_seconds:
+                return False, None
+            self.skips += 1
+            return True, None
+
+    def record(self, url: Optional[str], kind: str, selector: Optional[str]):
+        """Remember the selector that worked on url's site, or None if none did"""
+        if not self.enabled or not url:
+            return
+        domain = self.domain(url)
+        now = self.clock.now().timestamp()
+        with self._lock:
+            self._ensure_loaded()
+            entry = self._domains.setdefault(domain, {}).get(kind)
+            if entry is not None and entry[0] is not None and selector in (None, entry[0]):
+                return  # Keep the working selector
+            self._domains[domain][kind] = [selector, now]
+            self._pending[(domain, kind)] = [selector, now]
+            self.learned += 1
+            due = (len(self._pending) >= self.flush_every
+                   or now - self._last_flush >= self.flush_seconds)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write pending outcomes, merged with the file's current contents"""
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            self._last_flush = self.clock.now().timestamp()
+            if not self.path:
+                return  # In-memory only
+
+            # Other worker processes share the file: keep their newer entries
+            domains = self._read_file()
+            for (domain, kind), entry in pending.items():
+                stored = domains.setdefault(domain, {}).get(kind)
+                if stored is None or (stored[1] <= entry[1]
+                                      and (entry[0] is not None or stored[0] is None)):
+                    domains[domain][kind] = entry
+
+            if len(domains) > self.max_domains:
+                newest = lambda item: max(entry[1] for entry in item[1].values())
+                domains = dict(sorted(domains.items(), key=newest)[-self.max_domains:])
+            self._domains = domains
+
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                temp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(temp_path, 'w') as f:
+                    json.dump(domains, f, separators=(',', ':'))
+                os.replace(temp_path, self.path)
+                self.flushes += 1
+            except OSError:
+                # Keep the outcomes for the next attempt
+                for key, entry in pending.items():
+                    self._pending.setdefault(key, entry)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Knowledge size and how often it saved probes, for status reporting"""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'domains': len(self._domains or {}),
+                'hits': self.hits,
+                'skips': self.skips,
+                'learned': self.learned,
+                'pending': len(self._pending),
+                'flushes': self.flushes,
+            }
+
+
+__all__ = [
+    'prefer',
+    'SelectorKnowledge',
+]
@@ -0,0 +1,366 @@
+"""
+Offline simulation - run the planner on virtual time without a browser
+Lets hours of dwell and interval logic execute in milliseconds so pacing
+and scheduler changes can be checked at scale
+"""
+
+import heapq
+import logging
+import random
+import threading
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional
+
+from .browser_agent import BrowserAgent
+from .selector_knowledge import SelectorKnowledge
+from .utils import CancellationToken, SessionCancelled
+
+
+class VirtualClock:
+    """Discrete-event clock: waits advance simulated time instead of blocking
+
+    A single thread's sleep simply moves time forward. When several threads
+    take part (parallel agents announced via add_participants), time only
+    advances once every participant is waiting, and then jumps to the
+    earliest wake-up, so interleaving matches what real time would produce.
+    """
+
+    def __init__(self, start: datetime = None):
+        self.start = start or datetime.now()
+        self.elapsed = 0.0
+        self._cond = threading.Condition()
+        self._participants = 0
+        self._waiting = 0
+        self._wake_times = []
+
+    def now(self) -> datetime:
+        """Current simulated time"""
+        return self.start + timedelta(seconds=self.elapsed)
+
+    def advance(self, seconds: float):
+        """Move time forward directly (for callers outside any session)"""
+        with self._cond:
+            self.elapsed += max(0.0, seconds)
+            self._cond.notify_all()
+
+    def add_participants(self, count: int = 1):
+        """Announce threads that will wait on this clock"""
+        with self._cond:
+            self._participants += count
+
+    def remove_participant(self):
+        """A participating thread is done; it no longer holds time back"""
+        with self._cond:
+            self._participants = max(0, self._participants - 1)
+            self._advance_if_idle()
+            self._cond.notify_all()
+
+    def _advance_if_idle(self):
+        # Jump to the next wake-up once every participant is waiting and
+        # nobody is already due to run
+        if (self._wake_times and self._waiting >= self._participants
+                and self._wake_times[0] > self.elapsed):
+            self.elapsed = self._wake_times[0]
+            self._cond.notify_all()
+
+    def sleep(self, seconds: float, token: CancellationToken = None):
+        """Wait for seconds of simulated time"""
+        seconds = max(0.0, seconds)
+        with self._cond:
+            if token is not None:
+                token.raise_if_cancelled()
+
+            if self._participants <= 1:
+                self.elapsed += seconds
+                return
+
+            wake = self.elapsed + seconds
+            heapq.heappush(self._wake_times, wake)
+            self._waiting += 1
+            if token is not None:
+                token.add_callback(self._notify)
+            try:
+                while self.elapsed < wake:
+                    if token is not None and token.cancelled:
+                        raise SessionCancelled()
+                    self._advance_if_idle()
+                    if self.elapsed < wake:
+                        self._cond.wait()
+            finally:
+                self._waiting -= 1
+                self._wake_times.remove(wake)
+                heapq.heapify(self._wake_times)
+                if token is not None:
+                    token.remove_callback(self._notify)
+                self._cond.notify_all()
+
+    async def sleep_async(self, seconds: float, token: CancellationToken = None):
+        """asyncio version of sleep(); time advances without suspending"""
+        self.sleep(seconds, token)
+
+    def _notify(self):
+        with self._cond:
+            self._cond.notify_all()
+
+
+class SimulatedAgent(BrowserAgent):
+    """BrowserAgent that performs no I/O and only spends (virtual) time
+
+    Each primitive waits for a latency drawn from simulation settings and
+    succeeds with the configured probability, so the service loop behaves as
+    it would against a real browser.
+    """
+
+    DEFAULT_LATENCY = {
+        'visit_url': (0.8, 4.0),
+        'random_click': (0.2, 1.0),
+        'fill_search_form': (1.0, 3.0),
+        'handle_popups': (0.1, 0.5),
+    }
+
+    def __init__(self, logger: logging.Logger, config: Dict[str, Any]):
+        super().__init__(logger, config)
+        sim_config = config.get('simulation', {})
+        self.visit_failure_rate = sim_config.get('visit_failure_rate', 0.05)
+        self.click_success_rate = sim_config.get('click_success_rate', 0.8)
+        self.crash_rate = sim_config.get('crash_rate', 0.0)
+        self.latency = dict(self.DEFAULT_LATENCY)
+        self.latency.update({k: tuple(v) for k, v in sim_config.get('latency', {}).items()})
+        self.action_counts = {}
+        self.page_height = 0
+        self.current_url = None
+        self.is_open = False
+        # Simulated page weight range (KB) for bandwidth accounting
+        self.page_kb = tuple(sim_config.get('page_kb', (500, 3000)))
+        self.transferred_bytes = 0
+        # Simulated browser memory: a base footprint that grows per visit
+        self.base_rss_mb = sim_config.get('base_rss_mb', 300)
+        self.rss_mb_per_visit = sim_config.get('rss_mb_per_visit', 15)
+        self.visits_since_launch = 0
+        # Open simulated tabs and the current one
+        self.tabs = {0}
+        self.active_tab = 0
+        # Made-up selector outcomes must never reach the shared knowledge
+        # file, so they stay in memory (the service keeps this store)
+        knowledge_config = dict(config.get('selector_knowledge', {}), path=None)
+        self.selector_knowledge = SelectorKnowledge({'selector_knowledge': knowledge_config})
+
+    def _act(self, action: str):
+        """Count an action and spend its simulated latency"""
+        self.action_counts[action] = self.action_counts.get(action, 0) + 1
+        low, high = self.latency.get(action, (0.05, 0.2))
+        self._sleep(random.uniform(low, high))
+
+    def open_browser(self, headless: bool = True):
+        """Pretend to open a browser"""
+        self.is_open = True
+        self.visits_since_launch = 0
+        # A relaunched browser's tabs get fresh handles
+        self.active_tab = max(self.tabs) + 1
+        self.tabs = {self.active_tab}
+        return True
+
+    def visit_url(self, url: str) -> bool:
+        """Simulate navigation, failing at visit_failure_rate and crashing at crash_rate"""
+        self._act('visit_url')
+        if not self.is_open:
+            return False
+        if random.random() < self.crash_rate:
+            self.logger.debug(f"Simulated browser crash visiting {url}")
+            self.is_open = False
+            return False
+        if random.random() < self.visit_failure_rate:
+            self.logger.debug(f"Simulated failure visiting {url}")
+            return False
+        self.page_height = random.randint(2000, 15000)
+        self.current_url = url
+        self.transferred_bytes += int(random.uniform(*self.page_kb) * 1024)
+        self.visits_since_launch += 1
+        self.logger.debug(f"Navigated to: {url}")
+        return True
+
+    def get_clickable_elements(self, max_elements: int = 10) -> List:
+        """Return placeholder elements"""
+        return list(range(random.randint(0, max_elements)))
+
+    def random_click(self) -> bool:
+        """Simulate a click, succeeding at click_success_rate"""
+        self._act('random_click')
+        if random.random() >= self.click_success_rate:
+            return False
+        self._sleep(random.uniform(1, 3))
+        return True
+
+    def scroll_page(self, amount: int = 500):
+        """Simulate a scroll"""
+        self._act('scroll_page')
+
+    def natural_scroll(self):
+        """Spend the same reading timeline as the real agents"""
+        current_position = 0
+        while current_position < self.page_height * 0.8:
+            scroll_amount = random.randint(150, 400)
+            self._act('scroll_page')
+            current_position += scroll_amount
+            self._sleep(random.uniform(1.5, 4.0) if scroll_amount > 250 else random.uniform(0.8, 2.0))
+
+            if random.random() < 0.15:
+                current_position -= random.randint(50, 150)
+                self._sleep(random.uniform(0.5, 1.5))
+
+            if random.random() < 0.2:
+                self._sleep(random.uniform(2.0, 5.0))
+        return True
+
+    def hover_element(self, element):
+        """Simulate a hover"""
+        self._act('hover_element')
+        self._sleep(random.uniform(0.3, 0.8))
+        return True
+
+    def get_page_height(self) -> int:
+        """Height of the simulated page"""
+        return self.page_height
+
+    def interact_with_media(self):
+        """Simulate watching a video and looking at a few images"""
+        if random.random() < 0.3:
+            self._act('interact_with_media')
+            self._sleep(random.uniform(2, 5))
+        for _ in range(random.randint(2, 4)):
+            self.hover_element(None)
+            self._sleep(random.uniform(0.8, 2.0))
+        return True
+
+    def handle_popups(self):
+        """Simulate popup detection"""
+        self._act('handle_popups')
+        dismissed = random.random() < 0.3
+        if dismissed:
+            self.selector_knowledge.record(self.current_url, 'popup', 'simulated')
+        return dismissed
+
+    def fill_search_form(self, query: str) -> bool:
+        """Simulate typing a query"""
+        self._act('fill_search_form')
+        if self.is_open:
+            self.selector_knowledge.record(self.current_url, 'search', 'simulated')
+        return self.is_open
+
+    def page_url(self) -> Optional[str]:
+        """URL of the last successful visit"""
+        return self.current_url
+
+    def harvest_links(self) -> List[str]:
+        """Made-up same-site article links of the current page"""
+        if not self.current_url:
+            return []
+        site = '/'.join(self.current_url.split('/')[:3])
+        return [f"{site}/article/{random.randint(1, 500)}" for _ in range(random.randint(5, 30))]
+
+    def consume_transferred_bytes(self) -> int:
+        """Simulated page weight moved since the last call"""
+        transferred, self.transferred_bytes = self.transferred_bytes, 0
+        return transferred
+
+    def memory_bytes(self) -> int:
+        """Simulated RSS: base footprint plus growth per visit since launch"""
+        if not self.is_open:
+            return 0
+        return int((self.base_rss_mb + self.rss_mb_per_visit * self.visits_since_launch) * 1024 * 1024)
+
+    def open_tab(self):
+        """Pretend to open a tab and switch to it (None if the browser is down)"""
+        self._act('open_tab')
+        if not self.is_open:
+            return None
+        self.active_tab = max(self.tabs) + 1
+        self.tabs.add(self.active_tab)
+        return self.active_tab
+
+    def switch_tab(self, handle) -> bool:
+        """Pretend to switch tabs"""
+        if not self.is_open or handle not in self.tabs:
+            return False
+        self.active_tab = handle
+        return True
+
+    def current_tab(self):
+        """Id of the current simulated tab"""
+        return self.active_tab
+
+    def recycle_browser(self, scope: str = 'browser') -> bool:
+        """Pretend to replace the tab, context or browser"""
+        self._act('recycle_browser')
+        self.visits_since_launch = 0
+        return self.is_open
+
+    def is_alive(self) -> bool:
+        """Whether the simulated browser is open"""
+        return self.is_open
+
+    def close_browser(self):
+        """Pretend to close the browser"""
+        self.is_open = False
+
+
+def pacing_report(service, hours: float) -> Dict[str, Any]:
+    """Compare a finished simulated session's throughput with its settings"""
+    summary = service.tracker.get_summary()
+    activities = summary['websites_visited'] + summary['search_queries']
+    target = service.settings.get('activity', {}).get('requests_per_hour', 0)
+
+    return {
+        'simulated_hours': hours,
+        'summary': summary,
+        'activities_per_hour': activities / hours if hours else 0,
+        'requests_per_hour_target': target,
+    }
+
+
+def simulate_session(config_dir: str = 'config', hours: float = 1.0,
+                     parallel_agents: int = None) -> Dict[str, Any]:
+    """Run one simulated session of the given length and report its pacing"""
+    from .decoy_service import DecoyService
+
+    clock = VirtualClock()
+    service = DecoyService(config_dir, clock=clock)
+    # Every agent simulated, mixed fleets included: real ones can't run on virtual time
+    service.settings.setdefault('browser', {})['type'] = 'simulated'
+    service.settings.setdefault('service', {})['agent_types'] = []
+    if parallel_agents is not None:
+        service.settings['service']['parallel_agents'] = parallel_agents
+    # Per-visit INFO logging would dominate the run time
+    service.logger.setLevel(logging.WARNING)
+
+    service.start_session(duration_minutes=hours * 60)
+    return pacing_report(service, hours)
+
+
+def main():
+    """Run a simulated session: simulation.py [config_dir] [hours] [agents]"""
+    import json
+    import os
+    import sys
+
+    config_dir = sys.argv[1] if len(sys.argv) > 1 else 'config'
+    hours = float(sys.argv[2]) if len(sys.argv) > 2 else 8.0
+    agents = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    if not os.path.isabs(config_dir):
+        config_dir = os.path.join(os.path.dirname(__file__), config_dir)
+
+    report = simulate_session(config_dir, hours, agents)
+    print(json.dumps(report, indent=2, default=str))
+
+
+__all__ = [
+    'VirtualClock',
+    'SimulatedAgent',
+    'pacing_report',
+    'simulate_session',
+]
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,396 @@
+"""
+Multi-process supervisor - shards agents across worker processes
+Each worker runs its own DecoyService; the supervisor restarts crashed
+workers and aggregates their stats for the daemon
+"""
+
+import logging
+import multiprocessing
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, List
+
+from .metrics import MetricsRegistry
+
+
+# Seconds between stats snapshots sent by each worker
+STATUS_INTERVAL = 2.0
+
+# Status sections merged across workers by WorkerSupervisor.get_stats
+MERGED_SECTIONS = ('recovery', 'recycling', 'link_cache', 'selector_knowledge')
+
+
+def _publish_status(worker_id: int, service, status_queue):
+    """Send one stats snapshot from a worker to the supervisor"""
+    status_queue.put((worker_id, {
+        'summary': service.tracker.get_summary(),
+        'activities': list(service.tracker.recent_activities),
+        'agents': len(service.agents),
+        'metrics': service.metrics.to_dict(),
+        'failures_by_domain': service.tracker.get_failures_by_domain(),
+        'bytes_by_domain': service.tracker.get_bandwidth_stats()['by_domain'],
+        'network': service.resource_policy.get_stats(),
+        'recovery': service.tracker.get_recovery_stats(),
+        'recycling': service.tracker.get_recycle_stats(),
+        'link_cache': service.link_cache.get_stats(),
+        'selector_knowledge': service.selector_knowledge.get_stats(),
+    }))
+
+
+def _worker_main(worker_id: int, config_dir: str, num_agents: int,
+                 status_queue, stop_event):
+    """Entry point of a worker process: run a service with its slice of agents"""
+    from .decoy_service import DecoyService
+
+    service = DecoyService(config_dir)
+    service_config = service.settings.setdefault('service', {})
+    total_agents = max(1, int(service_config.get('parallel_agents', 1)))
+    service_config['parallel_agents'] = num_agents
+
+    # Each worker gets its agents' share of the hourly byte budget
+    bandwidth = service.settings.setdefault('bandwidth', {})
+    if bandwidth.get('max_mb_per_hour'):
+        bandwidth['max_mb_per_hour'] = bandwidth['max_mb_per_hour'] * num_agents / total_agents
+    service.logger.info(f"Worker {worker_id} started with {num_agents} agents")
+
+    def report():
+        # Poll instead of stop_event.wait(): a process that exits while
+        # waiting on the shared condition leaves it unable to notify, and
+        # the supervisor's stop_event.set() then blocks for good
+        published = time.monotonic()
+        while not stop_event.is_set():
+            time.sleep(0.25)
+            if time.monotonic() - published >= STATUS_INTERVAL:
+                _publish_status(worker_id, service, status_queue)
+                published = time.monotonic()
+        service.stop_session()
+
+    threading.Thread(target=report, daemon=True).start()
+
+    succeeded = service.start_session()
+    _publish_status(worker_id, service, status_queue)
+
+    # A session that errored (e.g. no browser could open) or did nothing
+    # exits non-zero so the supervisor restarts it with backoff
+    summary = service.tracker.get_summary()
+    if not stop_event.is_set() and not (succeeded and (summary['websites_visited']
+                                                       or summary['search_queries'])):
+        sys.exit(1)
+
+
+class WorkerSupervisor:
+    """Run the configured agents in K worker processes
+
+    Agents are split as evenly as possible across service.worker_processes
+    workers. A worker that exits before service.session_duration is up (or
+    at all, without one) is restarted, with exponential backoff after
+    errors; none is restarted once it is up. A worker's last reported stats
+    are kept so totals survive the restart.
+    """
+
+    def __init__(self, logger: logging.Logger, config_dir: str, settings: Dict[str, Any]):
+        self.logger = logger
+        self.config_dir = config_dir
+
+        service_config = settings.get('service', {})
+        self.num_workers = max(1, int(service_config.get('worker_processes', 1)))
+        total_agents = max(1, int(service_config.get('parallel_agents', 1)))
+        self.agents_per_worker = [
+            total_agents // self.num_workers + (1 if i < total_agents % self.num_workers else 0)
+            for i in range(self.num_workers)
+        ]
+        self.restart_backoff = service_config.get('worker_restart_backoff', 5)
+        self.session_duration = service_config.get('session_duration', 0)
+        self.max_restart_backoff = 300
+
+        # Spawn rather than fork: the daemon already runs server threads
+        self._mp = multiprocessing.get_context('spawn')
+        self.status_queue = self._mp.Queue()
+        self.stop_event = self._mp.Event()
+
+        self.processes = {}
+        self.worker_status = {}
+        self.retired_totals = {}
+        self.retired_metrics = MetricsRegistry()
+        self.restarts = {}
+        self._next_restart = {}
+        self._lock = threading.Lock()
+        self._monitor_thread = None
+        self.running = False
+        self.start_time = None
+
+    def start(self):
+        """Start every worker process and the monitor thread"""
+        self.running = True
+        self.start_time = datetime.now()
+        self.stop_event.clear()
+
+        for worker_id, num_agents in enumerate(self.agents_per_worker):
+            if num_agents > 0:
+                self.restarts[worker_id] = 0
+                self._spawn(worker_id)
+
+        self._monitor_thread = threading.Thread(target=self._monitor, name="WorkerSupervisor", daemon=True)
+        self._monitor_thread.start()
+        self.logger.info(f"Supervisor started {len(self.processes)} worker processes "
+                         f"for {sum(self.agents_per_worker)} agents")
+
+    def _spawn(self, worker_id: int):
+        process = self._mp.Process(
+            target=_worker_main,
+            args=(worker_id, self.config_dir, self.agents_per_worker[worker_id],
+                  self.status_queue, self.stop_event),
+            name=f"DecoyWorker-{worker_id}",
+            daemon=True
+        )
+        process.start()
+        self.processes[worker_id] = process
+
+    def _drain_status(self):
+        while True:
+            try:
+                worker_id, status = self.status_queue.get_nowait()
+            except queue.Empty:
+                return
+            with self._lock:
+                self.worker_status[worker_id] = status
+
+    def _retire_worker_stats(self, worker_id: int):
+        """Fold a dead worker's last stats into the running totals"""
+        with self._lock:
+            status = self.worker_status.pop(worker_id, None)
+            if not status:
+                return
+            totals = self.retired_totals
+            for key, value in status['summary'].items():
+                if key != 'session_duration_minutes':
+                    totals[key] = totals.get(key, 0) + value
+            totals.setdefault('activities', []).extend(status['activities'])
+            totals['activities'] = totals['activities'][-50:]
+            self.retired_metrics.merge_dict(status.get('metrics', {}))
+            network = totals.setdefault('network', {'enabled': False, 'blocked_requests': {},
+                                                    'estimated_bytes_saved': 0})
+            self._add_network_stats(network, status.get('network'))
+            for section in MERGED_SECTIONS:
+                self._merge_stats(totals.setdefault(section, {}), status.get(section))
+            for key in ('failures_by_domain', 'bytes_by_domain'):
+                counts = totals.setdefault(key, {})
+                for domain, count in status.get(key, {}).items():
+                    counts[domain] = counts.get(domain, 0) + count
+
+    def _monitor(self):
+        while self.running:
+            self._drain_status()
+
+            for worker_id, process in list(self.processes.items()):
+                if process.is_alive() or not self.running:
+                    continue
+
+                if worker_id not in self._next_restart:
+                    self._drain_status()
+                    # A restart would start a fresh full-length session
+                    if self._session_over():
+                        if process.exitcode == 0:
+                            self.logger.info(f"Worker {worker_id} finished")
+                        else:
+                            self.logger.warning(f"Worker {worker_id} exited with code {process.exitcode} "
+                                                f"after the session ended; not restarting")
+                        del self.processes[worker_id]
+                        continue
+
+                    self._retire_worker_stats(worker_id)
+                    if process.exitcode == 0:
+                        backoff = self.restart_backoff
+                    else:
+                        backoff = min(self.restart_backoff * (2 ** self.restarts[worker_id]),
+                                      self.max_restart_backoff)
+                    self._next_restart[worker_id] = time.monotonic() + backoff
+                    self.logger.warning(f"Worker {worker_id} exited with code {process.exitcode}; "
+                                        f"restarting in {backoff:.0f}s")
+
+                if time.monotonic() >= self._next_restart[worker_id]:
+                    del self._next_restart[worker_id]
+                    self.restarts[worker_id] += 1
+                    self._spawn(worker_id)
+
+            time.sleep(1.0)
+
+    def _session_over(self) -> bool:
+        """Whether service.session_duration (minutes, 0 = unlimited) has elapsed"""
+        if not self.session_duration or not self.start_time:
+            return False
+        return (datetime.now() - self.start_time).total_seconds() >= self.session_duration * 60
+
+    def is_running(self) -> bool:
+        """Whether any worker is still alive"""
+        return self.running and any(p.is_alive() for p in list(self.processes.values()))
+
+    def get_summary(self) -> Dict[str, Any]:
+        """Aggregated stats in the same shape as ActivityTracker.get_summary"""
+        self._drain_status()
+
+        summary = {
+            'session_duration_minutes': 0,
+            'websites_visited': 0,
+            'total_clicks': 0,
+            'search_queries': 0,
+            'forms_filled': 0,
+            'visit_failures': 0,
+            'bytes_transferred': 0,
+            'browser_recoveries': 0,
+            'recovery_seconds': 0,
+            'browser_recycles': 0,
+        }
+        with self._lock:
+            sources = [status['summary'] for status in self.worker_status.values()]
+            sources.append(self.retired_totals)
+            for source in sources:
+                for key in summary:
+                    if key != 'session_duration_minutes':
+                        summary[key] += source.get(key, 0)
+
+        if self.start_time:
+            summary['session_duration_minutes'] = (datetime.now() - self.start_time).total_seconds() / 60
+        return summary
+
+    def get_recent_activities(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Most recent activities across all workers, oldest first"""
+        self._drain_status()
+
+        with self._lock:
+            activities = list(self.retired_totals.get('activities', []))
+            for status in self.worker_status.values():
+                activities.extend(status['activities'])
+
+        activities.sort(key=lambda activity: activity['timestamp'])
+        return activities[-limit:]
+
+    def _sum_by_domain(self, key: str) -> Dict[str, int]:
+        self._drain_status()
+
+        with self._lock:
+            totals = dict(self.retired_totals.get(key, {}))
+            for status in self.worker_status.values():
+                for domain, count in status.get(key, {}).items():
+                    totals[domain] = totals.get(domain, 0) + count
+        return totals
+
+    def get_failures_by_domain(self) -> Dict[str, int]:
+        """Failed navigations per domain across all workers"""
+        return self._sum_by_domain('failures_by_domain')
+
+    def get_bytes_by_domain(self) -> Dict[str, int]:
+        """Bytes transferred per domain across all workers"""
+        return self._sum_by_domain('bytes_by_domain')
+
+    @staticmethod
+    def _add_network_stats(total: Dict[str, Any], stats: Dict[str, Any]):
+        if not stats:
+            return
+        total['enabled'] = total.get('enabled', False) or stats['enabled']
+        total['blocked_categories'] = sorted(set(total.get('blocked_categories', []))
+                                             | set(stats.get('blocked_categories', [])))
+        if stats.get('blocked_requests_accuracy') == 'estimated':
+            total['blocked_requests_accuracy'] = 'estimated'
+        else:
+            total.setdefault('blocked_requests_accuracy', 'exact')
+        for category, count in stats['blocked_requests'].items():
+            total['blocked_requests'][category] = total['blocked_requests'].get(category, 0) + count
+        total['estimated_bytes_saved'] += stats['estimated_bytes_saved']
+
+    def get_network_stats(self) -> Dict[str, Any]:
+        """Resource blocking stats summed across all workers"""
+        self._drain_status()
+
+        network = {'enabled': False, 'blocked_requests': {}, 'estimated_bytes_saved': 0}
+        with self._lock:
+            self._add_network_stats(network, self.retired_totals.get('network'))
+            for status in self.worker_status.values():
+                self._add_network_stats(network, status.get('network'))
+        return network
+
+    @classmethod
+    def _merge_stats(cls, total: Dict[str, Any], stats: Dict[str, Any]):
+        """Fold one worker's stats section into total
+
+        Counts add up, flags are or-ed and 'recent' lists keep the latest
+        entries. 'domains' is the largest any worker holds rather than a
+        sum, since workers visit the same sites and share the knowledge file.
+        """
+        for key, value in (stats or {}).items():
+            if isinstance(value, bool):
+                total[key] = total.get(key, False) or value
+            elif key == 'domains':
+                total[key] = max(total.get(key, 0), value)
+            elif isinstance(value, (int, float)):
+                total[key] = total.get(key, 0) + value
+            elif isinstance(value, dict):
+                cls._merge_stats(total.setdefault(key, {}), value)
+            elif isinstance(value, list):
+                merged = total.get(key, []) + value
+                merged.sort(key=lambda entry: entry.get('timestamp', ''))
+                total[key] = merged[-20:]
+
+    def get_stats(self, section: str) -> Dict[str, Any]:
+        """One of MERGED_SECTIONS summed across all workers, including restarted ones"""
+        self._drain_status()
+
+        merged = {}
+        with self._lock:
+            self._merge_stats(merged, self.retired_totals.get(section))
+            for status in self.worker_status.values():
+                self._merge_stats(merged, status.get(section))
+        return merged
+
+    def get_metrics(self) -> MetricsRegistry:
+        """Action metrics merged across all workers, including restarted ones"""
+        self._drain_status()
+
+        merged = MetricsRegistry()
+        with self._lock:
+            merged.merge_dict(self.retired_metrics.to_dict())
+            for status in self.worker_status.values():
+                merged.merge_dict(status.get('metrics', {}))
+        return merged
+
+    def get_worker_info(self) -> List[Dict[str, Any]]:
+        """Per-worker process state for status reporting"""
+        with self._lock:
+            return [{
+                'worker': worker_id,
+                'pid': process.pid,
+                'alive': process.is_alive(),
+                'agents': self.worker_status.get(worker_id, {}).get('agents', 0),
+                'restarts': self.restarts.get(worker_id, 0),
+            } for worker_id, process in sorted(list(self.processes.items()))]
+
+    def stop(self, timeout: float = 10.0):
+        """Ask every worker to stop, then terminate any that don't"""
+        self.running = False
+        self.stop_event.set()
+
+        # Keep draining while waiting: a worker can't exit until the queue's
+        # feeder thread has handed over its last status
+        deadline = time.monotonic() + timeout
+        processes = dict(self.processes)
+        while time.monotonic() < deadline and any(p.is_alive() for p in processes.values()):
+            self._drain_status()
+            time.sleep(0.1)
+
+        for worker_id, process in processes.items():
+            if process.is_alive():
+                self.logger.warning(f"Terminating unresponsive worker {worker_id}")
+                process.terminate()
+                process.join(timeout=1.0)
+
+        self._drain_status()
+        self.logger.info("Supervisor stopped")
+
+
+__all__ = [
+    'MERGED_SECTIONS',
+    'WorkerSupervisor',
+]
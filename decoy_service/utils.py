@@ -3,14 +3,19 @@ Decoy Service - Privacy Protection through Behavioral Obfuscation
 Generates random browsing activity to confuse advertising profilers
 """
 
+import asyncio
 import logging
 import random
 import time
+import threading
+from collections import deque
+from contextlib import contextmanager
 from datetime import datetime
 from typing import List, Dict, Any
 import yaml
 import os
 from pathlib import Path
+from urllib.parse import urlparse
 
 
 class Logger:
@@ -57,6 +62,7 @@ class ConfigManager:
         self.config_dir = config_dir
         self.settings = {}
         self.websites = {}
+        self.search_engines = {}
     
     def load_settings(self) -> Dict[str, Any]:
         """Load settings.yaml"""
@@ -80,6 +86,7 @@ class ConfigManager:
         with open(websites_file, 'r') as f:
             data = yaml.safe_load(f)
             self.websites = data.get('categories', {})
+            self.search_engines = data.get('search_engines') or {}
         
         return self.websites
     
@@ -100,40 +107,209 @@ class ConfigManager:
 class ActivityTracker:
     """Track and log decoy activities"""
     
-    def __init__(self, logger: logging.Logger):
+    def __init__(self, logger: logging.Logger, clock: 'SystemClock' = None):
         self.logger = logger
+        self.clock = clock or SystemClock()
+        # Several agents may record into the same tracker concurrently
+        self._lock = threading.Lock()
         self.stats = {
             'websites_visited': 0,
             'clicks_made': 0,
             'forms_filled': 0,
             'search_queries': 0,
-            'session_start': datetime.now(),
+            'visit_failures': 0,
+            'bytes_transferred': 0,
+            'browser_recoveries': 0,
+            'recovery_seconds': 0.0,
+            'browser_recycles': 0,
+            'session_start': self.clock.now(),
             'total_time_seconds': 0,
         }
+        # Most recent visits/searches, newest last
+        self.recent_activities = deque(maxlen=50)
+        # Failed navigations keyed by domain
+        self.failures_by_domain = {}
+        # Bytes transferred per domain, per clock hour and over the last
+        # hour (timestamped entries for the rolling budget window)
+        self.bytes_by_domain = {}
+        self.transfers_by_domain = {}
+        self.bytes_by_hour = {}
+        self._recent_transfers = deque()
+        # Browsers relaunched after dying mid-session, newest last
+        self.recent_recoveries = deque(maxlen=20)
+        # Tabs/contexts/browsers replaced to release memory, newest last
+        self.recycles_by_scope = {}
+        self.recent_recycles = deque(maxlen=20)
+    
+    def _record_activity(self, activity_type: str, detail: str):
+        """Remember an activity for the activity log"""
+        self.recent_activities.append({
+            'timestamp': self.clock.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'type': activity_type,
+            'detail': detail,
+        })
     
     def record_website_visit(self, url: str):
         """Record a website visit"""
-        self.stats['websites_visited'] += 1
+        with self._lock:
+            self.stats['websites_visited'] += 1
+            self._record_activity('visit', url)
         self.logger.info(f"Visited: {url}")
     
+    def record_visit_failure(self, url: str):
+        """Record a navigation that failed"""
+        domain = self._domain(url)
+        with self._lock:
+            self.stats['visit_failures'] += 1
+            self.failures_by_domain[domain] = self.failures_by_domain.get(domain, 0) + 1
+        self.logger.debug(f"Visit failed: {url}")
+
+    def get_failures_by_domain(self) -> Dict[str, int]:
+        """Failed navigations per domain"""
+        with self._lock:
+            return dict(self.failures_by_domain)
+    
+    def record_recovery(self, downtime_seconds: float, attempts: int):
+        """Record a dead browser relaunched in place"""
+        with self._lock:
+            self.stats['browser_recoveries'] += 1
+            self.stats['recovery_seconds'] += downtime_seconds
+            self.recent_recoveries.append({
+                'timestamp': self.clock.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'downtime_seconds': round(downtime_seconds, 1),
+                'attempts': attempts,
+            })
+        self.logger.info(f"Browser recovered after {downtime_seconds:.1f}s ({attempts} attempts)")
+
+    def get_recovery_stats(self) -> Dict[str, Any]:
+        """Recovery count, total downtime and the latest recoveries"""
+        with self._lock:
+            return {
+                'count': self.stats['browser_recoveries'],
+                'downtime_seconds': round(self.stats['recovery_seconds'], 1),
+                'recent': list(self.recent_recoveries),
+            }
+
+    def record_recycle(self, scope: str, reason: str, rss_before: int, rss_after: int):
+        """Record a tab, context or browser replaced to release memory"""
+        with self._lock:
+            self.stats['browser_recycles'] += 1
+            self.recycles_by_scope[scope] = self.recycles_by_scope.get(scope, 0) + 1
+            self.recent_recycles.append({
+                'timestamp': self.clock.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'scope': scope,
+                'reason': reason,
+                'rss_before_mb': round(rss_before / 1024 / 1024, 1),
+                'rss_after_mb': round(rss_after / 1024 / 1024, 1),
+            })
+        self.logger.info(f"Recycled {scope} ({reason}): "
+                         f"{rss_before / 1024 / 1024:.0f} MB -> {rss_after / 1024 / 1024:.0f} MB")
+
+    def get_recycle_stats(self) -> Dict[str, Any]:
+        """Recycle counts per scope and the latest recycles"""
+        with self._lock:
+            return {
+                'count': self.stats['browser_recycles'],
+                'by_scope': dict(self.recycles_by_scope),
+                'recent': list(self.recent_recycles),
+            }
+
+    @staticmethod
+    def _domain(url: str) -> str:
+        return urlparse(url if '://' in url else f"https://{url}").netloc or url
+
+    @staticmethod
+    def bandwidth_tracking(config: Dict[str, Any]) -> bool:
+        """Whether agents collect transfer sizes from network events
+
+        bandwidth.tracking is true, false or "auto" (the default): only
+        when an hourly budget (max_mb_per_hour) needs the counts.
+        """
+        bandwidth = config.get('bandwidth', {})
+        tracking = bandwidth.get('tracking', 'auto')
+        if tracking == 'auto':
+            return bool(bandwidth.get('max_mb_per_hour'))
+        return bool(tracking)
+
+    def record_transfer(self, url: str, num_bytes: int):
+        """Record bytes moved by one visit or search"""
+        domain = self._domain(url)
+        now = self.clock.now()
+        with self._lock:
+            self.stats['bytes_transferred'] += num_bytes
+            self.bytes_by_domain[domain] = self.bytes_by_domain.get(domain, 0) + num_bytes
+            self.transfers_by_domain[domain] = self.transfers_by_domain.get(domain, 0) + 1
+            hour = now.strftime('%Y-%m-%d %H:00')
+            self.bytes_by_hour[hour] = self.bytes_by_hour.get(hour, 0) + num_bytes
+            self._recent_transfers.append((now, num_bytes))
+        self.logger.debug(f"Transferred {num_bytes / 1024:.0f} KB for {domain}")
+
+    def _prune_transfers(self, now: datetime):
+        while self._recent_transfers and (now - self._recent_transfers[0][0]).total_seconds() >= 3600:
+            self._recent_transfers.popleft()
+
+    def get_bytes_last_hour(self) -> int:
+        """Bytes transferred over the rolling last hour"""
+        now = self.clock.now()
+        with self._lock:
+            self._prune_transfers(now)
+            return sum(num_bytes for _, num_bytes in self._recent_transfers)
+
+    def seconds_until_bytes_below(self, budget: int) -> float:
+        """Seconds until the rolling hour's transfer drops below budget"""
+        now = self.clock.now()
+        with self._lock:
+            self._prune_transfers(now)
+            total = sum(num_bytes for _, num_bytes in self._recent_transfers)
+            if total < budget:
+                return 0.0
+            for timestamp, num_bytes in self._recent_transfers:
+                total -= num_bytes
+                if total < budget:
+                    # Enough has left the window once this transfer is an hour old
+                    return max(0.0, 3600 - (now - timestamp).total_seconds())
+            return 0.0
+
+    def get_average_transfer(self, url: str):
+        """Average bytes per visit to url's domain, or None if never measured"""
+        domain = self._domain(url)
+        with self._lock:
+            visits = self.transfers_by_domain.get(domain)
+            return self.bytes_by_domain[domain] / visits if visits else None
+
+    def get_bandwidth_stats(self) -> Dict[str, Any]:
+        """Bytes transferred in total, over the last hour, per domain and per hour"""
+        last_hour = self.get_bytes_last_hour()
+        with self._lock:
+            return {
+                'bytes_total': self.stats['bytes_transferred'],
+                'bytes_last_hour': last_hour,
+                'by_domain': dict(self.bytes_by_domain),
+                'by_hour': dict(self.bytes_by_hour),
+            }
+    
     def record_click(self, description: str = ""):
         """Record a click action"""
-        self.stats['clicks_made'] += 1
+        with self._lock:
+            self.stats['clicks_made'] += 1
         self.logger.debug(f"Clicked: {description}")
     
     def record_search(self, query: str):
         """Record a search query"""
-        self.stats['search_queries'] += 1
+        with self._lock:
+            self.stats['search_queries'] += 1
+            self._record_activity('search', query)
         self.logger.info(f"Searched: {query}")
     
     def record_form_fill(self):
         """Record form interaction"""
-        self.stats['forms_filled'] += 1
+        with self._lock:
+            self.stats['forms_filled'] += 1
         self.logger.debug("Form filled")
     
     def get_summary(self) -> Dict[str, Any]:
         """Get activity summary"""
-        elapsed = (datetime.now() - self.stats['session_start']).total_seconds()
+        elapsed = (self.clock.now() - self.stats['session_start']).total_seconds()
         self.stats['total_time_seconds'] = elapsed
         
         return {
@@ -142,6 +318,11 @@ class ActivityTracker:
             'total_clicks': self.stats['clicks_made'],
             'search_queries': self.stats['search_queries'],
             'forms_filled': self.stats['forms_filled'],
+            'visit_failures': self.stats['visit_failures'],
+            'bytes_transferred': self.stats['bytes_transferred'],
+            'browser_recoveries': self.stats['browser_recoveries'],
+            'recovery_seconds': self.stats['recovery_seconds'],
+            'browser_recycles': self.stats['browser_recycles'],
         }
     
     def print_summary(self):
@@ -155,6 +336,210 @@ class ActivityTracker:
         self.logger.info("="*50)
 
 
+class SessionCancelled(BaseException):
+    """Raised from a wait once its session has been cancelled
+
+    Derives from BaseException (like asyncio.CancelledError) so the broad
+    ``except Exception`` handlers around browser actions don't swallow it.
+    """
+
+
+class CancellationToken:
+    """Cooperative cancellation shared by a service and all of its agents
+
+    Every wait in a session goes through the token, so cancel() interrupts
+    dwell times immediately instead of after the current sleep.
+    """
+    
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+    
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancel() has been called"""
+        return self._event.is_set()
+    
+    def cancel(self):
+        """Cancel the session and wake every waiter"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks = self._callbacks
+            self._callbacks = []
+        for callback in callbacks:
+            callback()
+    
+    def add_callback(self, callback):
+        """Call callback() on cancellation (immediately if already cancelled)"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+    
+    def remove_callback(self, callback):
+        """Forget a callback registered with add_callback"""
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+    
+    def raise_if_cancelled(self):
+        """Raise SessionCancelled if the session was cancelled"""
+        if self._event.is_set():
+            raise SessionCancelled()
+    
+    def wait(self, seconds: float) -> bool:
+        """Wait up to seconds; return True if cancelled meanwhile"""
+        return self._event.wait(max(0.0, seconds))
+    
+    def sleep(self, seconds: float):
+        """Sleep for seconds, raising SessionCancelled if cancelled"""
+        if self.wait(seconds):
+            raise SessionCancelled()
+    
+    async def sleep_async(self, seconds: float):
+        """asyncio version of sleep() that wakes as soon as cancel() is called"""
+        self.raise_if_cancelled()
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: waiter.done() or waiter.set_result(None))
+
+        self.add_callback(wake)
+        try:
+            await asyncio.wait({waiter}, timeout=max(0.0, seconds))
+        finally:
+            self.remove_callback(wake)
+        self.raise_if_cancelled()
+
+
+class SystemClock:
+    """Wall-clock time; waits are interruptible through a CancellationToken"""
+    
+    def now(self) -> datetime:
+        """Current time"""
+        return datetime.now()
+    
+    def sleep(self, seconds: float, token: CancellationToken = None):
+        """Wait for seconds, raising SessionCancelled if token is cancelled"""
+        if token is None:
+            time.sleep(max(0.0, seconds))
+        else:
+            token.sleep(seconds)
+    
+    async def sleep_async(self, seconds: float, token: CancellationToken = None):
+        """asyncio version of sleep()"""
+        if token is None:
+            await asyncio.sleep(max(0.0, seconds))
+        else:
+            await token.sleep_async(seconds)
+    
+    def add_participants(self, count: int = 1):
+        """Announce threads that will wait on this clock (no-op in real time)"""
+    
+    def remove_participant(self):
+        """A thread announced with add_participants is done (no-op in real time)"""
+
+
+class ProcessStats:
+    """Read memory and CPU usage of a process tree from /proc (Linux only)
+
+    Every reader returns 0 / empty where /proc is unavailable.
+    """
+    
+    PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+    CLOCK_TICKS = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+    # Held by every browser launch in this process, so a launch_children()
+    # diff never picks up processes another agent started meanwhile
+    LAUNCH_LOCK = threading.Lock()
+
+    @staticmethod
+    @contextmanager
+    def launch_children():
+        """Hold LAUNCH_LOCK for the block and collect the children it started
+
+        Yields a list that is filled with the new child pids on exit.
+        """
+        with ProcessStats.LAUNCH_LOCK:
+            existing = set(ProcessStats.children(os.getpid()))
+            launched = []
+            try:
+                yield launched
+            finally:
+                launched.extend(pid for pid in ProcessStats.children(os.getpid()) if pid not in existing)
+    
+    @staticmethod
+    def _read_stat(pid: int) -> List[str]:
+        """Fields of /proc/<pid>/stat after the command name"""
+        try:
+            with open(f'/proc/{pid}/stat', 'r') as f:
+                data = f.read()
+        except OSError:
+            return []
+        # The command name may contain spaces; fields resume after ')'
+        return data[data.rfind(')') + 2:].split()
+    
+    @staticmethod
+    def children(pid: int) -> List[int]:
+        """Live direct children of pid"""
+        try:
+            pids = [int(entry) for entry in os.listdir('/proc') if entry.isdigit()]
+        except OSError:
+            return []
+        return [child for child in pids if ProcessStats._read_stat(child)[1:2] == [str(pid)]]
+
+    @staticmethod
+    def descendants(pid: int) -> List[int]:
+        """All live descendant pids of pid"""
+        children = {}
+        try:
+            pids = [int(entry) for entry in os.listdir('/proc') if entry.isdigit()]
+        except OSError:
+            return []
+        for child in pids:
+            fields = ProcessStats._read_stat(child)
+            if len(fields) > 1:
+                children.setdefault(int(fields[1]), []).append(child)
+        
+        found = []
+        pending = [pid]
+        while pending:
+            for child in children.get(pending.pop(), []):
+                found.append(child)
+                pending.append(child)
+        return found
+    
+    @staticmethod
+    def rss_bytes(pid: int) -> int:
+        """Resident set size of one process"""
+        try:
+            with open(f'/proc/{pid}/statm', 'r') as f:
+                return int(f.read().split()[1]) * ProcessStats.PAGE_SIZE
+        except (OSError, IndexError, ValueError):
+            return 0
+    
+    @staticmethod
+    def cpu_seconds(pid: int) -> float:
+        """User + system CPU time consumed by one process"""
+        fields = ProcessStats._read_stat(pid)
+        if len(fields) < 13:
+            return 0.0
+        # utime and stime are fields 14 and 15 of /proc/<pid>/stat
+        return (int(fields[11]) + int(fields[12])) / ProcessStats.CLOCK_TICKS
+    
+    @staticmethod
+    def tree_rss_bytes(pid: int, include_self: bool = True) -> int:
+        """Summed RSS of a process and all its descendants"""
+        pids = ProcessStats.descendants(pid)
+        if include_self:
+            pids.append(pid)
+        return sum(ProcessStats.rss_bytes(p) for p in pids)
+
+
 class RandomnessGenerator:
     """Generate random but realistic browsing patterns"""
     
@@ -177,6 +562,30 @@ class RandomnessGenerator:
         # Use triangular distribution for more realistic delays
         return random.triangular(min_val, max_val, (min_val + max_val) / 2)
     
+    @staticmethod
+    def get_reading_timeline(max_depth: int = 30000) -> List[List[int]]:
+        """Randomized scroll timeline for reading a page
+
+        Returns [scroll_px, pause_ms] steps with the same shape as the
+        agents' natural_scroll loop: variable scroll amounts, reading pauses,
+        occasional scroll-ups to re-read and occasional long pauses.
+        """
+        timeline = []
+        depth = 0
+        while depth < max_depth:
+            scroll_amount = random.randint(150, 400)
+            pause = random.uniform(1.5, 4.0) if scroll_amount > 250 else random.uniform(0.8, 2.0)
+            if random.random() < 0.2:  # Looking at images, thinking
+                pause += random.uniform(2.0, 5.0)
+            timeline.append([scroll_amount, int(pause * 1000)])
+            depth += scroll_amount
+
+            if random.random() < 0.15:  # Re-reading
+                scroll_up = random.randint(50, 150)
+                timeline.append([-scroll_up, int(random.uniform(0.5, 1.5) * 1000)])
+                depth -= scroll_up
+        return timeline
+    
     @staticmethod
     def get_random_element(items: List[str]) -> str:
         """Get random element from list"""
@@ -195,5 +604,9 @@ __all__ = [
     'Logger',
     'ConfigManager',
     'ActivityTracker',
+    'SessionCancelled',
+    'CancellationToken',
+    'SystemClock',
+    'ProcessStats',
     'RandomnessGenerator',
 ]
@@ -0,0 +1,59 @@
+"""
+Tests for the DecoyService session loop, run on simulated agents and a
+virtual clock
+"""
+
+import os
+import sys
+
+# Run from anywhere without installing the package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from decoy_service.decoy_service import DecoyService
+from decoy_service.simulation import VirtualClock, SimulatedAgent
+
+CONFIG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          'decoy_service', 'config')
+
+
+def make_service(**service_settings) -> DecoyService:
+    """A service of simulated agents on a virtual clock"""
+    service = DecoyService(CONFIG_DIR, clock=VirtualClock())
+    service.settings.setdefault('browser', {})['type'] = 'simulated'
+    service.settings['browser']['recycling'] = {}
+    service.settings.setdefault('simulation', {}).update(visit_failure_rate=0.0, crash_rate=0.0)
+    service.settings.setdefault('service', {}).update(agent_types=[], **service_settings)
+    return service
+
+
+def test_tabs_recover_from_one_crash_with_one_relaunch(monkeypatch):
+    """Every tab sees the crash, but the browser is relaunched once"""
+    visits = []
+    restarts = []
+    agents = []
+    visit_url = SimulatedAgent.visit_url
+    restart_browser = SimulatedAgent.restart_browser
+
+    def crashing_visit_url(self, url):
+        visits.append(url)
+        succeeded = visit_url(self, url)
+        if len(visits) == 6:
+            # Crash once the page is up, so whichever tab acts next finds it
+            self.is_open = False
+        return succeeded
+
+    def counting_restart_browser(self):
+        restarts.append(self.clock.now())
+        agents.append(self)
+        return restart_browser(self)
+
+    monkeypatch.setattr(SimulatedAgent, 'visit_url', crashing_visit_url)
+    monkeypatch.setattr(SimulatedAgent, 'restart_browser', counting_restart_browser)
+
+    service = make_service(parallel_agents=1, tabs_per_agent=3)
+    service.start_session(duration_minutes=30)
+
+    assert len(visits) > 10  # The tabs went on after the crash
+    assert len(restarts) == 1
+    assert len(agents[0].tabs) == 3  # Each tab reopened its own page
+    assert service.tracker.get_summary()['websites_visited'] > 0